@@ -1,6 +1,6 @@
 from langchain.agents import create_agent
 
-from backend.app.llms import llm_qwen
+from backend.app.llms import get_chat_model
 from backend.app.tools.amap_tools import amap_tools
 
 ATTRACTION_AGENT_PROMPT = """你是景点搜索专家。你的任务是根据城市和用户偏好搜索合适的景点。
@@ -27,10 +27,11 @@ ATTRACTION_AGENT_PROMPT = """你是景点搜索专家。你的任务是根据城
 import os
 os.environ["LANGCHAIN_TRACING_V2"] = "false"
 
-async def attraction_agent():
+async def attraction_agent(tools=None):
+    """创建景点搜索智能体; tools 为空时从工具注册表获取高德地图工具"""
     agent = create_agent(
-        model=llm_qwen,
-        tools=await amap_tools(),
+        model=get_chat_model(),
+        tools=tools if tools is not None else await amap_tools(),
         system_prompt=ATTRACTION_AGENT_PROMPT,
     )
     # response = await agent.ainvoke(
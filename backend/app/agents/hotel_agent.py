@@ -1,6 +1,6 @@
 from langchain.agents import create_agent
 
-from backend.app.llms import llm_qwen
+from backend.app.llms import get_chat_model
 from backend.app.tools.amap_tools import amap_tools
 
 HOTEL_AGENT_PROMPT = """你是酒店推荐专家。你的任务是根据城市和景点位置推荐合适的酒店。
@@ -24,10 +24,11 @@ HOTEL_AGENT_PROMPT = """你是酒店推荐专家。你的任务是根据城市
 import os
 os.environ["LANGCHAIN_TRACING_V2"] = "false"
 
-async def hotel_agent():
+async def hotel_agent(tools=None):
+    """创建酒店推荐智能体; tools 为空时从工具注册表获取高德地图工具"""
     agent = create_agent(
-        model=llm_qwen,
-        tools=await amap_tools(),
+        model=get_chat_model(),
+        tools=tools if tools is not None else await amap_tools(),
         system_prompt=HOTEL_AGENT_PROMPT,
     )
     # response = await agent.ainvoke(
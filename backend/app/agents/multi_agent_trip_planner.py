@@ -1,13 +1,70 @@
+import asyncio
 import json
+import math
+import re
+import time
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
 
-from langchain_core.messages import HumanMessage
+from langchain_core.messages import AIMessageChunk, BaseMessage, HumanMessage, ToolMessage
 
 from backend.app.agents.attraction_agent import attraction_agent
 from backend.app.agents.hotel_agent import hotel_agent
-from backend.app.agents.planner_agent import planner_agent
+from backend.app.agents.planner_agent import day_planner_agent, planner_agent
 from backend.app.agents.weather_agent import weather_agent
-from backend.app.llms import llm_qwen
-from backend.app.models.schemas import TripRequest, TripPlan, Meal, Location, Attraction, DayPlan
+from backend.app.config import get_settings
+from backend.app.llms import get_chat_model
+from backend.app.models.schemas import TripRequest, TripPlan, Meal, Location, Attraction, DayPlan, StageTiming, \
+    POIInfo, WeatherInfo, Budget, DegradedPart
+from backend.app.services.amap_cache import get_weather_cache
+from backend.app.services.amap_service import get_amap_service, merge_poi_results, parse_poi_list, \
+    parse_weather_response
+from backend.app.tools.amap_tools import get_amap_tool_registry
+from backend.app.utils.geo import NUMPY_AVAILABLE
+from backend.app.utils.json_stream import IncrementalTripPlanParser
+from backend.app.utils.prompt_digest import ATTRACTION_HEADER, HOTEL_HEADER, estimate_tokens, poi_digest, \
+    poi_row, weather_digest
+from backend.app.utils.single_flight import SingleFlight
+
+# 规划进度回调: (事件名, 事件数据)
+ProgressCallback = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+# 景点信息中的顶层列表项: "- xxx" / "1. xxx" / "**1. xxx**"
+_LIST_ITEM_PATTERN = re.compile(r"^\**(?:[-*•]|\d+[.、)])\s*\S")
+
+
+# 阶段在预算用完前留出的整理部分结果的时间(秒)
+_PARTIAL_RESULT_MARGIN = 0.5
+
+# 路线优化使用的景点间平均移动速度(米/分钟, 按直线距离), 按交通方式中的关键词匹配
+_TRAVEL_SPEEDS = {"步行": 60, "骑行": 180, "自驾": 500, "打车": 450, "公共交通": 300}
+_DEFAULT_TRAVEL_SPEED = 300
+
+# 路线优化使用的游览时长(分钟), 按高德POI类型中的关键词匹配(POI没有游览时长), 未匹配时使用默认值
+_VISIT_MINUTES = {
+    "主题乐园": 300, "游乐园": 300, "动物园": 180, "植物园": 150, "水族馆": 150, "博物馆": 150, "美术馆": 120,
+    "展览馆": 120, "风景名胜": 150, "公园": 90, "寺庙": 60, "教堂": 45, "步行街": 90, "购物": 120,
+}
+
+
+class StageOutput(NamedTuple):
+    """景点/天气/酒店阶段的输出"""
+    # 提供给行程规划Agent的内容(启用摘要时为紧凑表格)
+    text: str
+    # 未压缩的原始内容(Agent的最终回复), 用于对比prompt大小
+    raw: str
+    # 只得到部分结果时的说明
+    degraded: Optional[str] = None
+    # 结构化的POI结果(景点/酒店阶段), 用于本地路线优化
+    pois: Optional[List[POIInfo]] = None
+
+
+class BatchResult(NamedTuple):
+    """批量规划中单个请求的结果"""
+    # 请求在批量中的序号
+    index: int
+    plan: Optional[TripPlan]
+    error: Optional[str] = None
 
 
 class MultiAgentTripPlanner:
@@ -16,11 +73,14 @@ class MultiAgentTripPlanner:
         print("🔄 开始初始化多智能体旅行规划系统...")
 
         try:
-            self.llm = llm_qwen
+            self.llm = get_chat_model()
             self.attraction_agent = None
             self.hotel_agent = None
             self.weather_agent = None
             self.planner_agent = None
+            self.day_planner_agent = None
+            self._tools_version = None
+            self._init_lock = asyncio.Lock()
 
             print(f"✅ 多智能体系统初始化成功")
 
@@ -31,30 +91,77 @@ class MultiAgentTripPlanner:
             raise
 
     async def initialize(self):
-        """异步初始化各个Agent"""
+        """异步初始化各个Agent
+
+        高德地图工具只获取一次,供三个工具型Agent共用。新的Agent全部构建完成后才替换旧实例,
+        正在执行的请求不受影响。
+        """
         print("🔄 异步初始化各个智能体...")
-        self.attraction_agent = await attraction_agent()
-        self.hotel_agent = await hotel_agent()
-        self.weather_agent = await weather_agent()
-        self.planner_agent = await planner_agent()
+        registry = get_amap_tool_registry()
+        tools = await registry.get_tools()
+        tools_version = registry.version
+
+        agents = await asyncio.gather(
+            attraction_agent(tools),
+            hotel_agent(tools),
+            weather_agent(tools),
+            planner_agent(),
+            day_planner_agent(),
+        )
+        (self.attraction_agent, self.hotel_agent, self.weather_agent,
+         self.planner_agent, self.day_planner_agent) = agents
+        self._tools_version = tools_version
         print("✅ 各个智能体初始化完成")
 
-    async def plan_trip(self, request: TripRequest):
+    async def ensure_initialized(self):
+        """
+        确保Agent已构建且与当前工具定义一致
+
+        Agent是无状态的编译图(未配置checkpointer),每次调用的消息状态相互独立,
+        因此同一组Agent可以被并发请求安全共享,只在工具定义变化时重建。
+        """
+        if self.planner_agent is not None and self._tools_version == get_amap_tool_registry().version:
+            return
+
+        async with self._init_lock:
+            if self.planner_agent is not None and self._tools_version == get_amap_tool_registry().version:
+                return
+            await self.initialize()
+
+    async def plan_trip(
+            self,
+            request: TripRequest,
+            fast_path: Optional[bool] = None,
+            progress: Optional[ProgressCallback] = None,
+            shared: Optional[SingleFlight] = None
+    ):
 
         """
        使用多智能体协作生成旅行计划
 
        Args:
            request: 旅行请求
+           fast_path: 是否使用快速模式(景点/天气/酒店直接调用高德服务,不经过LLM),
+                      为None时使用 trip_planner_fast_path 配置
+           progress: 进度回调, 每个阶段完成时收到 "stage" 事件,
+                     行程规划生成过程中收到 "token" 事件,
+                     每天的行程/天气/预算解析完成时分别收到 "day"/"weather"/"budget" 事件
+           shared: 批量规划时共享的子任务结果(天气、POI搜索、酒店), 为None时不共享
 
        Returns:
-           旅行计划
+           旅行计划, 因截止时间或失败而降级的部分记录在 degraded 中
        """
         try:
+            # 端到端截止时间拆分为两段预算: 景点/天气/酒店(并发) 与 行程规划
+            settings = get_settings()
+            started = time.perf_counter()
+            deadline = settings.trip_plan_deadline if settings.trip_plan_deadline > 0 else math.inf
+            research_deadline = started + deadline * settings.trip_research_budget_ratio
+
             try:
-                await self.initialize()
+                await asyncio.wait_for(self.ensure_initialized(), timeout=research_deadline - time.perf_counter())
             except Exception as e:
-                print(f"⚠️  智能体初始化失败: {str(e)}")
+                print(f"⚠️  智能体初始化失败: {str(e) or type(e).__name__}")
 
             print(f"\n{'=' * 60}")
             print(f"🚀 开始多智能体协作规划旅行...")
@@ -62,47 +169,108 @@ class MultiAgentTripPlanner:
             print(f"日期: {request.start_date} 至 {request.end_date}")
             print(f"天数: {request.travel_days}天")
             print(f"偏好: {', '.join(request.preferences) if request.preferences else '无'}")
+            use_fast_path = settings.trip_planner_fast_path if fast_path is None else fast_path
+            mode = "fast" if use_fast_path else "agent"
+            print(f"模式: {'快速模式(直接调用高德服务)' if use_fast_path else '智能体模式'}")
             print(f"{'=' * 60}\n")
 
-            # 步骤1: 景点搜索Agent搜索景点
-            print("📍 步骤1: 搜索景点...")
-            attraction_query = self._build_attraction_query(request)
-            attraction_response = await self.attraction_agent.ainvoke(
-                {"messages": [HumanMessage(content=attraction_query)]}
-            )
-            attractions = attraction_response["messages"][-1].content
-            print(f"✅ 景点搜索完成:\n{attractions}\n")
-
-            # 步骤2: 天气查询Agent查询天气
-            print("☁️ 步骤2: 查询天气...")
-            weather_query = f"请查询{request.city}的天气信息"
-            weather_response = await self.weather_agent.ainvoke(
-                {"messages": [HumanMessage(content=weather_query)]}
-            )
-            weather_info = weather_response["messages"][-1].content
-            print(f"✅ 天气查询完成:\n{weather_info}\n")
-
-            # 步骤3: 酒店推荐Agent推荐酒店
-            print("🏨 步骤3: 推荐酒店...")
-            hotel_query = f"请搜索{request.city}的{request.accommodation}酒店"
-            hotel_response = await self.hotel_agent.ainvoke(
-                {"messages": [HumanMessage(content=hotel_query)]}
-            )
-            hotels = hotel_response["messages"][-1].content
-            print(f"✅ 酒店推荐完成:\n{hotels}\n")
-
-            # 步骤4: 行程规划Agent生成旅行计划
-            print("🗺️ 步骤4: 生成旅行计划...")
-            planner_query = self._build_planner_query(request, attractions, weather_info, hotels)
-            planner_response = await self.planner_agent.ainvoke(
-                {"messages": [HumanMessage(content=planner_query)]}
+            def research_budget(stage_timeout: float) -> float:
+                return max(0.0, min(stage_timeout, research_deadline - time.perf_counter()))
+
+            attraction_timeout = research_budget(settings.trip_attraction_stage_timeout)
+            weather_timeout = research_budget(settings.trip_weather_stage_timeout)
+            hotel_timeout = research_budget(settings.trip_hotel_stage_timeout)
+
+            # 步骤1-3: 景点、天气、酒店互不依赖,并发执行
+            print("📍 步骤1-3: 并发搜索景点、查询天气、推荐酒店...")
+            if use_fast_path:
+                stages = (
+                    self._search_attractions_fast(request, attraction_timeout - _PARTIAL_RESULT_MARGIN, shared),
+                    self._shared(shared, ("weather", request.city), lambda: self._query_weather_fast(request)),
+                    self._search_hotels_fast(request, shared),
+                )
+            else:
+                stages = (
+                    self._shared(shared, ("attraction_agent", request.city, tuple(dict.fromkeys(request.preferences))),
+                                 lambda: self._search_attractions(request)),
+                    self._shared(shared, ("weather_agent", request.city), lambda: self._query_weather(request)),
+                    self._shared(shared, ("hotel_agent", request.city, request.accommodation),
+                                 lambda: self._search_hotels(request)),
+                )
+            (attractions, attraction_timing), (weather_info, weather_timing), (hotels, hotel_timing) = await asyncio.gather(
+                self._run_stage("attractions", stages[0], attraction_timeout,
+                                StageOutput("暂无景点信息", "暂无景点信息"), mode, progress),
+                self._run_stage("weather", stages[1], weather_timeout,
+                                StageOutput("暂无天气信息", "暂无天气信息"), mode, progress,
+                                fallback=lambda: self._cached_weather(request.city)),
+                self._run_stage("hotels", stages[2], hotel_timeout,
+                                StageOutput("暂无酒店信息", "暂无酒店信息"), mode, progress),
             )
-            plan_response = planner_response["messages"][-1].content
-            print(f"✅ 行程规划完成:\n{plan_response}\n")
+            stage_timings = [attraction_timing, weather_timing, hotel_timing]
+
+            # 本地优化路线: 景点按地理位置分到每天并排好游览顺序, 规划Agent只需撰写描述
+            day_routes = self._optimize_routes(request, attractions.pois, hotels.pois)
+            if day_routes is not None:
+                attractions = attractions._replace(text="\n".join([ATTRACTION_HEADER, *day_routes]))
+                day_routes = [f"{ATTRACTION_HEADER}\n{route}" for route in day_routes]
+
+            # 规划Agent的输入: 摘要后 vs 直接拼接各Agent回复
+            planner_query = self._build_planner_query(request, attractions.text, weather_info.text, hotels.text,
+                                                      routed=day_routes is not None)
+            raw_query = self._build_planner_query(request, attractions.raw, weather_info.raw, hotels.raw)
+            prompt_tokens, raw_prompt_tokens = estimate_tokens(planner_query), estimate_tokens(raw_query)
+            print(f"📉 规划输入: {raw_prompt_tokens} → {prompt_tokens} tokens(估算)")
+
+            # 步骤4: 行程规划Agent生成旅行计划, 使用截止时间内剩余的全部预算
+            planner_timeout = max(0.0, min(settings.trip_planner_stage_timeout,
+                                           started + deadline - time.perf_counter()))
+            chunked = 0 < settings.trip_chunked_planning_min_days <= request.travel_days
+            if chunked:
+                # 长途旅行: 分天并发规划, 避免单次输出过长导致耗时线性增长和截断
+                print(f"🗺️ 步骤4: 分{request.travel_days}天并发生成旅行计划...")
+                trip_plan, planner_timing = await self._run_stage(
+                    "planner", self._generate_plan_chunked(request, attractions.text, weather_info.text, hotels.text,
+                                                           progress, planner_timeout - _PARTIAL_RESULT_MARGIN,
+                                                           day_routes),
+                    planner_timeout, None, "agent", progress
+                )
+                if trip_plan is None:
+                    trip_plan = self._create_fallback_plan(request)
+            else:
+                print("🗺️ 步骤4: 生成旅行计划...")
+                parser = IncrementalTripPlanParser()
+                plan_response, planner_timing = await self._run_stage(
+                    "planner", self._generate_plan(planner_query, progress, parser),
+                    planner_timeout, "", "agent", progress
+                )
+                # 解析响应为TripPlan对象; 超时或失败时使用已经输出的部分
+                try:
+                    trip_plan = self._parse_response(plan_response or parser.text, request)
+                except ValueError:
+                    print("   将使用备用方案生成计划")
+                    trip_plan = self._create_fallback_plan(request)
+                    # 阶段本身失败时已经记录为降级, 这里只记录阶段成功但输出不可用的情况
+                    if planner_timing.status == "success":
+                        trip_plan.degraded.append(DegradedPart(part="planner", reason="输出无法解析, 使用备用行程"))
+                # 输出被截断或天数不足时(包括阶段本身成功的情况), 缺少的天数用备用行程补齐
+                missing = self._fill_missing_days(trip_plan, request)
+                if missing:
+                    trip_plan.degraded.append(DegradedPart(
+                        part="days", reason=f"第{'、'.join(str(i + 1) for i in missing)}天未能生成, 使用备用行程"
+                    ))
+            planner_timing.prompt_tokens = prompt_tokens
+            planner_timing.raw_prompt_tokens = raw_prompt_tokens
+            stage_timings.append(planner_timing)
 
-            # 解析响应为TripPlan对象
-            trip_plan = self._parse_response(plan_response, request)
-            print(f"🎉 多智能体协作规划完成!")
+            trip_plan.stage_timings = stage_timings
+            trip_plan.degraded = [
+                DegradedPart(part=timing.name, reason=timing.error or timing.status)
+                for timing in stage_timings if timing.status != "success"
+            ] + trip_plan.degraded
+            self._print_stage_timings(stage_timings)
+            if trip_plan.degraded:
+                print("⚠️  降级的部分: " + "; ".join(f"{d.part}({d.reason})" for d in trip_plan.degraded))
+            print(f"🎉 多智能体协作规划完成! 总耗时 {time.perf_counter() - started:.1f}s")
             return trip_plan
         except Exception as e:
             print(f"❌ 多智能体协作失败: {str(e)}")
@@ -110,21 +278,659 @@ class MultiAgentTripPlanner:
             traceback.print_exc()
             raise
 
+    async def plan_trips(
+            self,
+            requests: Sequence[TripRequest],
+            fast_path: Optional[bool] = None,
+            concurrency: Optional[int] = None,
+            shared: Optional[SingleFlight] = None
+    ) -> AsyncIterator[BatchResult]:
+        """
+        批量生成旅行计划
+
+        所有请求共享同一组子任务结果: 同一城市的天气、同一城市和关键词的POI搜索、
+        同一城市和住宿偏好的酒店搜索只执行一次。规划在同一个并发上限下执行,
+        每完成一个就返回一个结果(顺序与请求顺序无关)。单个请求失败不影响其他请求。
+
+        Args:
+            requests: 旅行请求列表
+            fast_path: 是否使用快速模式, 为None时使用 trip_planner_fast_path 配置
+            concurrency: 同时执行的规划数, 为None时使用 trip_batch_concurrency 配置
+            shared: 共享的子任务结果, 为None时新建(传入可在结束后读取复用统计)
+
+        Returns:
+            按完成顺序产出的 BatchResult
+        """
+        limit = asyncio.Semaphore(max(1, concurrency or get_settings().trip_batch_concurrency))
+        shared = shared if shared is not None else SingleFlight()
+
+        async def run(index: int, request: TripRequest) -> BatchResult:
+            async with limit:
+                try:
+                    return BatchResult(index, await self.plan_trip(request, fast_path=fast_path, shared=shared))
+                except Exception as e:
+                    return BatchResult(index, None, str(e) or type(e).__name__)
+
+        print(f"📦 开始批量规划: {len(requests)} 个请求")
+        tasks = [asyncio.create_task(run(index, request)) for index, request in enumerate(requests)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # 调用方提前结束(如客户端断开)时取消剩余的规划
+            for task in tasks:
+                task.cancel()
+            shared.close()
+            print(f"📦 批量规划结束: 共享子任务执行 {shared.calls} 次, 复用 {shared.hits} 次")
+
+    async def _shared(
+            self,
+            shared: Optional[SingleFlight],
+            key: Tuple,
+            factory: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """批量规划时相同的子任务只执行一次"""
+        if shared is None:
+            return await factory()
+        return await shared.do(key, factory)
+
+    def _poi_search(self, shared: Optional[SingleFlight]) -> Callable[[str, str], Awaitable[List[POIInfo]]]:
+        """POI搜索函数, 批量规划时同一城市和关键词的搜索只执行一次"""
+        service = get_amap_service()
+        if shared is None:
+            return service.search_poi
+        return lambda keywords, city: shared.do(("poi", city, keywords), lambda: service.search_poi(keywords, city))
+
+    async def _run_stage(
+            self,
+            name: str,
+            coro: Awaitable[Tuple[Any, int]],
+            timeout: float,
+            default: Any,
+            mode: str = "agent",
+            progress: Optional[ProgressCallback] = None,
+            fallback: Optional[Callable[[], Any]] = None
+    ) -> Tuple[Any, StageTiming]:
+        """
+        执行单个阶段并计时
+
+        阶段超时或失败时返回备用结果(如缓存)或默认值,不会影响并发执行的其他阶段。
+        使用备用结果或阶段只得到部分结果时, 状态记为 degraded。
+
+        Args:
+            name: 阶段名称
+            coro: 阶段协程, 返回 (阶段输出, 消耗的token数)
+            timeout: 超时时间(秒)
+            default: 失败时使用的默认输出
+            mode: 执行方式 agent/fast
+            progress: 进度回调, 阶段结束时发送 "stage" 事件
+            fallback: 超时或失败时获取备用结果, 返回None表示没有
+
+        Returns:
+            (阶段输出, 阶段执行情况)
+        """
+        start = time.perf_counter()
+        tokens = 0
+        try:
+            output, tokens = await asyncio.wait_for(coro, timeout=timeout)
+            status, error = "success", None
+        except asyncio.TimeoutError:
+            output, status, error = default, "timeout", f"超过{timeout:.1f}秒未完成"
+            print(f"⏰ 阶段 {name} 超时({timeout:.1f}s)")
+        except Exception as e:
+            output, status, error = default, "failed", str(e)
+            print(f"❌ 阶段 {name} 失败: {e}")
+
+        if status != "success" and fallback is not None:
+            cached = fallback()
+            if cached is not None:
+                output, status, error = cached, "degraded", f"{error}, 使用缓存结果"
+        elif status == "success" and isinstance(output, StageOutput) and output.degraded:
+            status, error = "degraded", output.degraded
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        timing = StageTiming(
+            name=name, status=status, mode=mode, elapsed_ms=round(elapsed_ms, 1), tokens=tokens, error=error
+        )
+        await self._emit(progress, "stage", timing.model_dump())
+        return output, timing
+
+    async def _emit(self, progress: Optional[ProgressCallback], event: str, data: Dict[str, Any]):
+        """发送进度事件, 回调出错不影响规划流程"""
+        if progress is None:
+            return
+        try:
+            await progress(event, data)
+        except Exception as e:
+            print(f"⚠️  进度回调失败({event}): {e}")
+
+    async def _invoke_agent(self, agent, query: str) -> Tuple[str, int]:
+        """
+        调用Agent并统计token消耗
+
+        Returns:
+            (最后一条消息内容, 本次调用消耗的总token数)
+        """
+        messages, tokens = await self._invoke_agent_messages(agent, query)
+        return messages[-1].content, tokens
+
+    async def _invoke_agent_messages(self, agent, query: str) -> Tuple[List[BaseMessage], int]:
+        """
+        调用Agent并返回完整的消息列表(包含工具调用结果)
+
+        Returns:
+            (消息列表, 本次调用消耗的总token数)
+        """
+        response = await agent.ainvoke({"messages": [HumanMessage(content=query)]})
+        messages = response["messages"]
+        tokens = sum(
+            (getattr(message, "usage_metadata", None) or {}).get("total_tokens", 0)
+            for message in messages
+        )
+        return messages, tokens
+
+    def _tool_results(self, messages: List[BaseMessage]) -> List[Tuple[Dict[str, Any], Any]]:
+        """
+        取出Agent的工具调用结果
+
+        Returns:
+            (工具调用参数, 解析后的JSON结果) 列表, 无法解析为JSON的结果会被跳过
+        """
+        args_by_id = {
+            call["id"]: call.get("args", {})
+            for message in messages
+            for call in (getattr(message, "tool_calls", None) or [])
+        }
+        results = []
+        for message in messages:
+            if not isinstance(message, ToolMessage):
+                continue
+            content = message.content
+            if isinstance(content, list):
+                # MCP工具结果可能是内容块列表
+                content = "".join(block.get("text", "") if isinstance(block, dict) else str(block) for block in content)
+            try:
+                data = json.loads(content)
+            except (TypeError, json.JSONDecodeError):
+                continue
+            results.append((args_by_id.get(message.tool_call_id, {}), data))
+        return results
+
+    def _tool_result_pois(self, messages: List[BaseMessage], preferences: List[str]) -> List[POIInfo]:
+        """从Agent的POI搜索结果中取出POI, 合并去重(搜索关键词是偏好时计入匹配数)"""
+        results = [
+            (args.get("keywords") if args.get("keywords") in preferences else None, parse_poi_list(data["pois"]))
+            for args, data in self._tool_results(messages)
+            if isinstance(data, dict) and isinstance(data.get("pois"), list)
+        ]
+        return merge_poi_results(results)
+
+    def _poi_output(self, raw: str, pois: List[POIInfo], token_budget: int, header: str) -> StageOutput:
+        """POI阶段的输出: 启用摘要且有结构化结果时使用紧凑表格"""
+        if not get_settings().trip_planner_digest or not pois:
+            return StageOutput(raw, raw, pois=pois or None)
+        return StageOutput(poi_digest(pois, token_budget, header), raw, pois=pois)
+
+    def _optimize_routes(
+            self,
+            request: TripRequest,
+            attractions: Optional[List[POIInfo]],
+            hotels: Optional[List[POIInfo]]
+    ) -> Optional[List[str]]:
+        """
+        本地优化每天的景点和游览顺序
+
+        以第一家酒店为每天的起终点, 按交通方式估算路上时间, 按景点类型估算游览时长。
+
+        Returns:
+            每天的景点列表(已按游览顺序排列, 不含表头), 未启用或没有结构化景点结果时返回None
+        """
+        settings = get_settings()
+        if not settings.trip_itinerary_optimizer or not NUMPY_AVAILABLE or not attractions:
+            return None
+        from backend.app.utils.itinerary import optimize_itinerary
+
+        speed = next((v for k, v in _TRAVEL_SPEEDS.items() if k in request.transportation), _DEFAULT_TRAVEL_SPEED)
+        hotel = [(hotels[0].location.longitude, hotels[0].location.latitude)] if hotels else []
+        started = time.perf_counter()
+        routes = optimize_itinerary(
+            [(poi.location.longitude, poi.location.latitude) for poi in attractions],
+            request.travel_days,
+            visit_minutes=[self._visit_minutes(poi) for poi in attractions],
+            hotels=hotel,
+            daily_minutes=settings.trip_daily_minutes,
+            speed=speed,
+        )
+        print(f"🧭 路线优化完成: {sum(len(r.stops) for r in routes)}/{len(attractions)} 个景点, "
+              f"{(time.perf_counter() - started) * 1000:.1f}ms")
+
+        day_routes = []
+        for index, route in enumerate(routes):
+            title = f"第{index + 1}天(按顺序游览, 游览和路上约{route.minutes / 60:.1f}小时):"
+            rows = [poi_row(attractions[i]) for i in route.stops] or ["(没有安排景点, 可安排自由活动)"]
+            day_routes.append("\n".join([title, *rows]))
+        return day_routes
+
+    @staticmethod
+    def _visit_minutes(poi: POIInfo) -> Optional[int]:
+        """按POI类型估算游览时长(分钟), 无法估算时返回None(使用默认值)"""
+        return next((v for k, v in _VISIT_MINUTES.items() if k in (poi.type or "")), None)
+
+    def _weather_output(self, raw: str, forecasts: List[WeatherInfo]) -> StageOutput:
+        """天气阶段的输出: 启用摘要且有结构化结果时使用紧凑表格"""
+        if not get_settings().trip_planner_digest or not forecasts:
+            return StageOutput(raw, raw)
+        return StageOutput(weather_digest(forecasts), raw)
+
+    async def _search_attractions(self, request: TripRequest) -> Tuple[StageOutput, int]:
+        """景点搜索Agent搜索景点"""
+        attraction_query = self._build_attraction_query(request)
+        messages, tokens = await self._invoke_agent_messages(self.attraction_agent, attraction_query)
+        attractions = messages[-1].content
+        print(f"✅ 景点搜索完成:\n{attractions}\n")
+        pois = self._tool_result_pois(messages, request.preferences)
+        settings = get_settings()
+        return self._poi_output(attractions, pois, settings.trip_digest_attraction_tokens, ATTRACTION_HEADER), tokens
+
+    async def _query_weather(self, request: TripRequest) -> Tuple[StageOutput, int]:
+        """天气查询Agent查询天气(城市的预报已缓存且未过期时直接使用缓存, 不调用Agent)"""
+        weather_cache = get_weather_cache()
+        cached = weather_cache.peek(request.city)
+        if cached:
+            print(f"✅ 天气查询完成(缓存): {len(cached)} 天")
+            return self._weather_output(self._format_weather(cached), cached), 0
+
+        weather_query = f"请查询{request.city}的天气信息"
+        messages, tokens = await self._invoke_agent_messages(self.weather_agent, weather_query)
+        weather_info = messages[-1].content
+        print(f"✅ 天气查询完成:\n{weather_info}\n")
+        forecasts = [
+            forecast
+            for _, data in self._tool_results(messages)
+            if isinstance(data, dict) and "forecasts" in data
+            for forecast in parse_weather_response(data)
+        ]
+        if forecasts:
+            # 供之后的请求(包括快速模式和 /weather 接口)复用
+            weather_cache.put(request.city, forecasts)
+        return self._weather_output(weather_info, forecasts), tokens
+
+    async def _search_hotels(self, request: TripRequest) -> Tuple[StageOutput, int]:
+        """酒店推荐Agent推荐酒店"""
+        hotel_query = f"请搜索{request.city}的{request.accommodation}酒店"
+        messages, tokens = await self._invoke_agent_messages(self.hotel_agent, hotel_query)
+        hotels = messages[-1].content
+        print(f"✅ 酒店推荐完成:\n{hotels}\n")
+        pois = self._tool_result_pois(messages, [])
+        settings = get_settings()
+        return self._poi_output(hotels, pois, settings.trip_digest_hotel_tokens, HOTEL_HEADER), tokens
+
+    async def _search_attractions_fast(
+            self,
+            request: TripRequest,
+            timeout: Optional[float] = None,
+            shared: Optional[SingleFlight] = None
+    ) -> Tuple[StageOutput, int]:
+        """快速模式: 按所有偏好并发调用高德POI搜索景点, 合并去重; 超时时使用已返回的部分结果"""
+        pois, missed = await get_amap_service().search_attractions(
+            request.city, request.preferences, timeout=None if timeout is None else max(0.0, timeout),
+            search=self._poi_search(shared)
+        )
+        print(f"✅ 景点搜索完成(快速模式): {len(pois)} 个")
+        settings = get_settings()
+        output = self._poi_output(self._format_pois(pois), pois, settings.trip_digest_attraction_tokens,
+                                  ATTRACTION_HEADER)
+        if missed:
+            output = output._replace(degraded=f"关键词 {', '.join(missed)} 超时或失败, 使用部分结果({len(pois)}个)")
+        return output, 0
+
+    def _cached_weather(self, city: str) -> Optional[StageOutput]:
+        """天气阶段超时或失败时的备用结果: 天气缓存中未超过宽限期的预报"""
+        forecasts = get_weather_cache().peek(city, allow_stale=True)
+        if not forecasts:
+            return None
+        return self._weather_output(self._format_weather(forecasts), forecasts)
+
+    async def _query_weather_fast(self, request: TripRequest) -> Tuple[StageOutput, int]:
+        """快速模式: 直接调用高德天气查询"""
+        forecasts = await get_amap_service().get_weather(request.city)
+        if isinstance(forecasts, str):
+            # get_weather 失败时返回错误描述
+            raise RuntimeError(forecasts)
+        print(f"✅ 天气查询完成(快速模式): {len(forecasts)} 天")
+        return self._weather_output(self._format_weather(forecasts), forecasts), 0
+
+    async def _search_hotels_fast(
+            self,
+            request: TripRequest,
+            shared: Optional[SingleFlight] = None
+    ) -> Tuple[StageOutput, int]:
+        """快速模式: 直接调用高德POI搜索酒店"""
+        keywords = request.accommodation or "酒店"
+        pois = await self._poi_search(shared)(keywords, request.city)
+        print(f"✅ 酒店推荐完成(快速模式): {len(pois)} 个")
+        settings = get_settings()
+        return self._poi_output(self._format_pois(pois), pois, settings.trip_digest_hotel_tokens, HOTEL_HEADER), 0
+
+    def _format_pois(self, pois: List[POIInfo]) -> str:
+        """将POI列表格式化为规划Agent的输入"""
+        if not pois:
+            return "未找到相关结果"
+        return "\n".join(
+            f"- {poi.name} | 地址: {poi.address} | 类型: {poi.type} | "
+            f"坐标: {poi.location.longitude},{poi.location.latitude}"
+            for poi in pois
+        )
+
+    def _format_weather(self, forecasts: List[WeatherInfo]) -> str:
+        """将天气列表格式化为规划Agent的输入"""
+        if not forecasts:
+            return "未查询到天气信息"
+        return "\n".join(
+            f"- {w.date}: 白天{w.day_weather} {w.day_temp}°C, 夜间{w.night_weather} {w.night_temp}°C, "
+            f"{w.wind_direction}风 {w.wind_power}级"
+            for w in forecasts
+        )
+
+    async def _generate_plan(
+            self,
+            planner_query: str,
+            progress: Optional[ProgressCallback] = None,
+            parser: Optional[IncrementalTripPlanParser] = None
+    ) -> Tuple[str, int]:
+        """
+        行程规划Agent生成旅行计划
+
+        以流式方式调用, 每收到一段输出就发送 "token" 事件,
+        同时增量解析输出, 每当一天的行程(或天气、预算)完整时立即发送 "day"/"weather"/"budget" 事件。
+        调用方传入的 parser 在超时被取消后仍保留已经输出的内容。
+        """
+        parser = parser or IncrementalTripPlanParser()
+        tokens = 0
+        async for chunk, _ in self.planner_agent.astream(
+                {"messages": [HumanMessage(content=planner_query)]},
+                stream_mode="messages"
+        ):
+            if not isinstance(chunk, AIMessageChunk):
+                continue
+            tokens += (chunk.usage_metadata or {}).get("total_tokens", 0)
+            text = chunk.content if isinstance(chunk.content, str) else chunk.text
+            if text:
+                await self._emit(progress, "token", {"text": text})
+                for event, item in parser.feed(text):
+                    await self._emit(progress, event, item.model_dump())
+        plan_response = parser.text
+
+        print(f"✅ 行程规划完成:\n{plan_response}\n")
+        return plan_response, tokens
+
+    async def _generate_plan_chunked(
+            self,
+            request: TripRequest,
+            attractions: str,
+            weather: str,
+            hotels: str,
+            progress: Optional[ProgressCallback] = None,
+            timeout: Optional[float] = None,
+            day_routes: Optional[List[str]] = None
+    ) -> Tuple[TripPlan, int]:
+        """
+        长途旅行分天并发规划
+
+        先把景点分配到每一天(有本地优化的路线 day_routes 时直接使用, 否则按顺序平均分配),
+        再在并发上限内为每天单独调用单日规划Agent,
+        最后合并为一个TripPlan: 天气按日期对齐, 预算由每天的费用汇总得到。
+        某一天规划失败或超过 timeout 仍未完成时使用该天的备用行程, 不影响其他天。
+
+        Returns:
+            (旅行计划, 所有单日规划消耗的总token数)
+        """
+        settings = get_settings()
+        travel_days = request.travel_days
+        start_date = datetime.strptime(request.start_date, "%Y-%m-%d")
+        dates = [(start_date + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(travel_days)]
+        day_attractions = day_routes or self._assign_attractions(attractions, travel_days)
+        semaphore = asyncio.Semaphore(max(1, settings.trip_day_planning_concurrency))
+
+        async def plan_day(index: int):
+            query = self._build_day_planner_query(
+                request, index, dates[index], day_attractions[index],
+                self._weather_for_date(weather, dates[index]), hotels, routed=day_routes is not None
+            )
+            try:
+                async with semaphore:
+                    response, tokens = await asyncio.wait_for(
+                        self._invoke_agent(self.day_planner_agent, query),
+                        timeout=settings.trip_day_planning_timeout
+                    )
+                return index, self._parse_day_response(response, index, dates[index]), tokens
+            except Exception as e:
+                print(f"⚠️  第{index + 1}天规划失败: {e}")
+                return index, None, 0
+
+        days: List[Optional[DayPlan]] = [None] * travel_days
+        weather_by_date: Dict[str, WeatherInfo] = {}
+        transportation_costs = [0] * travel_days
+        tips = [""] * travel_days
+        total_tokens = 0
+        fallback_days = self._create_fallback_plan(request).days
+        failed: List[int] = []
+
+        tasks = [asyncio.ensure_future(plan_day(i)) for i in range(travel_days)]
+        try:
+            # 每天完成即推送, 不必等待最慢的一天
+            for future in asyncio.as_completed(tasks, timeout=None if timeout is None else max(0.0, timeout)):
+                index, result, tokens = await future
+                total_tokens += tokens
+                if result is None:
+                    failed.append(index)
+                    day, day_weather = fallback_days[index], None
+                else:
+                    day, day_weather, transportation_costs[index], tips[index] = result
+                days[index] = day
+                await self._emit(progress, "day", day.model_dump())
+                if day_weather is not None:
+                    weather_by_date[day_weather.date] = day_weather
+                    await self._emit(progress, "weather", day_weather.model_dump())
+        except asyncio.TimeoutError:
+            print(f"⏰ 分天规划超过 {timeout:.0f}s, 未完成的天使用备用行程")
+        finally:
+            # 超时或被取消时, 停止尚未完成的单日规划
+            for task in tasks:
+                task.cancel()
+
+        for index in range(travel_days):
+            if days[index] is None:
+                failed.append(index)
+                days[index] = fallback_days[index]
+                await self._emit(progress, "day", days[index].model_dump())
+
+        budget = Budget(
+            total_attractions=sum(a.ticket_price for day in days for a in day.attractions),
+            total_hotels=sum(day.hotel.estimated_cost for day in days if day.hotel),
+            total_meals=sum(m.estimated_cost for day in days for m in day.meals),
+            total_transportation=sum(transportation_costs),
+        )
+        budget.total = (budget.total_attractions + budget.total_hotels
+                        + budget.total_meals + budget.total_transportation)
+        await self._emit(progress, "budget", budget.model_dump())
+
+        suggestions = "\n".join(f"第{i + 1}天: {tip}" for i, tip in enumerate(tips) if tip)
+        trip_plan = TripPlan(
+            city=request.city,
+            start_date=request.start_date,
+            end_date=request.end_date,
+            days=days,
+            weather_info=[weather_by_date[date] for date in dates if date in weather_by_date],
+            overall_suggestions=suggestions or f"这是为您规划的{request.city}{travel_days}日游行程,建议提前查看各景点的开放时间。",
+            budget=budget,
+        )
+        if failed:
+            trip_plan.degraded.append(DegradedPart(
+                part="days", reason=f"第{'、'.join(str(i + 1) for i in sorted(failed))}天未能生成, 使用备用行程"
+            ))
+        print(f"✅ 分天规划完成: {travel_days} 天, {total_tokens} tokens")
+        return trip_plan, total_tokens
+
+    def _assign_attractions(self, attractions: str, travel_days: int) -> List[str]:
+        """
+        把景点信息按列表项顺序平均分配到每一天
+
+        景点信息无法拆分为列表项时, 每天都使用完整的景点信息。
+        """
+        preamble: List[str] = []
+        items: List[List[str]] = []
+        for line in attractions.splitlines():
+            if _LIST_ITEM_PATTERN.match(line):
+                items.append([line])
+            elif items and line.strip():
+                # 列表项的补充信息(地址、坐标等)
+                items[-1].append(line)
+            elif line.strip():
+                # 列表前的说明(如摘要表格的格式说明), 每天都保留
+                preamble.append(line)
+
+        if not items:
+            return [attractions] * travel_days
+
+        # 前 extra 天各多分配一个, 使每天的景点数最多相差一个
+        per_day, extra = divmod(len(items), travel_days)
+        assigned = []
+        start = 0
+        for i in range(travel_days):
+            end = start + per_day + (1 if i < extra else 0)
+            day_items = ["\n".join(item) for item in items[start:end]]
+            assigned.append("\n".join(preamble + day_items) if day_items else "")
+            start = end
+        return assigned
+
+    def _weather_for_date(self, weather: str, date: str) -> str:
+        """取出指定日期的天气, 找不到时返回完整天气信息"""
+        lines = [line for line in weather.splitlines() if date in line]
+        return "\n".join(lines) if lines else weather
+
+    def _build_day_planner_query(
+            self,
+            request: TripRequest,
+            day_index: int,
+            date: str,
+            attractions: str,
+            weather: str,
+            hotels: str,
+            routed: bool = False
+    ) -> str:
+        """构建单日行程规划查询, routed 表示景点已按优化后的路线排好顺序"""
+        if routed:
+            arrangement = "按给出的顺序游览分配给这一天的景点, 不要增删或调换"
+            route_hint = "路线已按距离优化, 只需为景点之间选择合适的交通方式"
+        else:
+            arrangement, route_hint = "只安排分配给这一天的景点(2-3个为宜)", "考虑景点之间的距离和交通方式"
+        if not attractions.strip():
+            attractions = f"这一天没有分配固定景点, 请安排{request.city}的自由活动(如特色街区、商圈、美食)"
+
+        query = f"""请为{request.city}{request.travel_days}天旅行中的第{day_index + 1}天生成行程:
+
+            **基本信息:**
+            - 城市: {request.city}
+            - 日期: {date}
+            - day_index: {day_index}
+            - 交通方式: {request.transportation}
+            - 住宿: {request.accommodation}
+            - 偏好: {', '.join(request.preferences) if request.preferences else '无'}
+
+            **分配给这一天的景点:**
+            {attractions}
+
+            **当天天气:**
+            {weather}
+
+            **酒店信息:**
+            {hotels}
+
+            **要求:**
+            1. {arrangement}
+            2. 必须包含早中晚三餐
+            3. 推荐一个具体的酒店(从酒店信息中选择, 优先选择第一家以保证每天住宿一致)
+            4. {route_hint}
+            5. 返回这一天完整的JSON格式数据
+            """
+        if request.free_text_input:
+            query += f"\n**额外要求:** {request.free_text_input}"
+
+        return query
+
+    def _parse_day_response(
+            self,
+            response: str,
+            day_index: int,
+            date: str
+    ) -> Tuple[DayPlan, Optional[WeatherInfo], int, str]:
+        """
+        解析单日规划Agent的响应
+
+        Returns:
+            (当日行程, 当日天气, 当日交通费用, 当日建议)
+        """
+        data = json.loads(self._extract_json(response))
+        weather = data.pop("weather", None)
+        transportation_cost = data.pop("transportation_cost", 0)
+        tips = data.pop("tips", "")
+
+        # 日期和序号以分配的为准
+        data["date"] = date
+        data["day_index"] = day_index
+        day = DayPlan(**data)
+
+        day_weather = None
+        if isinstance(weather, dict):
+            day_weather = WeatherInfo(**{**weather, "date": date})
+
+        try:
+            transportation_cost = int(transportation_cost)
+        except (TypeError, ValueError):
+            transportation_cost = 0
+        return day, day_weather, transportation_cost, str(tips or "")
+
+    def _print_stage_timings(self, stage_timings: List[StageTiming]):
+        """打印各阶段耗时和token消耗"""
+        print("⏱️  阶段耗时:")
+        for timing in stage_timings:
+            suffix = f" ({timing.error})" if timing.error else ""
+            if timing.prompt_tokens is not None:
+                suffix += f" 输入 {timing.raw_prompt_tokens} → {timing.prompt_tokens} tokens(估算)"
+            print(f"   - {timing.name}[{timing.mode}]: {timing.elapsed_ms:.0f}ms, "
+                  f"{timing.tokens} tokens [{timing.status}]{suffix}")
+        print(f"   合计: {sum(t.tokens for t in stage_timings)} tokens")
+
     def _build_attraction_query(self, request: TripRequest) -> str:
         """构建景点搜索查询 - 直接包含工具调用"""
-        keywords = []
-        if request.preferences:
-            # 只取第一个偏好作为关键词
-            keywords = request.preferences[0]
-        else:
-            keywords = "景点"
+        # 每个偏好加一次通用景点搜索, 由Agent同时发起
+        keywords = list(dict.fromkeys(request.preferences))
+        if "景点" not in keywords:
+            keywords.append("景点")
 
         # 直接返回工具调用格式
-        query = f"请使用amap_maps_text_search工具搜索{request.city}的{keywords}相关景点。\n[TOOL_CALL:amap_maps_text_search:keywords={keywords},city={request.city}]"
+        tool_calls = "\n".join(
+            f"[TOOL_CALL:amap_maps_text_search:keywords={k},city={request.city}]" for k in keywords
+        )
+        query = (f"请使用amap_maps_text_search工具同时搜索{request.city}的以下关键词相关景点: {', '.join(keywords)}。\n"
+                 f"合并结果并去掉重复的景点, 同时匹配多个偏好的景点排在前面。\n{tool_calls}")
         return query
 
-    def _build_planner_query(self, request: TripRequest, attractions: str, weather: str, hotels: str = "") -> str:
-        """构建行程规划查询"""
+    def _build_planner_query(
+            self,
+            request: TripRequest,
+            attractions: str,
+            weather: str,
+            hotels: str = "",
+            routed: bool = False
+    ) -> str:
+        """构建行程规划查询, routed 表示景点已按优化后的路线分好天并排好顺序"""
+        if routed:
+            arrangement = "按景点信息中每天的分组和顺序安排景点, 不要增删或调换, 只需撰写描述"
+            route_hint = "路线已按距离优化, 只需为景点之间选择合适的交通方式"
+        else:
+            arrangement, route_hint = "每天安排2-3个景点", "考虑景点之间的距离和交通方式"
         query = f"""请根据以下信息生成{request.city}的{request.travel_days}天旅行计划:
 
             **基本信息:**
@@ -145,10 +951,10 @@ class MultiAgentTripPlanner:
             {hotels}
         
             **要求:**
-            1. 每天安排2-3个景点
+            1. {arrangement}
             2. 每天必须包含早中晚三餐
             3. 每天推荐一个具体的酒店(从酒店信息中选择)
-            3. 考虑景点之间的距离和交通方式
+            3. {route_hint}
             4. 返回完整的JSON格式数据
             5. 景点的经纬度坐标要真实准确
             """
@@ -167,28 +973,13 @@ class MultiAgentTripPlanner:
 
         Returns:
             旅行计划
+
+        Raises:
+            ValueError: 响应中没有可用的行程(完整JSON和已输出的每日行程都无法解析)
         """
         try:
-            # 尝试从响应中提取JSON
-            # 查找JSON代码块
-            if "```json" in response:
-                json_start = response.find("```json") + 7
-                json_end = response.find("```", json_start)
-                json_str = response[json_start:json_end].strip()
-            elif "```" in response:
-                json_start = response.find("```") + 3
-                json_end = response.find("```", json_start)
-                json_str = response[json_start:json_end].strip()
-            elif "{" in response and "}" in response:
-                # 直接查找JSON对象
-                json_start = response.find("{")
-                json_end = response.rfind("}") + 1
-                json_str = response[json_start:json_end]
-            else:
-                raise ValueError("响应中未找到JSON数据")
-
             # 解析JSON
-            data = json.loads(json_str)
+            data = json.loads(self._extract_json(response))
 
             # 转换为TripPlan对象
             trip_plan = TripPlan(**data)
@@ -197,13 +988,48 @@ class MultiAgentTripPlanner:
 
         except Exception as e:
             print(f"⚠️  解析响应失败: {str(e)}")
-            print(f"   将使用备用方案生成计划")
-            return self._create_fallback_plan(request)
+
+        # 完整JSON无法解析(如尾部被截断)时, 保留已经完整输出的每日行程
+        parser = IncrementalTripPlanParser()
+        parser.feed(response)
+        trip_plan = parser.build_plan(request)
+        print(f"   已保留完整解析的 {len(trip_plan.days)} 天行程")
+        return trip_plan
+
+    def _fill_missing_days(self, trip_plan: TripPlan, request: TripRequest) -> List[int]:
+        """
+        用备用行程补齐缺少的天
+
+        Returns:
+            补齐的天的序号(从0开始)
+        """
+        present = {day.day_index for day in trip_plan.days}
+        missing = [i for i in range(request.travel_days) if i not in present]
+        if missing:
+            fallback_days = self._create_fallback_plan(request).days
+            trip_plan.days = sorted(trip_plan.days + [fallback_days[i] for i in missing], key=lambda d: d.day_index)
+        return missing
+
+    def _extract_json(self, response: str) -> str:
+        """从Agent响应中提取JSON文本"""
+        # 查找JSON代码块
+        if "```json" in response:
+            json_start = response.find("```json") + 7
+            json_end = response.find("```", json_start)
+            return response[json_start:json_end].strip()
+        if "```" in response:
+            json_start = response.find("```") + 3
+            json_end = response.find("```", json_start)
+            return response[json_start:json_end].strip()
+        if "{" in response and "}" in response:
+            # 直接查找JSON对象
+            json_start = response.find("{")
+            json_end = response.rfind("}") + 1
+            return response[json_start:json_end]
+        raise ValueError("响应中未找到JSON数据")
 
     def _create_fallback_plan(self, request: TripRequest) -> TripPlan:
         """创建备用计划(当Agent失败时)"""
-        from datetime import datetime, timedelta
-
         # 解析日期
         start_date = datetime.strptime(request.start_date, "%Y-%m-%d")
 
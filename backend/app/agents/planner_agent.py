@@ -76,16 +76,76 @@ PLANNER_AGENT_PROMPT = """你是行程规划专家。你的任务是根据景点
    - 酒店预估费用(estimated_cost)
    - 预算汇总(budget)包含各项总费用
 """
+
+DAY_PLANNER_AGENT_PROMPT = """你是行程规划专家。你的任务是为长途旅行中的某一天生成详细的行程安排。
+旅行的其他天由其他规划师同时规划,你只负责给定的这一天,并且只能使用分配给这一天的景点。
+
+请严格按照以下JSON格式返回这一天的行程:
+```json
+{
+  "date": "YYYY-MM-DD",
+  "day_index": 0,
+  "description": "当日行程概述",
+  "transportation": "交通方式",
+  "accommodation": "住宿类型",
+  "hotel": {
+    "name": "酒店名称",
+    "address": "酒店地址",
+    "location": {"longitude": 116.397128, "latitude": 39.916527},
+    "price_range": "300-500元",
+    "rating": "4.5",
+    "distance": "距离景点2公里",
+    "type": "经济型酒店",
+    "estimated_cost": 400
+  },
+  "attractions": [
+    {
+      "name": "景点名称",
+      "address": "详细地址",
+      "location": {"longitude": 116.397128, "latitude": 39.916527},
+      "visit_duration": 120,
+      "description": "景点详细描述",
+      "category": "景点类别",
+      "ticket_price": 60
+    }
+  ],
+  "meals": [
+    {"type": "breakfast", "name": "早餐推荐", "description": "早餐描述", "estimated_cost": 30},
+    {"type": "lunch", "name": "午餐推荐", "description": "午餐描述", "estimated_cost": 50},
+    {"type": "dinner", "name": "晚餐推荐", "description": "晚餐描述", "estimated_cost": 80}
+  ],
+  "weather": {
+    "date": "YYYY-MM-DD",
+    "day_weather": "晴",
+    "night_weather": "多云",
+    "day_temp": 25,
+    "night_temp": 15,
+    "wind_direction": "南风",
+    "wind_power": "1-3级"
+  },
+  "transportation_cost": 40,
+  "tips": "当日出行建议"
+}
+```
+
+**重要提示:**
+1. date 和 day_index 必须与要求中给出的一致
+2. 温度必须是纯数字(不要带°C等单位)
+3. 只安排分配给这一天的景点,考虑景点之间的距离和游览时间
+4. 必须包含早中晚三餐
+5. 必须包含门票(ticket_price)、餐饮、酒店(estimated_cost)和当日交通(transportation_cost)费用
+6. 只返回这一天的JSON,不要返回整个旅行计划
+"""
 import os
 os.environ["LANGCHAIN_TRACING_V2"] = "false"
 from langchain.agents import create_agent
 
-from backend.app.llms import llm_qwen
+from backend.app.llms import get_chat_model
 async def planner_agent():
 
 
     agent = create_agent(
-        model=llm_qwen,
+        model=get_chat_model(),
         tools=[],
         system_prompt=PLANNER_AGENT_PROMPT,
     )
@@ -93,4 +153,13 @@ async def planner_agent():
     #     {"messages": [{"role": "user", "content": "请帮我制定一个去巴黎的10天旅行计划。"}]}
     # )
     # print(response["messages"][-1].content)
-    return agent
\ No newline at end of file
+    return agent
+
+
+async def day_planner_agent():
+    """单日行程规划Agent(长途旅行分天并发规划时使用)"""
+    return create_agent(
+        model=get_chat_model(),
+        tools=[],
+        system_prompt=DAY_PLANNER_AGENT_PROMPT,
+    )
@@ -23,14 +23,15 @@ import os
 os.environ["LANGCHAIN_TRACING_V2"] = "false"
 from langchain.agents import create_agent
 
-from backend.app.llms import llm_qwen
+from backend.app.llms import get_chat_model
 from backend.app.tools.amap_tools import amap_tools
-async def weather_agent()-> create_agent:
+async def weather_agent(tools=None)-> create_agent:
+    """创建天气查询智能体; tools 为空时从工具注册表获取高德地图工具"""
 
 
     agent = create_agent(
-        model=llm_qwen,
-        tools=await amap_tools(),
+        model=get_chat_model(),
+        tools=tools if tools is not None else await amap_tools(),
         system_prompt=WEATHER_AGENT_PROMPT,
     )
     # response = await agent.ainvoke(
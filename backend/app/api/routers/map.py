@@ -4,9 +4,9 @@ import json
 from fastapi import APIRouter, HTTPException, Query
 from typing import Optional, Union, List, Dict, Any
 
-from backend.app.models.schemas import WeatherResponse, RouteResponse, RouteRequest, POISearchResponse, RouteInfo
+from backend.app.models.schemas import WeatherResponse, RouteResponse, RouteRequest, POISearchResponse
+from backend.app.services.amap_backends import get_amap_backend
 from backend.app.services.amap_service import get_amap_service
-from backend.app.tools.amap_tools import amap_tools
 
 router = APIRouter(prefix="/map", tags=["地图服务"])
 
@@ -82,38 +82,6 @@ async def get_weather(
 
 
 
-def _extract_distance_duration(data: Any) -> tuple:
-    def _coerce_float(x):
-        try:
-            return float(x)
-        except Exception:
-            return None
-    def _coerce_int(x):
-        try:
-            return int(float(x))
-        except Exception:
-            return None
-    dist = None
-    dur = None
-    if isinstance(data, dict):
-        for k, v in data.items():
-            if dist is None and k == "distance":
-                dist = _coerce_float(v)
-            elif dur is None and k == "duration":
-                dur = _coerce_int(v)
-            if (dist is None or dur is None):
-                d2, d3 = _extract_distance_duration(v)
-                dist = dist if dist is not None else d2
-                dur = dur if dur is not None else d3
-    elif isinstance(data, list):
-        for item in data:
-            if dist is not None and dur is not None:
-                break
-            d2, d3 = _extract_distance_duration(item)
-            dist = dist if dist is not None else d2
-            dur = dur if dur is not None else d3
-    return dist, dur
-
 @router.post(
     "/route",
     response_model=RouteResponse,
@@ -137,7 +105,9 @@ async def plan_route(request: RouteRequest):
             destination_address=request.destination_address,
             origin_city=request.origin_city,
             destination_city=request.destination_city,
-            route_type=request.route_type
+            route_type=request.route_type,
+            # 只用到距离和时间, 反方向的步行/骑行路线也可以命中缓存
+            include_raw=False
         )
         # 检查是否有错误
         if "error" in response:
@@ -153,14 +123,7 @@ async def plan_route(request: RouteRequest):
                 detail="路线规划失败"
             )
 
-        dist, dur = _extract_distance_duration(response.get("route_data"))
-        info = RouteInfo(
-            distance=float(dist or 0.0),
-            duration=int(dur or 0),
-            route_type=request.route_type,
-            description=f"{request.origin_address} -> {request.destination_address}"
-        )
-        return RouteResponse(success=True, message="路线规划成功", data=info)
+        return RouteResponse(success=True, message="路线规划成功", data=response["route_info"])
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"路线规划失败: {e}")
 
@@ -173,13 +136,16 @@ async def plan_route(request: RouteRequest):
 async def health_check():
     """健康检查"""
     try:
-        # 检查服务是否可用
-        service = get_amap_service()
+        # 检查当前配置的后端(mcp: 会话池, rest: REST接口)是否可用
+        backend = get_amap_backend()
+        status = await backend.check_health()
 
         return {
             "status": "healthy",
             "service": "map-service",
-            "mcp_tools_count": len(service.mcp_tool._available_tools)
+            "backend": backend.name,
+            **status,
+            "caches": get_amap_service().cache_stats()
         }
     except Exception as e:
         raise HTTPException(
@@ -0,0 +1,251 @@
+"""旅行规划API路由"""
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from starlette.responses import StreamingResponse
+
+from backend.app.agents.multi_agent_trip_planner import get_trip_planner_agent
+from backend.app.config import get_settings
+from backend.app.llms import get_llm_router, llm_http_pool_stats
+from backend.app.models.schemas import TripBatchRequest, TripRequest, TripPlanResponse, TripJobResponse
+from backend.app.services.trip_jobs import JobQueueFullError, get_trip_job_queue
+from backend.app.utils.single_flight import SingleFlight
+
+router = APIRouter(prefix="/trip", tags=["旅行规划"])
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    """格式化为一条SSE消息"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post(
+    "/plan",
+    response_model=TripPlanResponse,
+    summary="生成旅行计划",
+    description="根据旅行请求生成完整的旅行计划"
+)
+async def plan_trip(
+        request: TripRequest,
+        fast_path: Optional[bool] = Query(None, description="是否使用快速模式, 不传时使用服务端配置")
+):
+    """
+    生成旅行计划
+
+    Args:
+        request: 旅行请求
+        fast_path: 是否使用快速模式
+
+    Returns:
+        旅行计划
+    """
+    try:
+        planner = get_trip_planner_agent()
+        trip_plan = await planner.plan_trip(request, fast_path=fast_path)
+        return TripPlanResponse(success=True, message="旅行计划生成成功", data=trip_plan)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"旅行计划生成失败: {e}")
+
+
+@router.post(
+    "/plan/stream",
+    summary="流式生成旅行计划",
+    description="以SSE方式推送规划进度: start → stage(每个阶段完成时) → token(行程规划输出) / day / weather / budget → plan / error"
+)
+async def plan_trip_stream(
+        request: TripRequest,
+        fast_path: Optional[bool] = Query(None, description="是否使用快速模式, 不传时使用服务端配置")
+):
+    """
+    流式生成旅行计划
+
+    事件类型:
+        start: 请求已接收
+        stage: 某个阶段(attractions/weather/hotels/planner)完成, 数据为 StageTiming
+        token: 行程规划Agent的增量输出
+        day:     某一天的行程已完整输出, 数据为 DayPlan
+        weather: 某一天的天气已完整输出, 数据为 WeatherInfo
+        budget:  预算已完整输出, 数据为 Budget
+        plan:  最终的 TripPlanResponse
+        error: 规划失败
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def progress(event: str, data: Dict[str, Any]):
+        await queue.put((event, data))
+
+    async def run():
+        try:
+            planner = get_trip_planner_agent()
+            trip_plan = await planner.plan_trip(request, fast_path=fast_path, progress=progress)
+            response = TripPlanResponse(success=True, message="旅行计划生成成功", data=trip_plan)
+            await queue.put(("plan", response.model_dump()))
+        except Exception as e:
+            await queue.put(("error", {"message": f"旅行计划生成失败: {e}"}))
+        finally:
+            await queue.put(None)
+
+    async def event_stream() -> AsyncIterator[str]:
+        task = asyncio.create_task(run())
+        try:
+            # 立即返回首个事件, 客户端无需等待整个流程
+            yield _sse("start", {"city": request.city, "travel_days": request.travel_days})
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                yield _sse(*item)
+        finally:
+            # 客户端断开时取消规划任务
+            if not task.done():
+                task.cancel()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post(
+    "/plan/batch",
+    summary="批量生成旅行计划",
+    description="一次提交多个旅行请求, 共享天气/POI/酒店查询结果, 以SSE方式按完成顺序推送: start → result(每个请求) → done"
+)
+async def plan_trip_batch(
+        batch: TripBatchRequest,
+        fast_path: Optional[bool] = Query(None, description="是否使用快速模式, 不传时使用服务端配置")
+):
+    """
+    批量生成旅行计划
+
+    事件类型:
+        start:  请求已接收, 数据为请求数量
+        result: 某个请求规划完成, 数据为 TripPlanResponse 加上请求序号 index
+        done:   全部完成, 数据为成功/失败数量和共享子任务的执行/复用次数
+    """
+    max_requests = get_settings().trip_batch_max_requests
+    if len(batch.requests) > max_requests:
+        raise HTTPException(status_code=400, detail=f"单次批量最多 {max_requests} 个请求")
+
+    async def event_stream() -> AsyncIterator[str]:
+        yield _sse("start", {"count": len(batch.requests)})
+        shared = SingleFlight()
+        succeeded = 0
+        results = get_trip_planner_agent().plan_trips(batch.requests, fast_path=fast_path, shared=shared)
+        try:
+            async for result in results:
+                if result.plan is not None:
+                    succeeded += 1
+                    response = TripPlanResponse(success=True, message="旅行计划生成成功", data=result.plan)
+                else:
+                    response = TripPlanResponse(success=False, message=f"旅行计划生成失败: {result.error}")
+                yield _sse("result", {"index": result.index, **response.model_dump()})
+        finally:
+            # 客户端断开时取消剩余的规划
+            await results.aclose()
+        yield _sse("done", {
+            "succeeded": succeeded,
+            "failed": len(batch.requests) - succeeded,
+            "shared": shared.stats(),
+        })
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post(
+    "/jobs",
+    response_model=TripJobResponse,
+    status_code=202,
+    summary="提交旅行规划任务",
+    description="提交旅行请求后立即返回任务ID, 规划在后台执行"
+)
+async def submit_trip_job(
+        request: TripRequest,
+        fast_path: Optional[bool] = Query(None, description="是否使用快速模式, 不传时使用服务端配置")
+):
+    """
+    提交旅行规划任务
+
+    Args:
+        request: 旅行请求
+        fast_path: 是否使用快速模式
+
+    Returns:
+        排队中的任务
+    """
+    try:
+        job = await get_trip_job_queue().submit(request, fast_path=fast_path)
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return TripJobResponse(success=True, message="任务已提交", data=job)
+
+
+@router.get(
+    "/jobs/{job_id}",
+    response_model=TripJobResponse,
+    summary="查询旅行规划任务",
+    description="查询任务状态和各阶段进度"
+)
+async def get_trip_job(job_id: str):
+    """
+    查询旅行规划任务
+
+    Args:
+        job_id: 任务ID
+
+    Returns:
+        任务状态和进度
+    """
+    job = await get_trip_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"任务不存在: {job_id}")
+    return TripJobResponse(success=True, message="查询成功", data=job)
+
+
+@router.get(
+    "/jobs/{job_id}/result",
+    response_model=TripPlanResponse,
+    summary="获取旅行规划任务结果",
+    description="任务完成后返回旅行计划, 未完成时返回409"
+)
+async def get_trip_job_result(job_id: str):
+    """
+    获取旅行规划任务结果
+
+    Args:
+        job_id: 任务ID
+
+    Returns:
+        旅行计划(任务失败时 success 为 false)
+    """
+    queue = get_trip_job_queue()
+    job = await queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"任务不存在: {job_id}")
+    if job.status not in ("succeeded", "failed"):
+        raise HTTPException(status_code=409, detail=f"任务尚未完成, 当前状态: {job.status}")
+    return await queue.get_result(job_id)
+
+
+@router.get(
+    "/llm/stats",
+    summary="LLM路由统计",
+    description="各LLM后端的请求数、错误/限流次数、延迟分位数, 以及对冲请求次数和胜出率, 以及共享HTTP连接池状态"
+)
+async def llm_stats():
+    """
+    LLM路由统计
+
+    Returns:
+        LLM路由和各后端的统计信息, http_pool 为共享连接池统计
+    """
+    data = get_llm_router().stats()
+    data["http_pool"] = llm_http_pool_stats()
+    return {"success": True, "data": data}
@@ -3,7 +3,15 @@ from starlette.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from backend.app.config import get_settings, validate_config, print_config, settings
+from backend.app.agents.multi_agent_trip_planner import get_trip_planner_agent
 from backend.app.api.routers import map as map_routers
+from backend.app.api.routers import trip as trip_routers
+from backend.app.llms import close_llm_http_clients
+from backend.app.services.amap_backends import get_amap_backend
+from backend.app.services.amap_cache import close_geocode_cache
+from backend.app.services.trip_jobs import close_trip_job_queue, get_trip_job_queue
+from backend.app.tools.amap_tools import get_amap_session_pool, get_amap_tool_registry
+from backend.app.tools.unsplash_tools import get_unsplash_session_pool, get_unsplash_tool_registry
 
 
 @asynccontextmanager
@@ -22,6 +30,33 @@ async def lifespan(app: FastAPI):
         print("\n请检查.env文件并确保所有必要的配置项都已设置")
         raise
 
+    amap_pool = get_amap_session_pool()
+    amap_registry = get_amap_tool_registry()
+    try:
+        await amap_pool.open()
+        await amap_registry.start()
+    except Exception as e:
+        print(f"\n⚠️  高德地图MCP会话池初始化失败,将在首次调用时重试: {e}")
+
+    unsplash_pool = get_unsplash_session_pool()
+    unsplash_registry = get_unsplash_tool_registry()
+    try:
+        if settings.unsplash_mcp_transport == "stdio":
+            await unsplash_pool.open()
+        await unsplash_registry.start()
+    except Exception as e:
+        print(f"\n⚠️  Unsplash MCP工具初始化失败,将在首次调用时重试: {e}")
+
+    # 预热多智能体系统,各Agent在请求间复用
+    try:
+        await get_trip_planner_agent().ensure_initialized()
+    except Exception as e:
+        print(f"\n⚠️  智能体预热失败,将在首次规划时重试: {e}")
+
+    # 启动旅行规划后台任务队列, 恢复上次未完成的任务
+    job_queue = get_trip_job_queue()
+    await job_queue.start()
+
     print("\n" + "=" * 60)
     print("📚 API文档: http://localhost:8000/docs")
     print("📖 ReDoc文档: http://localhost:8000/redoc")
@@ -32,6 +67,14 @@ async def lifespan(app: FastAPI):
     finally:
         print("\n" + "=" * 60)
         print("👋 应用正在关闭...")
+        await close_trip_job_queue()
+        await close_geocode_cache()
+        await get_amap_backend().close()
+        await amap_registry.stop()
+        await amap_pool.close()
+        await unsplash_registry.stop()
+        await unsplash_pool.close()
+        await close_llm_http_clients()
         print("=" * 60 + "\n")
 
 
@@ -51,6 +94,7 @@ app.add_middleware(
 )
 
 app.include_router(map_routers.router, prefix="/api")
+app.include_router(trip_routers.router, prefix="/api")
 
 if __name__ == '__main__':
     import uvicorn
@@ -24,6 +24,60 @@ class Settings(BaseSettings):
 
     # 高德地图API配置
     amap_api_key: str = os.getenv("AMAP_API_KEY")
+    amap_mcp_url: str = "https://mcp.amap.com/mcp"
+
+    # 高德地图调用后端: mcp(MCP网关) / rest(直接调用Web服务REST接口)
+    amap_backend: str = "mcp"
+    amap_rest_base_url: str = "https://restapi.amap.com"
+    amap_http_max_connections: int = 20
+    amap_http_max_keepalive: int = 10
+    amap_http_keepalive_expiry: float = 30.0
+    amap_http_timeout: float = 10.0
+    amap_http2: bool = True
+
+    # 高德调用结果缓存的持久化(SQLite)路径, 为空时只缓存在内存中
+    amap_cache_db_path: str = str(Path(__file__).parent.parent / "data" / "amap_cache.db")
+    # 地理编码缓存: 内存LRU容量、有效期(秒)、"未找到"结果的有效期(秒)
+    amap_geocode_cache_size: int = 2048
+    amap_geocode_ttl: float = 30 * 24 * 3600
+    amap_geocode_negative_ttl: float = 3600.0
+    # 逆地理编码缓存: 按geohash格子缓存地址, geohash位数(8位约38m×19m)、最多保存的格子数、有效期(秒)
+    amap_regeocode_precision: int = 8
+    amap_regeocode_cache_size: int = 10000
+    amap_regeocode_ttl: float = 7 * 24 * 3600
+    # POI搜索缓存: 最多保存的查询数、关键词/周边搜索结果的有效期(秒)、过期后仍可返回旧结果并后台刷新的时间(秒)
+    amap_poi_cache_size: int = 1000
+    amap_poi_cache_ttl: float = 6 * 3600
+    amap_poi_nearby_cache_ttl: float = 3600.0
+    amap_poi_cache_stale_ttl: float = 24 * 3600
+    # 按关键词单独设置有效期, 格式 "关键词=秒数,关键词=秒数", 如 "酒店=1800"
+    amap_poi_cache_ttl_overrides: str = ""
+    # 周边搜索的坐标取整到的小数位数(3位约110米), 同一取整坐标的查询共用缓存
+    amap_poi_nearby_precision: int = 3
+    # 天气预报缓存: 高德预报每天在这些整点(北京时间)前后发布, 缓存在下一次发布后 delay 秒失效
+    amap_weather_publish_hours: str = "8,11,18"
+    amap_weather_publish_delay: float = 900.0
+    amap_weather_cache_size: int = 500
+    # 失效后仍可返回旧预报并在后台刷新的时间(秒)
+    amap_weather_stale_ttl: float = 1800.0
+    # 路线规划缓存: 最多保存的路线摘要数、原始路线数据数(较大, 单独限制)
+    amap_route_cache_size: int = 5000
+    amap_route_raw_cache_size: int = 200
+    # 步行/骑行路线的有效期(秒)、驾车/公交路线(受路况和班次影响)的有效期(秒)
+    amap_route_cache_ttl: float = 24 * 3600
+    amap_route_traffic_ttl: float = 1800.0
+
+    # MCP会话池配置
+    amap_mcp_pool_size: int = 4
+    mcp_health_check_interval: float = 30.0
+    mcp_connect_timeout: float = 15.0
+    mcp_tool_registry_ttl: float = 600.0
+
+    # Unsplash MCP配置: stdio(独立工作进程) / inprocess(同进程直接调用)
+    unsplash_mcp_transport: str = "stdio"
+    unsplash_mcp_pool_size: int = 2
+    unsplash_mcp_max_calls: int = 500
+    unsplash_mcp_max_age: float = 3600.0
 
     # Unsplash API配置
     unsplash_access_key: str = os.getenv("UNSPLASH_ACCESS_KEY")
@@ -33,6 +87,71 @@ class Settings(BaseSettings):
     llm_model_name: str = os.getenv("LLM_MODEL_NAME")
     llm_base_url: str = os.getenv("LLM_BASE_URL")
 
+    # LLM共享HTTP客户端: 所有LLM客户端复用同一个连接池
+    llm_http_max_connections: int = 50
+    llm_http_max_keepalive: int = 20
+    llm_http_keepalive_expiry: float = 60.0
+    llm_http_timeout: float = 120.0
+    llm_http_connect_timeout: float = 10.0
+    llm_http2: bool = True
+
+    # LLM路由: 可用后端按优先级排列(qwen/deepseek), 未配置API Key的后端会被跳过
+    llm_router_backends: str = "qwen,deepseek"
+    # 对冲请求: 首选后端超过其延迟分位数仍未响应时, 同时请求下一个后端
+    llm_hedge_enabled: bool = True
+    llm_hedge_percentile: float = 95.0
+    llm_hedge_min_samples: int = 20
+    llm_hedge_default_delay: float = 10.0
+    llm_hedge_min_delay: float = 0.5
+    # 首选后端平均延迟超过其他后端的该倍数时改用更快的后端
+    llm_slow_factor: float = 2.0
+    # 后端被限流或连续出错后的冷却时间(秒)
+    llm_backend_cooldown: float = 30.0
+
+    # 旅行规划快速模式: 景点/天气/酒店直接调用高德服务,只有行程规划使用LLM
+    trip_planner_fast_path: bool = False
+
+    # 端到端截止时间(秒): 拆分为各阶段的预算, 预算用完的阶段以已有的部分结果继续(0表示不限制)
+    trip_plan_deadline: float = 150.0
+    # 景点/天气/酒店阶段(并发执行)占截止时间的比例, 其余留给行程规划
+    trip_research_budget_ratio: float = 0.3
+
+    # 旅行规划各阶段超时(秒), 与截止时间拆分出的预算取较小值
+    trip_attraction_stage_timeout: float = 60.0
+    trip_weather_stage_timeout: float = 30.0
+    trip_hotel_stage_timeout: float = 60.0
+    trip_planner_stage_timeout: float = 180.0
+
+    # 规划Agent输入摘要: 把工具结果压缩为紧凑表格代替各Agent的自由文本回复
+    trip_planner_digest: bool = True
+    # 摘要中景点/酒店表格的token预算, 超出时保留排序靠前的结果
+    trip_digest_attraction_tokens: int = 800
+    trip_digest_hotel_tokens: int = 300
+
+    # 长途旅行分天并发规划: 天数达到阈值时先把景点分配到每天, 再并发生成每天的行程(0表示不启用)
+    trip_chunked_planning_min_days: int = 5
+    # 分天规划时同时进行的LLM调用数
+    trip_day_planning_concurrency: int = 4
+    # 单日行程规划超时(秒)
+    trip_day_planning_timeout: float = 90.0
+
+    # 旅行规划后台任务: 同时执行的任务数、排队上限、任务存储(SQLite)路径
+    trip_job_workers: int = 2
+    trip_job_max_queued: int = 100
+    trip_job_db_path: str = str(Path(__file__).parent.parent / "data" / "trip_jobs.db")
+    # 已完成(成功或失败)任务及其结果的保留时间(小时), <=0 表示不清理; 清理检查间隔(秒)
+    trip_job_retention_hours: float = 72.0
+    trip_job_prune_interval: float = 3600.0
+
+    # 本地行程路线优化: 把景点按地理位置分到每天并排好游览顺序, 规划Agent只需撰写描述(需要NumPy)
+    trip_itinerary_optimizer: bool = True
+    # 每天可用于游览和路上的时间(分钟)
+    trip_daily_minutes: int = 480
+
+    # 批量旅行规划: 同时执行的规划数、单次批量的请求数上限
+    trip_batch_concurrency: int = 4
+    trip_batch_max_requests: int = 20
+
     log_level: str = "INFO"
 
     class Config:
@@ -87,6 +206,7 @@ def print_config():
     print(f"版本: {settings.app_version}")
     print(f"服务器: {settings.host}:{settings.port}")
     print(f"高德地图API Key: {'已配置' if settings.amap_api_key else '未配置'}")
+    print(f"高德地图调用后端: {settings.amap_backend}")
 
     # 检查LLM配置
     llm_api_key = os.getenv("LLM_API_KEY") or os.getenv("DASHSCOPE_API_KEY")
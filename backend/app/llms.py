@@ -1,16 +1,148 @@
-from langchain_openai import ChatOpenAI
+"""LLM客户端
+
+llm_qwen / llm_deepseek 以及它们共享的HTTP客户端都在首次访问时创建, 导入本模块不会建立任何连接。
+所有LLM客户端复用同一个连接池(长连接、连接上限、HTTP/2和超时由 llm_http_* 配置)。
+"""
+
 import os
+from typing import Any, Dict
+
+import httpx
+from langchain_openai import ChatOpenAI
 
 from backend.app.config import get_settings
+from backend.app.utils.http import HTTP2_AVAILABLE, pool_stats
+from backend.app.utils.llm_router import HedgedChatModel, LLMRouter
+
+# 共享的HTTP客户端
+_http_client = None
+_http_async_client = None
+# 已创建的LLM客户端
+_llms: Dict[str, ChatOpenAI] = {}
+
+
+def _http_options() -> Dict[str, Any]:
+    settings = get_settings()
+    return {
+        "limits": httpx.Limits(
+            max_connections=settings.llm_http_max_connections,
+            max_keepalive_connections=settings.llm_http_max_keepalive,
+            keepalive_expiry=settings.llm_http_keepalive_expiry,
+        ),
+        "timeout": httpx.Timeout(settings.llm_http_timeout, connect=settings.llm_http_connect_timeout),
+        "http2": settings.llm_http2 and HTTP2_AVAILABLE,
+    }
+
+
+def get_llm_http_client() -> httpx.Client:
+    """LLM共享的同步HTTP客户端(首次使用时创建)"""
+    global _http_client
+
+    if _http_client is None:
+        _http_client = httpx.Client(**_http_options())
+
+    return _http_client
+
+
+def get_llm_http_async_client() -> httpx.AsyncClient:
+    """LLM共享的异步HTTP客户端(首次使用时创建)"""
+    global _http_async_client
+
+    if _http_async_client is None:
+        _http_async_client = httpx.AsyncClient(**_http_options())
+
+    return _http_async_client
+
+
+def llm_http_pool_stats() -> Dict[str, Any]:
+    """LLM共享连接池的统计信息(不会触发创建)"""
+    return pool_stats(_http_async_client)
+
+
+async def close_llm_http_clients():
+    """关闭共享的HTTP客户端"""
+    global _http_client, _http_async_client
+
+    if _http_async_client is not None:
+        await _http_async_client.aclose()
+        _http_async_client = None
+    if _http_client is not None:
+        _http_client.close()
+        _http_client = None
+    # LLM客户端持有旧的HTTP客户端, 需要重新创建
+    _llms.clear()
+
+
+def _llm_config(name: str) -> Dict[str, Any]:
+    settings = get_settings()
+    if name == "llm_qwen":
+        return {
+            "model": settings.llm_model_name,
+            "api_key": settings.llm_api_key,
+            "base_url": settings.llm_base_url,
+        }
+    if name == "llm_deepseek":
+        return {
+            "model": "deepseek-chat",
+            "api_key": os.getenv("DEEPSEEK_API_KEY"),
+            "base_url": os.getenv("DEEPSEEK_BASE_URL"),
+        }
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _get_llm(name: str) -> ChatOpenAI:
+    if name not in _llms:
+        settings = get_settings()
+        _llms[name] = ChatOpenAI(
+            **_llm_config(name),
+            http_client=get_llm_http_client(),
+            http_async_client=get_llm_http_async_client(),
+            # openai SDK 会以自己的默认超时覆盖HTTP客户端的超时, 需要显式传入
+            timeout=httpx.Timeout(settings.llm_http_timeout, connect=settings.llm_http_connect_timeout),
+        )
+    return _llms[name]
+
+
+def __getattr__(name: str) -> ChatOpenAI:
+    """llm_qwen / llm_deepseek 在首次访问时创建"""
+    return _get_llm(name)
+
+
+# 全局LLM路由实例
+_llm_router = None
+
+
+def get_llm_router() -> LLMRouter:
+    """获取LLM路由(单例模式), 后端由 llm_router_backends 配置决定"""
+    global _llm_router
+
+    if _llm_router is None:
+        settings = get_settings()
+        backends = []
+        for name in (n.strip() for n in settings.llm_router_backends.split(",") if n.strip()):
+            try:
+                config = _llm_config(f"llm_{name}")
+            except AttributeError:
+                raise ValueError(f"不支持的LLM后端: {name}")
+            if config["api_key"]:
+                backends.append((name, _get_llm(f"llm_{name}")))
+            else:
+                print(f"⚠️  LLM后端 {name} 未配置API Key, 不参与路由")
+
+        _llm_router = LLMRouter(
+            backends,
+            hedge=settings.llm_hedge_enabled,
+            hedge_percentile=settings.llm_hedge_percentile,
+            min_samples=settings.llm_hedge_min_samples,
+            default_delay=settings.llm_hedge_default_delay,
+            min_delay=settings.llm_hedge_min_delay,
+            slow_factor=settings.llm_slow_factor,
+            cooldown=settings.llm_backend_cooldown,
+        )
+
+    return _llm_router
+
 
-llm_qwen = ChatOpenAI(
-    model=get_settings().llm_model_name,
-    api_key=get_settings().llm_api_key,
-    base_url=get_settings().llm_base_url
-)
-
-llm_deepseek = ChatOpenAI(
-    model="deepseek-chat",
-    api_key=os.getenv("DEEPSEEK_API_KEY"),
-    base_url=os.getenv("DEEPSEEK_BASE_URL"),
-    )
\ No newline at end of file
+def get_chat_model() -> HedgedChatModel:
+    """各Agent使用的聊天模型: 经由LLM路由在多个后端间对冲请求"""
+    return HedgedChatModel(router=get_llm_router())
@@ -2,7 +2,7 @@
 
 from typing import List, Optional, Union
 from pydantic import BaseModel, Field, field_validator
-from datetime import date
+from datetime import date, datetime
 
 
 # ============ 请求模型 ============
@@ -139,6 +139,24 @@ class Budget(BaseModel):
     total: int = Field(default=0, description="总费用")
 
 
+class StageTiming(BaseModel):
+    """规划阶段执行情况"""
+    name: str = Field(..., description="阶段名称: attractions/weather/hotels/planner")
+    status: str = Field(..., description="执行状态: success/degraded(使用部分或缓存结果)/failed/timeout")
+    mode: str = Field(default="agent", description="执行方式: agent(经过LLM)/fast(直接调用服务)")
+    elapsed_ms: float = Field(default=0, description="耗时(毫秒)")
+    tokens: int = Field(default=0, description="消耗的LLM token数")
+    error: Optional[str] = Field(default=None, description="错误信息")
+    prompt_tokens: Optional[int] = Field(default=None, description="行程规划阶段: 规划Agent的输入token数(估算)")
+    raw_prompt_tokens: Optional[int] = Field(default=None, description="行程规划阶段: 不使用摘要时的输入token数(估算)")
+
+
+class DegradedPart(BaseModel):
+    """因超时或失败而降级的规划部分"""
+    part: str = Field(..., description="降级的部分: attractions/weather/hotels/planner/days")
+    reason: str = Field(..., description="降级原因")
+
+
 class TripPlan(BaseModel):
     """旅行计划"""
     city: str = Field(..., description="目的地城市")
@@ -148,6 +166,8 @@ class TripPlan(BaseModel):
     weather_info: List[WeatherInfo] = Field(default=[], description="天气信息")
     overall_suggestions: str = Field(..., description="总体建议")
     budget: Optional[Budget] = Field(default=None, description="预算信息")
+    stage_timings: List[StageTiming] = Field(default=[], description="各规划阶段的执行情况")
+    degraded: List[DegradedPart] = Field(default=[], description="降级的部分, 为空表示所有阶段均完整完成")
 
 
 class TripPlanResponse(BaseModel):
@@ -157,6 +177,30 @@ class TripPlanResponse(BaseModel):
     data: Optional[TripPlan] = Field(default=None, description="旅行计划数据")
 
 
+class TripJob(BaseModel):
+    """旅行规划后台任务"""
+    job_id: str = Field(..., description="任务ID")
+    status: str = Field(..., description="任务状态: queued/running/succeeded/failed")
+    created_at: datetime = Field(..., description="提交时间")
+    started_at: Optional[datetime] = Field(default=None, description="开始执行时间")
+    finished_at: Optional[datetime] = Field(default=None, description="结束时间")
+    stages: List[StageTiming] = Field(default=[], description="已完成的规划阶段")
+    days_completed: int = Field(default=0, description="已生成的行程天数")
+    error: Optional[str] = Field(default=None, description="失败原因")
+
+
+class TripBatchRequest(BaseModel):
+    """批量旅行规划请求"""
+    requests: List[TripRequest] = Field(..., description="旅行请求列表", min_length=1)
+
+
+class TripJobResponse(BaseModel):
+    """旅行规划任务响应"""
+    success: bool = Field(..., description="是否成功")
+    message: str = Field(default="", description="消息")
+    data: Optional[TripJob] = Field(default=None, description="任务信息")
+
+
 class POIInfo(BaseModel):
     """POI信息"""
     id: str = Field(..., description="POI ID")
@@ -165,6 +209,8 @@ class POIInfo(BaseModel):
     address: str = Field(..., description="地址")
     location: Location = Field(..., description="经纬度坐标")
     tel: Optional[str] = Field(default=None, description="电话")
+    rating: Optional[float] = Field(default=None, description="评分")
+    cost: Optional[float] = Field(default=None, description="人均消费/门票价格(元)")
 
 
 class POISearchResponse(BaseModel):
@@ -0,0 +1,313 @@
+"""高德地图调用后端
+
+AmapService 通过后端按工具名调用高德地图能力,后端统一返回高德MCP网关格式的字典,
+因此上层的解析逻辑(POIInfo / WeatherInfo / Location)与具体后端无关:
+    - mcp:  经由高德MCP网关(https://mcp.amap.com/mcp)调用
+    - rest: 直接调用高德Web服务REST接口,使用连接池化的异步HTTP客户端
+"""
+
+import json
+from typing import Any, Dict, Optional
+
+import httpx
+
+from backend.app.config import get_settings
+from backend.app.tools.amap_tools import get_amap_session_pool, get_amap_tool_registry
+from backend.app.utils.cache import TTLCache
+from backend.app.utils.http import HTTP2_AVAILABLE, pool_stats
+from backend.app.utils.mcp import MCPSessionPool
+from backend.app.utils.tool_registry import ToolRegistry
+
+
+class AmapBackend:
+    """高德地图调用后端基类"""
+
+    name = "base"
+
+    async def call(self, tool_name: str, payload: Dict[str, Any]) -> Any:
+        """
+        按MCP工具名调用高德地图能力
+
+        Args:
+            tool_name: MCP工具名, 如 maps_text_search
+            payload: 工具参数
+
+        Returns:
+            高德MCP网关格式的响应数据
+        """
+        raise NotImplementedError
+
+    async def check_health(self) -> Dict[str, Any]:
+        """
+        检查后端是否可用
+
+        Returns:
+            后端状态信息
+
+        Raises:
+            RuntimeError: 后端不可用
+        """
+        return {}
+
+    async def close(self):
+        """释放后端持有的连接"""
+
+
+class MCPAmapBackend(AmapBackend):
+    """经由高德MCP网关调用"""
+
+    name = "mcp"
+
+    def __init__(self, registry: Optional[ToolRegistry] = None, pool: Optional[MCPSessionPool] = None):
+        """
+        Args:
+            registry: 工具注册表, 默认为全局的高德工具注册表
+            pool: 健康检查使用的会话池, 使用默认注册表时默认为全局的高德会话池
+        """
+        self.registry = registry or get_amap_tool_registry()
+        self.pool = pool or (get_amap_session_pool() if registry is None else None)
+
+    async def call(self, tool_name: str, payload: Dict[str, Any]) -> Any:
+        tool = await self.registry.aget(tool_name)
+        if not tool:
+            raise RuntimeError(f"未找到 {tool_name} 工具")
+
+        response = await tool.ainvoke(payload) if hasattr(tool, "ainvoke") else tool.invoke(payload)
+        return json.loads(response) if isinstance(response, str) else response
+
+    async def check_health(self) -> Dict[str, Any]:
+        """检查MCP会话池(失效的会话自动重连)"""
+        status = {"mcp_tools": self.registry.stats()}
+        if self.pool is not None:
+            if await self.pool.check_health() == 0:
+                raise RuntimeError("没有可用的MCP会话")
+            status["mcp_pool"] = self.pool.stats()
+        return status
+
+
+class RestAmapBackend(AmapBackend):
+    """直接调用高德Web服务REST接口
+
+    所有请求共享一个httpx.AsyncClient(长连接复用,安装h2时启用HTTP/2),
+    响应被规整为与MCP网关相同的结构。
+    """
+
+    name = "rest"
+
+    # MCP工具名 -> (REST路径, 结果规整方法名)
+    TOOL_ENDPOINTS = {
+        "maps_text_search": ("/v3/place/text", "_normalize_pois"),
+        "maps_around_search": ("/v3/place/around", "_normalize_pois"),
+        "maps_search_detail": ("/v3/place/detail", "_normalize_pois"),
+        "maps_geo": ("/v3/geocode/geo", "_normalize_geocode"),
+        "maps_regeocode": ("/v3/geocode/regeo", "_normalize_regeocode"),
+        "maps_distance": ("/v3/distance", "_normalize_distance"),
+        "maps_direction_walking": ("/v3/direction/walking", "_normalize_route"),
+        "maps_direction_driving": ("/v3/direction/driving", "_normalize_route"),
+        "maps_direction_transit_integrated": ("/v3/direction/transit/integrated", "_normalize_route"),
+        "maps_direction_bicycling": ("/v4/direction/bicycling", "_normalize_route"),
+    }
+
+    def __init__(
+            self,
+            api_key: str,
+            base_url: str = "https://restapi.amap.com",
+            max_connections: int = 20,
+            max_keepalive_connections: int = 10,
+            keepalive_expiry: float = 30.0,
+            timeout: float = 10.0,
+            http2: bool = True,
+            adcode_cache_size: int = 512,
+    ):
+        """
+        初始化REST后端
+
+        Args:
+            api_key: 高德Web服务Key
+            base_url: REST接口地址
+            max_connections: 最大连接数
+            max_keepalive_connections: 最大空闲长连接数
+            keepalive_expiry: 空闲长连接保持时间(秒)
+            timeout: 请求超时(秒)
+            http2: 是否启用HTTP/2(需要安装h2,未安装时自动退回HTTP/1.1)
+            adcode_cache_size: 最多缓存的城市adcode数
+        """
+        self.api_key = api_key
+        self.base_url = base_url
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = timeout
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self._client: Optional[httpx.AsyncClient] = None
+        # 城市名称 -> adcode, 天气接口只接受adcode; 键来自调用方传入的城市名, 限制容量
+        self._adcodes = TTLCache(adcode_cache_size, ttl=7 * 24 * 3600)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """共享的异步HTTP客户端(首次使用时创建)"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                limits=self.limits,
+                timeout=self.timeout,
+                http2=self.http2,
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def check_health(self) -> Dict[str, Any]:
+        """调用一次行政区查询接口, 检查网络连通性和Key是否有效"""
+        await self._get("/v3/config/district", {"keywords": "北京", "subdistrict": "0"})
+        return {"http_pool": pool_stats(self._client), "adcodes": self._adcodes.stats()}
+
+    async def _get(self, path: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """发起GET请求并检查高德的业务状态码"""
+        query = {k: v for k, v in params.items() if v is not None and v != ""}
+        query["key"] = self.api_key
+        response = await self.client.get(path, params=query)
+        response.raise_for_status()
+        data = response.json()
+
+        # v3接口: status="1" 表示成功; v4接口: errcode=0 表示成功
+        if "status" in data and str(data["status"]) != "1":
+            raise RuntimeError(f"高德接口错误: {data.get('info', '')} ({data.get('infocode', '')})")
+        if "errcode" in data and str(data["errcode"]) != "0":
+            raise RuntimeError(f"高德接口错误: {data.get('errmsg', '')} ({data['errcode']})")
+        return data
+
+    async def call(self, tool_name: str, payload: Dict[str, Any]) -> Any:
+        if tool_name == "maps_weather":
+            return await self._weather(payload["city"])
+
+        endpoint = self.TOOL_ENDPOINTS.get(tool_name)
+        if endpoint is None:
+            raise RuntimeError(f"REST后端不支持 {tool_name}")
+        path, normalizer = endpoint
+
+        params = dict(payload)
+        if tool_name == "maps_search_detail":
+            params["extensions"] = "all"
+        elif tool_name in ("maps_text_search", "maps_around_search"):
+            params.setdefault("extensions", "all")
+
+        data = await self._get(path, params)
+        return getattr(self, normalizer)(data)
+
+    async def _weather(self, city: str) -> Dict[str, Any]:
+        """天气预报: 先把城市名称解析为adcode再查询"""
+        adcode = await self._resolve_adcode(city)
+        data = await self._get("/v3/weather/weatherInfo", {"city": adcode, "extensions": "all"})
+        forecasts = data.get("forecasts") or [{}]
+        forecast = forecasts[0]
+        return {
+            "city": forecast.get("city", city),
+            "reporttime": forecast.get("reporttime", ""),
+            "forecasts": forecast.get("casts", []),
+        }
+
+    async def _resolve_adcode(self, city: str) -> str:
+        if city.isdigit():
+            return city
+        adcode = self._adcodes.get(city)
+        if adcode is None:
+            data = await self._get("/v3/geocode/geo", {"address": city})
+            geocodes = data.get("geocodes") or []
+            if not geocodes or not geocodes[0].get("adcode"):
+                raise RuntimeError(f"无法解析城市 '{city}' 的adcode")
+            adcode = geocodes[0]["adcode"]
+            self._adcodes.set(city, adcode)
+        return adcode
+
+    @staticmethod
+    def _text(value: Any) -> str:
+        """高德REST接口在字段为空时返回 [],统一转为字符串"""
+        if isinstance(value, list):
+            return ",".join(str(v) for v in value) if value else ""
+        return "" if value is None else str(value)
+
+    def _normalize_pois(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        pois = []
+        for poi in data.get("pois", []):
+            biz_ext = poi.get("biz_ext") if isinstance(poi.get("biz_ext"), dict) else {}
+            pois.append({
+                **poi,
+                "id": self._text(poi.get("id")),
+                "name": self._text(poi.get("name")),
+                "type": self._text(poi.get("type")),
+                "address": self._text(poi.get("address")),
+                "location": self._text(poi.get("location")),
+                "tel": self._text(poi.get("tel")),
+                "distance": self._text(poi.get("distance")),
+                "rating": self._text(biz_ext.get("rating")),
+                "cost": self._text(biz_ext.get("cost")),
+            })
+        return {"pois": pois}
+
+    def _normalize_geocode(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        results = []
+        for geocode in data.get("geocodes", []):
+            results.append({
+                "country": self._text(geocode.get("country")),
+                "province": self._text(geocode.get("province")),
+                "city": self._text(geocode.get("city")),
+                "citycode": self._text(geocode.get("citycode")),
+                "district": self._text(geocode.get("district")),
+                "street": self._text(geocode.get("street")),
+                "number": self._text(geocode.get("number")),
+                "adcode": self._text(geocode.get("adcode")),
+                "location": self._text(geocode.get("location")),
+                "level": self._text(geocode.get("level")),
+                "formatted_address": self._text(geocode.get("formatted_address")),
+            })
+        return {"results": results}
+
+    def _normalize_regeocode(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        regeocode = data.get("regeocode") or {}
+        return {
+            "regeocode": {
+                **regeocode,
+                "formatted_address": self._text(regeocode.get("formatted_address")),
+            }
+        }
+
+    def _normalize_distance(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        return {"results": data.get("results", [])}
+
+    def _normalize_route(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        # v3接口结果在 route 中, v4(骑行)在 data 中
+        return data.get("route") or data.get("data") or {}
+
+
+# 全局高德地图后端实例
+_amap_backend = None
+
+
+def get_amap_backend() -> AmapBackend:
+    """获取高德地图调用后端(单例模式),由 amap_backend 配置决定"""
+    global _amap_backend
+
+    if _amap_backend is None:
+        settings = get_settings()
+        if settings.amap_backend == "mcp":
+            _amap_backend = MCPAmapBackend()
+        elif settings.amap_backend == "rest":
+            _amap_backend = RestAmapBackend(
+                api_key=settings.amap_api_key,
+                base_url=settings.amap_rest_base_url,
+                max_connections=settings.amap_http_max_connections,
+                max_keepalive_connections=settings.amap_http_max_keepalive,
+                keepalive_expiry=settings.amap_http_keepalive_expiry,
+                timeout=settings.amap_http_timeout,
+                http2=settings.amap_http2,
+            )
+        else:
+            raise ValueError(f"不支持的 AMAP_BACKEND: {settings.amap_backend}")
+
+    return _amap_backend
@@ -0,0 +1,574 @@
+"""高德地图调用结果缓存"""
+
+import asyncio
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from backend.app.config import get_settings
+from backend.app.models.schemas import POIInfo, RouteInfo, WeatherInfo
+from backend.app.utils.cache import SWRCache, TTLCache
+from backend.app.utils.geo import Coordinate, geohash, parse_coordinate
+
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """缓存键的规范化: 全角转半角、去掉空白、转小写"""
+    return _WHITESPACE_PATTERN.sub("", unicodedata.normalize("NFKC", text or "")).lower()
+
+
+def normalize_city(city: Optional[str]) -> str:
+    """城市名规范化, "北京市" 与 "北京" 视为同一城市"""
+    city = normalize_text(city)
+    return city[:-1] if len(city) > 1 and city.endswith("市") else city
+
+
+class GeocodeCache:
+    """
+    地理编码缓存: 内存LRU + SQLite持久化
+
+    键为规范化的 (地址, 城市), 值为高德返回的 "经度,纬度" 字符串,
+    None 表示高德没有找到该地址(负缓存, 有效期较短)。调用失败的结果不缓存。
+    """
+
+    def __init__(
+            self,
+            path: Optional[str] = None,
+            max_size: int = 2048,
+            ttl: float = 30 * 24 * 3600,
+            negative_ttl: float = 3600
+    ):
+        """
+        Args:
+            path: SQLite数据库路径, 为None时只使用内存
+            max_size: 内存中最多保存的地址数
+            ttl: 找到的坐标的有效期(秒)
+            negative_ttl: "未找到" 的有效期(秒)
+        """
+        self.memory = TTLCache(max_size)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.disk_hits = 0
+        self.negative_hits = 0
+
+        self._conn = None
+        if path:
+            if path != ":memory:":
+                Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._lock = threading.Lock()
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            with self._lock, self._conn:
+                self._conn.execute("""
+                    CREATE TABLE IF NOT EXISTS geocode_cache (
+                        address TEXT NOT NULL,
+                        city TEXT NOT NULL,
+                        location TEXT,
+                        expires_at REAL NOT NULL,
+                        PRIMARY KEY (address, city)
+                    )
+                """)
+
+    @staticmethod
+    def key(address: str, city: Optional[str]) -> Tuple[str, str]:
+        return normalize_text(address), normalize_city(city)
+
+    async def get(self, address: str, city: Optional[str] = None) -> Tuple[bool, Optional[str]]:
+        """
+        查询缓存
+
+        Returns:
+            (是否命中, 坐标字符串), 命中且坐标为None表示该地址此前未找到
+        """
+        key = self.key(address, city)
+        entry = self.memory.get(key)
+        if entry is None and self._conn is not None:
+            entry = await asyncio.to_thread(self._load, key)
+            if entry is not None:
+                # 提升到内存, 沿用持久化的过期时间
+                self.disk_hits += 1
+                self.memory.set(key, entry, expires_at=entry[1])
+        if entry is None:
+            return False, None
+
+        location = entry[0]
+        if location is None:
+            self.negative_hits += 1
+        return True, location
+
+    async def set(self, address: str, city: Optional[str], location: Optional[str]):
+        """写入坐标, location 为None表示未找到"""
+        key = self.key(address, city)
+        expires_at = time.time() + (self.ttl if location else self.negative_ttl)
+        self.memory.set(key, (location or None, expires_at), expires_at=expires_at)
+        if self._conn is not None:
+            await asyncio.to_thread(self._save, key, location or None, expires_at)
+
+    def _load(self, key: Tuple[str, str]) -> Optional[Tuple[Optional[str], float]]:
+        with self._lock:
+            if self._conn is None:
+                return None
+            row = self._conn.execute(
+                "SELECT location, expires_at FROM geocode_cache WHERE address = ? AND city = ? AND expires_at > ?",
+                (*key, time.time()),
+            ).fetchone()
+        return None if row is None else (row[0], row[1])
+
+    def _save(self, key: Tuple[str, str], location: Optional[str], expires_at: float):
+        with self._lock:
+            if self._conn is None:
+                return
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO geocode_cache (address, city, location, expires_at) VALUES (?, ?, ?, ?)",
+                    (*key, location, expires_at),
+                )
+
+    def purge_expired(self) -> int:
+        """删除持久化中已过期的条目, 返回删除数量"""
+        if self._conn is None:
+            return 0
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM geocode_cache WHERE expires_at <= ?", (time.time(),)).rowcount
+
+    def close(self):
+        """关闭持久化连接, 之后只使用内存缓存(包括已经在线程池中排队的读写)"""
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
+                self._conn = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self.memory),
+            "max_size": self.memory.max_size,
+            "evictions": self.memory.evictions,
+            "memory_hits": self.memory.hits,
+            "disk_hits": self.disk_hits,
+            "negative_hits": self.negative_hits,
+            # 内存和持久化都未命中的次数
+            "misses": self.memory.misses - self.disk_hits,
+            "persistent": self._conn is not None,
+        }
+
+
+class ReverseGeocodeCache:
+    """
+    逆地理编码缓存: 按geohash格子缓存地址
+
+    同一格子内的任意坐标都返回该格子缓存的地址。除了逆地理编码的结果,
+    还会用地理编码结果的 formatted_address 和POI的完整地址预填充(不覆盖已有的条目),
+    逆地理编码的结果会覆盖预填充的地址。容量有限, 超出时淘汰最久未使用的格子。
+    """
+
+    def __init__(self, precision: int = 8, max_size: int = 10000, ttl: Optional[float] = 7 * 24 * 3600):
+        """
+        Args:
+            precision: geohash位数
+            max_size: 最多保存的格子数
+            ttl: 有效期(秒), 为None表示不过期
+        """
+        self.precision = precision
+        # geohash -> (地址, 是否为预填充)
+        self.cells = TTLCache(max_size, ttl)
+        self.seeded = 0
+        self.seed_hits = 0
+
+    def cell(self, longitude: float, latitude: float) -> str:
+        return geohash(longitude, latitude, self.precision)
+
+    def get(self, longitude: float, latitude: float) -> Optional[str]:
+        """查询坐标所在格子的地址, 未命中时返回None"""
+        entry = self.cells.get(self.cell(longitude, latitude))
+        if entry is None:
+            return None
+        if entry[1]:
+            self.seed_hits += 1
+        return entry[0]
+
+    def set(self, longitude: float, latitude: float, address: str):
+        """写入逆地理编码的结果"""
+        self.cells.set(self.cell(longitude, latitude), (address, False))
+
+    def seed(self, longitude: float, latitude: float, address: str) -> bool:
+        """用POI或地理编码结果中的地址预填充, 格子已有地址时不覆盖; 返回是否写入"""
+        cell = self.cell(longitude, latitude)
+        if not address or cell in self.cells:
+            return False
+        self.cells.set(cell, (address, True))
+        self.seeded += 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.cells.stats(),
+            "precision": self.precision,
+            "seeded": self.seeded,
+            "seed_hits": self.seed_hits,
+        }
+
+
+def parse_ttl_overrides(text: str) -> Dict[str, float]:
+    """解析 "关键词=秒数,关键词=秒数" 格式的有效期配置, 关键词按缓存键规范化"""
+    overrides = {}
+    for item in text.split(","):
+        keywords, sep, seconds = item.partition("=")
+        if not sep or not keywords.strip():
+            continue
+        try:
+            overrides[normalize_text(keywords)] = float(seconds)
+        except ValueError:
+            print(f"⚠️  忽略无效的缓存有效期配置: {item!r}")
+    return overrides
+
+
+class POISearchCache:
+    """
+    POI搜索缓存: 保存解析后的POI列表
+
+    关键词搜索的键为 (关键词, 城市, 是否限制城市), 周边搜索的键为 (取整后的坐标, 关键词, 半径)。
+    过期后的宽限期内立即返回旧结果并在后台刷新(stale-while-revalidate)。
+    """
+
+    def __init__(
+            self,
+            max_size: int = 1000,
+            ttl: float = 6 * 3600,
+            nearby_ttl: float = 3600,
+            stale_ttl: float = 24 * 3600,
+            ttl_overrides: Optional[Dict[str, float]] = None,
+            location_precision: int = 3
+    ):
+        """
+        Args:
+            max_size: 最多保存的查询数
+            ttl: 关键词搜索结果的有效期(秒)
+            nearby_ttl: 周边搜索结果的有效期(秒)
+            stale_ttl: 过期后仍可返回旧结果的时间(秒)
+            ttl_overrides: 按关键词单独设置的有效期(秒), 同时适用于两种搜索
+            location_precision: 周边搜索坐标取整的小数位数(3位约110米)
+        """
+        self.entries = SWRCache(max_size, stale_ttl)
+        self.ttl = ttl
+        self.nearby_ttl = nearby_ttl
+        self.ttl_overrides = ttl_overrides or {}
+        self.location_precision = location_precision
+
+    def _ttl(self, keywords: str, default: float) -> float:
+        return self.ttl_overrides.get(keywords, default)
+
+    async def search(
+            self,
+            keywords: str,
+            city: str,
+            citylimit: bool,
+            fetch: Callable[[], Awaitable[List[POIInfo]]]
+    ) -> List[POIInfo]:
+        """关键词搜索, 未命中时调用 fetch"""
+        keywords = normalize_text(keywords)
+        key = ("search", keywords, normalize_city(city), citylimit)
+        return list(await self.entries.get(key, fetch, self._ttl(keywords, self.ttl)))
+
+    async def nearby(
+            self,
+            longitude: float,
+            latitude: float,
+            keywords: str,
+            radius: int,
+            fetch: Callable[[], Awaitable[List[POIInfo]]]
+    ) -> List[POIInfo]:
+        """周边搜索, 未命中时调用 fetch"""
+        keywords = normalize_text(keywords)
+        location = (round(longitude, self.location_precision), round(latitude, self.location_precision))
+        key = ("nearby", location, keywords, radius)
+        return list(await self.entries.get(key, fetch, self._ttl(keywords, self.nearby_ttl)))
+
+    def stats(self) -> Dict[str, Any]:
+        return self.entries.stats()
+
+
+# 高德天气发布时间使用的时区(北京时间)
+_CHINA_TZ = timezone(timedelta(hours=8))
+
+
+class WeatherCache:
+    """
+    天气预报缓存: 按城市保存解析后的WeatherInfo列表
+
+    高德的天气预报每天只在固定的几个整点前后发布, 缓存不使用固定的有效期,
+    而是在下一次发布时间(加上一段延迟, 等待新预报生效)失效。
+    失效后的 stale_ttl 内仍立即返回旧预报并在后台刷新。
+    """
+
+    def __init__(
+            self,
+            max_size: int = 500,
+            publish_hours: Sequence[int] = (8, 11, 18),
+            publish_delay: float = 900,
+            stale_ttl: float = 1800
+    ):
+        """
+        Args:
+            max_size: 最多保存的城市数
+            publish_hours: 每天发布预报的整点(北京时间)
+            publish_delay: 发布后等待多久(秒)再刷新
+            stale_ttl: 失效后仍可返回旧预报的时间(秒)
+        """
+        self.entries = SWRCache(max_size, stale_ttl)
+        self.publish_hours = sorted(set(publish_hours)) or [0]
+        self.publish_delay = publish_delay
+
+    def next_refresh(self, now: Optional[float] = None) -> float:
+        """下一次预报发布生效的时间戳"""
+        now = time.time() if now is None else now
+        today = datetime.fromtimestamp(now, _CHINA_TZ).replace(hour=0, minute=0, second=0, microsecond=0)
+        for day in (0, 1):
+            for hour in self.publish_hours:
+                refresh = (today + timedelta(days=day, hours=hour, seconds=self.publish_delay)).timestamp()
+                if refresh > now:
+                    return refresh
+        return now + 24 * 3600
+
+    def _ttl(self, forecasts: List[WeatherInfo]) -> float:
+        # 没有查到预报(如城市名无法识别)时只短暂缓存
+        if not forecasts:
+            return self.publish_delay
+        return self.next_refresh() - time.time()
+
+    async def get(self, city: str, fetch: Callable[[], Awaitable[List[WeatherInfo]]]) -> List[WeatherInfo]:
+        """查询城市天气, 未命中时调用 fetch"""
+        return list(await self.entries.get(normalize_city(city), fetch, self._ttl))
+
+    def peek(self, city: str, allow_stale: bool = False) -> Optional[List[WeatherInfo]]:
+        """读取未失效的预报(allow_stale 时也返回宽限期内的旧预报), 不会发起查询"""
+        forecasts = self.entries.peek(normalize_city(city), allow_stale)
+        return None if forecasts is None else list(forecasts)
+
+    def put(self, city: str, forecasts: List[WeatherInfo]):
+        """写入从其他途径(如天气Agent的工具调用结果)拿到的预报"""
+        self.entries.put(normalize_city(city), list(forecasts), self._ttl)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.entries.stats(),
+            "next_refresh": datetime.fromtimestamp(self.next_refresh(), _CHINA_TZ).isoformat(),
+        }
+
+
+# 原始路线数据可以是None, 用于区分未命中
+_MISSING = object()
+
+
+class RouteCache:
+    """
+    路线规划缓存: 键为 (路线类型, 起点坐标, 终点坐标)
+
+    提取出的路线摘要(RouteInfo: 距离、时间)和高德返回的原始路线数据分开保存,
+    原始数据较大, 单独限制为较小的容量。步行和骑行的距离、时间与方向无关,
+    A→B 的摘要也用于 B→A; 原始数据包含有方向的路段, 只按原方向复用。
+    """
+
+    # 摘要可以双向复用的路线类型
+    SYMMETRIC_TYPES = ("walking", "bicycling")
+    # 受实时路况和班次影响的路线类型, 使用较短的有效期
+    TRAFFIC_TYPES = ("driving", "transit")
+
+    def __init__(
+            self,
+            max_size: int = 5000,
+            raw_max_size: int = 200,
+            ttl: Optional[float] = 24 * 3600,
+            traffic_ttl: Optional[float] = 1800,
+            precision: int = 6
+    ):
+        """
+        Args:
+            max_size: 最多保存的路线摘要数
+            raw_max_size: 最多保存的原始路线数据数
+            ttl: 步行、骑行路线的有效期(秒)
+            traffic_ttl: 驾车、公交路线的有效期(秒)
+            precision: 坐标取整到的小数位数(高德坐标为6位)
+        """
+        self.summaries = TTLCache(max_size, ttl)
+        self.raw = TTLCache(raw_max_size, ttl)
+        self.ttl = ttl
+        self.traffic_ttl = traffic_ttl
+        self.precision = precision
+        # 调用方需要的内容(摘要, 以及需要时的原始数据)全部命中才计为命中
+        self.hits = 0
+        self.misses = 0
+        self.reverse_hits = 0
+
+    def _point(self, location: Coordinate) -> str:
+        lon, lat = parse_coordinate(location)
+        return f"{lon:.{self.precision}f},{lat:.{self.precision}f}"
+
+    def _keys(self, route_type: str, origin: Coordinate, destination: Coordinate) -> Tuple[tuple, tuple]:
+        """(摘要的键, 原始数据的键)"""
+        raw_key = (route_type, self._point(origin), self._point(destination))
+        if route_type in self.SYMMETRIC_TYPES:
+            return (route_type, *sorted(raw_key[1:])), raw_key
+        return raw_key, raw_key
+
+    def _ttl(self, route_type: str) -> Optional[float]:
+        return self.traffic_ttl if route_type in self.TRAFFIC_TYPES else self.ttl
+
+    def get(
+            self,
+            route_type: str,
+            origin: Coordinate,
+            destination: Coordinate,
+            raw: bool = False
+    ) -> Optional[Tuple[RouteInfo, Any]]:
+        """
+        查询缓存的路线
+
+        Args:
+            route_type: 路线类型
+            origin: 起点坐标
+            destination: 终点坐标
+            raw: 是否需要原始路线数据, 为True时只有原始数据也命中才算命中
+
+        Returns:
+            (路线摘要, 原始路线数据或None), 未命中时返回None
+        """
+        summary_key, raw_key = self._keys(route_type, origin, destination)
+        # 每个键只查询一次, 避免条目恰好在判断存在和读取之间过期
+        entry = self.summaries.get(summary_key)
+        route_data = self.raw.get(raw_key, _MISSING) if entry is not None else _MISSING
+        if entry is None or (raw and route_data is _MISSING):
+            # 调用方需要的内容没有全部命中, 需要调用高德, 记为未命中
+            self.misses += 1
+            return None
+        self.hits += 1
+        info, stored_key = entry
+        if stored_key != raw_key:
+            self.reverse_hits += 1
+        return info.model_copy(), None if route_data is _MISSING else route_data
+
+    def set(self, route_type: str, origin: Coordinate, destination: Coordinate, info: RouteInfo, route_data: Any):
+        """写入路线摘要和原始路线数据"""
+        summary_key, raw_key = self._keys(route_type, origin, destination)
+        ttl = self._ttl(route_type)
+        self.summaries.set(summary_key, (info.model_copy(), raw_key), ttl=ttl)
+        self.raw.set(raw_key, route_data, ttl=ttl)
+
+    def stats(self) -> Dict[str, Any]:
+        summaries, raw = self.summaries.stats(), self.raw.stats()
+        # 子缓存的命中数由本类的查询方式决定, 不单独展示
+        for stats in (summaries, raw):
+            stats.pop("hits")
+            stats.pop("misses")
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "reverse_hits": self.reverse_hits,
+            "summaries": summaries,
+            "raw": raw,
+        }
+
+
+# 全局缓存实例
+_geocode_cache = None
+_reverse_geocode_cache = None
+_poi_search_cache = None
+_weather_cache = None
+_route_cache = None
+
+
+def get_geocode_cache() -> GeocodeCache:
+    """获取地理编码缓存(单例模式)"""
+    global _geocode_cache
+
+    if _geocode_cache is None:
+        settings = get_settings()
+        _geocode_cache = GeocodeCache(
+            settings.amap_cache_db_path or None,
+            max_size=settings.amap_geocode_cache_size,
+            ttl=settings.amap_geocode_ttl,
+            negative_ttl=settings.amap_geocode_negative_ttl,
+        )
+        purged = _geocode_cache.purge_expired()
+        if purged:
+            print(f"🧹 清理过期的地理编码缓存: {purged} 条")
+
+    return _geocode_cache
+
+
+async def close_geocode_cache():
+    """关闭地理编码缓存的SQLite连接(应用关闭时调用)"""
+    global _geocode_cache
+
+    if _geocode_cache is not None:
+        await asyncio.to_thread(_geocode_cache.close)
+        _geocode_cache = None
+
+
+def get_reverse_geocode_cache() -> ReverseGeocodeCache:
+    """获取逆地理编码缓存(单例模式)"""
+    global _reverse_geocode_cache
+
+    if _reverse_geocode_cache is None:
+        settings = get_settings()
+        _reverse_geocode_cache = ReverseGeocodeCache(
+            precision=settings.amap_regeocode_precision,
+            max_size=settings.amap_regeocode_cache_size,
+            ttl=settings.amap_regeocode_ttl,
+        )
+
+    return _reverse_geocode_cache
+
+
+def get_poi_search_cache() -> POISearchCache:
+    """获取POI搜索缓存(单例模式)"""
+    global _poi_search_cache
+
+    if _poi_search_cache is None:
+        settings = get_settings()
+        _poi_search_cache = POISearchCache(
+            max_size=settings.amap_poi_cache_size,
+            ttl=settings.amap_poi_cache_ttl,
+            nearby_ttl=settings.amap_poi_nearby_cache_ttl,
+            stale_ttl=settings.amap_poi_cache_stale_ttl,
+            ttl_overrides=parse_ttl_overrides(settings.amap_poi_cache_ttl_overrides),
+            location_precision=settings.amap_poi_nearby_precision,
+        )
+
+    return _poi_search_cache
+
+
+def get_weather_cache() -> WeatherCache:
+    """获取天气预报缓存(单例模式)"""
+    global _weather_cache
+
+    if _weather_cache is None:
+        settings = get_settings()
+        _weather_cache = WeatherCache(
+            max_size=settings.amap_weather_cache_size,
+            publish_hours=[int(h) for h in settings.amap_weather_publish_hours.split(",") if h.strip()],
+            publish_delay=settings.amap_weather_publish_delay,
+            stale_ttl=settings.amap_weather_stale_ttl,
+        )
+
+    return _weather_cache
+
+
+def get_route_cache() -> RouteCache:
+    """获取路线规划缓存(单例模式)"""
+    global _route_cache
+
+    if _route_cache is None:
+        settings = get_settings()
+        _route_cache = RouteCache(
+            max_size=settings.amap_route_cache_size,
+            raw_max_size=settings.amap_route_raw_cache_size,
+            ttl=settings.amap_route_cache_ttl,
+            traffic_ttl=settings.amap_route_traffic_ttl,
+        )
+
+    return _route_cache
@@ -1,13 +1,34 @@
 import asyncio
 import json
-from typing import List, Union, Dict, Any, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, Union
 
-from backend.app.models.schemas import POIInfo, Location, WeatherInfo
-from backend.app.tools.amap_tools import amap_tools
+from backend.app.models.schemas import POIInfo, Location, RouteInfo, WeatherInfo
+from backend.app.services.amap_cache import get_geocode_cache, get_poi_search_cache, get_reverse_geocode_cache, \
+    get_route_cache, get_weather_cache
+from backend.app.services.amap_backends import AmapBackend, get_amap_backend
+from backend.app.utils.geo import gcj02_to_wgs84, haversine, parse_coordinate
+
+# 同名(或名称互相包含)且距离小于该值的POI视为同一地点(米)
+DUPLICATE_POI_DISTANCE = 300.0
 
 
 class AmapService:
 
+    def __init__(self, backend: Optional[AmapBackend] = None, use_cache: bool = True):
+        """
+        初始化高德地图服务
+
+        Args:
+            backend: 调用后端(默认由 amap_backend 配置决定: mcp / rest)
+            use_cache: 是否使用调用结果缓存(基准测试等需要每次都实际调用时关闭)
+        """
+        self.backend = backend or get_amap_backend()
+        self.geocode_cache = get_geocode_cache() if use_cache else None
+        self.reverse_geocode_cache = get_reverse_geocode_cache() if use_cache else None
+        self.poi_search_cache = get_poi_search_cache() if use_cache else None
+        self.weather_cache = get_weather_cache() if use_cache else None
+        self.route_cache = get_route_cache() if use_cache else None
+
     async def search_poi(self, keywords: str, city: str, citylimit: bool = True) -> List[POIInfo]:
         """
         搜索POI
@@ -20,52 +41,88 @@ class AmapService:
         Returns:
             POI信息列表
         """
-        try:
-            # 1. 获取工具并调用
-            tools = await amap_tools()
-            tool = next((t for t in tools if getattr(t, "name", None) == "maps_text_search"), None)
-
-            if not tool:
-                print("❌ 未找到 maps_text_search 工具")
-                return []
-
+        async def fetch() -> List[POIInfo]:
+            # 1. 调用POI搜索
             payload = {"keywords": keywords, "city": city, "citylimit": str(citylimit).lower()}
-            response = await tool.ainvoke(payload) if hasattr(tool, "ainvoke") else tool.invoke(payload)
+            data = await self.backend.call("maps_text_search", payload)
 
-            print(f"📄 POI搜索结果: {response[:200] if isinstance(response, str) else response}...")
+            print(f"📄 POI搜索结果: {str(data)[:200]}...")
 
-            # 2. 解析 JSON 字符串
-            data = json.loads(response) if isinstance(response, str) else response
-
-            # 3. 提取 pois 数组
+            # 2. 提取 pois 数组
             pois = data.get("pois", []) if isinstance(data, dict) else data
 
-            # 4. 转换为 POIInfo 对象列表
-            poi_list = []
-            for poi_data in pois:
-                try:
-                    poi_list.append(POIInfo(
-                        id=poi_data.get("id", ""),
-                        name=poi_data.get("name", ""),
-                        type=poi_data.get("type", ""),
-                        address=poi_data.get("address", ""),
-                        location=Location(
-                            longitude=float(poi_data.get("location", "0,0").split(",")[0]),
-                            latitude=float(poi_data.get("location", "0,0").split(",")[1])
-                        ),
-                        tel=poi_data.get("tel") or None
-                    ))
-                except Exception as e:
-                    print(f"⚠️  解析单个 POI 失败: {e}")
-                    continue
+            # 3. 转换为 POIInfo 对象列表
+            poi_list = parse_poi_list(pois)
+            self._seed_reverse_geocode(pois)
 
             print(f"✅ 成功解析 {len(poi_list)} 个 POI")
             return poi_list
 
+        try:
+            if self.poi_search_cache is None:
+                return await fetch()
+            return await self.poi_search_cache.search(keywords, city, citylimit, fetch)
+
         except Exception as e:
             print(f"❌ POI搜索失败: {str(e)}")
             return []
 
+    async def search_attractions(
+            self,
+            city: str,
+            preferences: Sequence[str],
+            generic_keywords: str = "景点",
+            timeout: Optional[float] = None,
+            search: Optional[Callable[[str, str], Awaitable[List[POIInfo]]]] = None
+    ) -> Tuple[List[POIInfo], List[str]]:
+        """
+        按所有偏好并发搜索景点并合并
+
+        每个偏好和通用关键词各搜索一次(并发执行, 耗时约等于一次搜索),
+        合并后按POI id和名称/坐标去重, 匹配偏好越多的景点排名越靠前。
+
+        Args:
+            city: 城市
+            preferences: 旅行偏好标签
+            generic_keywords: 通用搜索关键词
+            timeout: 最长等待时间(秒), 超时未返回的搜索被取消, 只合并已返回的结果
+            search: 单次搜索函数 (关键词, 城市) -> POI列表, 默认为 search_poi
+
+        Returns:
+            (去重排序后的POI列表, 超时未返回或失败的搜索关键词)
+        """
+        keywords = list(dict.fromkeys(k.strip() for k in preferences if k and k.strip()))
+        # (搜索关键词, 计入匹配的偏好)
+        searches = [(k, k) for k in keywords]
+        if generic_keywords not in keywords:
+            searches.append((generic_keywords, None))
+
+        search = search or self.search_poi
+        tasks = [asyncio.ensure_future(search(k, city)) for k, _ in searches]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=timeout)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        results = []
+        missed = []
+        failed = []
+        for (k, preference), task in zip(searches, tasks):
+            if task not in done:
+                missed.append(k)
+            elif task.cancelled() or task.exception() is not None:
+                # 单个关键词失败(包括共享的搜索任务被取消)不影响其他关键词的结果
+                failed.append(k)
+                print(f"⚠️  关键词 {k} 搜索失败: {'已取消' if task.cancelled() else task.exception()}")
+            else:
+                results.append((preference, task.result()))
+        merged = merge_poi_results(results)
+        print(f"✅ 多偏好景点搜索: {len(searches)} 次搜索, 合并去重后 {len(merged)} 个")
+        if missed:
+            print(f"⏰ 以下关键词超时未返回: {', '.join(missed)}")
+        return merged, missed + failed
+
     async def get_weather(self, city: str) -> List[WeatherInfo]:
         """
         查询天气
@@ -76,22 +133,17 @@ class AmapService:
         Returns:
             天气信息字符串
         """
-        try:
-            # 1. 获取工具
-            tools = await amap_tools()
-            tool = next(
-                (t for t in tools if getattr(t, "name", None) == "maps_weather"),
-                None
-            )
-
-            if not tool:
-                raise RuntimeError("未找到 maps_weather 工具")
-
-            # 2. 调用工具
+        async def fetch() -> List[WeatherInfo]:
             payload = {"city": city}
-            response = await tool.ainvoke(payload) if hasattr(tool, "ainvoke") else tool.invoke(payload)
-            # print(f"📄 天气查询结果: {response}")
-            return parse_weather_response(response)
+            data = await self.backend.call("maps_weather", payload)
+            # print(f"📄 天气查询结果: {data}")
+            return parse_weather_response(data)
+
+        try:
+            if self.weather_cache is None:
+                return await fetch()
+            # 缓存在高德下一次发布预报后失效
+            return await self.weather_cache.get(city, fetch)
         except Exception as e:
             print(f"❌ 天气查询失败: {str(e)}")
             return f"天气查询失败: {str(e)}"
@@ -102,7 +154,8 @@ class AmapService:
             destination_address: str,
             origin_city: Optional[str] = None,
             destination_city: Optional[str] = None,
-            route_type: str = "walking"
+            route_type: str = "walking",
+            include_raw: bool = True
     ) -> Dict[str, Any]:
         """
         规划路线
@@ -113,57 +166,23 @@ class AmapService:
             origin_city: 起点城市
             destination_city: 终点城市
             route_type: 路线类型 (walking/driving/transit/bicycling)
+            include_raw: 是否需要原始路线数据(route_data); 只需要距离和时间时传False,
+                路线缓存中只有摘要(如反方向的步行路线)也算命中, 此时 route_data 可能为None
 
         Returns:
-            路线信息
+            路线信息, route_info 为提取出的距离和时间
         """
         try:
-            tools = await amap_tools()
-
-            # 1. 先进行地理编码，将地址转换为坐标
-            geocode_tool = next((t for t in tools if getattr(t, "name", None) == "maps_geo"), None)
-            if not geocode_tool:
-                return {"error": "未找到地理编码工具"}
-
+            # 1. 先进行地理编码(经过地理编码缓存)，将地址转换为坐标
             # 获取起点坐标
-            origin_payload = {"address": origin_address}
-            if origin_city:
-                origin_payload["city"] = origin_city
-            origin_response = await geocode_tool.ainvoke(origin_payload) if hasattr(geocode_tool,
-                                                                                    "ainvoke") else geocode_tool.invoke(
-                origin_payload)
-
-            print(f"📍 起点地理编码结果: {origin_response[:200]}...")
-            origin_data = json.loads(origin_response) if isinstance(origin_response, str) else origin_response
-
-            # 关键修复：使用 results 而不是 geocodes
-            origin_results = origin_data.get("results", [])
-            if not origin_results:
-                return {"error": f"无法找到起点 '{origin_address}' 的坐标"}
-
-            origin_location = origin_results[0].get("location", "")
+            origin_location = await self._geocode_location(origin_address, origin_city)
             print(f"🗺️  起点坐标: {origin_location}")
 
             if not origin_location:
                 return {"error": f"无法找到起点 '{origin_address}' 的坐标"}
 
             # 获取终点坐标
-            dest_payload = {"address": destination_address}
-            if destination_city:
-                dest_payload["city"] = destination_city
-            dest_response = await geocode_tool.ainvoke(dest_payload) if hasattr(geocode_tool,
-                                                                                "ainvoke") else geocode_tool.invoke(
-                dest_payload)
-
-            print(f"📍 终点地理编码结果: {dest_response[:200]}...")
-            dest_data = json.loads(dest_response) if isinstance(dest_response, str) else dest_response
-
-            # 关键修复：使用 results 而不是 geocodes
-            dest_results = dest_data.get("results", [])
-            if not dest_results:
-                return {"error": f"无法找到终点 '{destination_address}' 的坐标"}
-
-            dest_location = dest_results[0].get("location", "")
+            dest_location = await self._geocode_location(destination_address, destination_city)
             print(f"🗺️  终点坐标: {dest_location}")
 
             if not dest_location:
@@ -178,27 +197,37 @@ class AmapService:
                 "transit": "maps_direction_transit_integrated",
                 "bicycling": "maps_direction_bicycling",
             }
-            tool_name = tool_map.get(route_type, "maps_direction_walking")
-
-            route_tool = next((t for t in tools if getattr(t, "name", None) == tool_name), None)
-            if not route_tool:
-                return {"error": f"未找到路线规划工具: {tool_name}"}
-
-            # 调用路线规划工具
-            route_payload = {
-                "origin": origin_location,
-                "destination": dest_location
-            }
-
-            route_response = await route_tool.ainvoke(route_payload) if hasattr(route_tool,
-                                                                                "ainvoke") else route_tool.invoke(
-                route_payload)
-
-            print(f"📍 路线规划结果: {route_response[:200] if isinstance(route_response, str) else route_response}...")
-
-            # 3. 解析响应
-            route_data = json.loads(route_response) if isinstance(route_response, str) else route_response
-
+            if route_type not in tool_map:
+                route_type = "walking"
+            tool_name = tool_map[route_type]
+
+            cached = None
+            if self.route_cache is not None:
+                cached = self.route_cache.get(route_type, origin_location, dest_location, raw=include_raw)
+            if cached is not None:
+                route_info, route_data = cached
+                print(f"📍 路线规划命中缓存: {route_type}")
+            else:
+                # 调用路线规划
+                route_payload = {
+                    "origin": origin_location,
+                    "destination": dest_location
+                }
+                route_data = await self.backend.call(tool_name, route_payload)
+
+                print(f"📍 路线规划结果: {str(route_data)[:200]}...")
+
+                distance, duration = extract_route_distance_duration(route_data)
+                route_info = RouteInfo(
+                    distance=float(distance or 0.0),
+                    duration=int(duration or 0),
+                    route_type=route_type,
+                    description=""
+                )
+                if self.route_cache is not None:
+                    self.route_cache.set(route_type, origin_location, dest_location, route_info, route_data)
+
+            route_info.description = f"{origin_address} -> {destination_address}"
             return {
                 "success": True,
                 "route_type": route_type,
@@ -210,6 +239,7 @@ class AmapService:
                     "address": destination_address,
                     "location": dest_location
                 },
+                "route_info": route_info,
                 "route_data": route_data
             }
 
@@ -231,34 +261,9 @@ class AmapService:
             经纬度坐标
         """
         try:
-            tools = await amap_tools()
-            tool = next((t for t in tools if getattr(t, "name", None) == "maps_geo"), None)
-
-            if not tool:
-                print("❌ 未找到 maps_geo 工具")
-                return None
-
-            # 构建请求参数
-            payload = {"address": address}
-            if city:
-                payload["city"] = city
-
-            # 调用工具
-            response = await tool.ainvoke(payload) if hasattr(tool, "ainvoke") else tool.invoke(payload)
-
-            print(f"📍 地理编码结果: {response[:200] if isinstance(response, str) else response}...")
-
-            # 解析响应
-            data = json.loads(response) if isinstance(response, str) else response
-
-            # 提取坐标
-            geocodes = data.get("results", [])
-            if not geocodes:
-                print(f"⚠️  未找到地址 '{address}' 的坐标")
-                return None
-
-            location_str = geocodes[0].get("location", "")
+            location_str = await self._geocode_location(address, city)
             if not location_str:
+                print(f"⚠️  未找到地址 '{address}' 的坐标")
                 return None
 
             # 解析坐标字符串 "经度,纬度"
@@ -269,6 +274,75 @@ class AmapService:
             print(f"❌ 地理编码失败: {str(e)}")
             return None
 
+    async def _geocode_location(self, address: str, city: Optional[str] = None) -> Optional[str]:
+        """
+        地址转 "经度,纬度" 字符串, 优先使用地理编码缓存
+
+        高德找不到的地址也会被缓存(较短的有效期), 调用失败时抛出异常且不缓存。
+
+        Returns:
+            坐标字符串, 找不到时返回None
+        """
+        if self.geocode_cache is not None:
+            hit, location = await self.geocode_cache.get(address, city)
+            if hit:
+                return location
+
+        # 构建请求参数
+        payload = {"address": address}
+        if city:
+            payload["city"] = city
+        data = await self.backend.call("maps_geo", payload)
+
+        print(f"📍 地理编码结果: {str(data)[:200]}...")
+
+        # 提取坐标(高德MCP返回 results 而不是 geocodes)
+        results = data.get("results", [])
+        location = (results[0].get("location") or None) if results else None
+
+        if self.geocode_cache is not None:
+            await self.geocode_cache.set(address, city, location)
+        self._seed_reverse_geocode(results[:1])
+        return location
+
+    def _seed_reverse_geocode(self, items: List[Dict[str, Any]]):
+        """
+        用POI搜索或地理编码返回的原始条目预填充逆地理编码缓存
+
+        地理编码结果使用高德返回的 formatted_address; POI没有该字段, 使用POI自带的省市区名称和详细地址
+        (REST接口返回 pname/cityname/adname, MCP网关不返回)。两者都没有的条目跳过, 不用坐标所在的行政区冒充地址。
+        """
+        if self.reverse_geocode_cache is None:
+            return
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            address = item.get("formatted_address")
+            if not isinstance(address, str) or not address:
+                address = _poi_full_address(item)
+            if not address or not item.get("location"):
+                continue
+            try:
+                lon, lat = parse_coordinate(item["location"])
+            except (TypeError, ValueError):
+                continue
+            self.reverse_geocode_cache.seed(lon, lat, address)
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """各调用结果缓存的统计信息"""
+        stats = {}
+        if self.geocode_cache is not None:
+            stats["geocode"] = self.geocode_cache.stats()
+        if self.reverse_geocode_cache is not None:
+            stats["reverse_geocode"] = self.reverse_geocode_cache.stats()
+        if self.poi_search_cache is not None:
+            stats["poi_search"] = self.poi_search_cache.stats()
+        if self.weather_cache is not None:
+            stats["weather"] = self.weather_cache.stats()
+        if self.route_cache is not None:
+            stats["route"] = self.route_cache.stats()
+        return stats
+
     async def get_poi_detail(self, poi_id: str) -> Dict[str, Any]:
         """
         获取POI详情
@@ -280,21 +354,10 @@ class AmapService:
             POI详情信息
         """
         try:
-            tools = await amap_tools()
-            tool = next((t for t in tools if getattr(t, "name", None) == "maps_search_detail"), None)
-
-            if not tool:
-                print("❌ 未找到 maps_search_detail 工具")
-                return {"error": "工具不可用"}
-
-            # 调用工具
             payload = {"id": poi_id}
-            response = await tool.ainvoke(payload) if hasattr(tool, "ainvoke") else tool.invoke(payload)
-
-            print(f"📄 POI详情: {response[:200] if isinstance(response, str) else response}...")
+            data = await self.backend.call("maps_search_detail", payload)
 
-            # 解析响应
-            data = json.loads(response) if isinstance(response, str) else response
+            print(f"📄 POI详情: {str(data)[:200]}...")
 
             # 提取POI详情
             pois = data.get("pois", [])
@@ -335,26 +398,23 @@ class AmapService:
         Returns:
             地址字符串
         """
-        try:
-            tools = await amap_tools()
-            tool = next((t for t in tools if getattr(t, "name", None) == "maps_regeocode"), None)
-
-            if not tool:
-                print("❌ 未找到 maps_regeocode 工具")
-                return None
+        # 同一geohash格子内的坐标共用缓存的地址
+        if self.reverse_geocode_cache is not None:
+            cached = self.reverse_geocode_cache.get(longitude, latitude)
+            if cached:
+                return cached
 
-            # 调用工具
+        try:
             payload = {"location": f"{longitude},{latitude}"}
-            response = await tool.ainvoke(payload) if hasattr(tool, "ainvoke") else tool.invoke(payload)
-
-            print(f"📍 逆地理编码结果: {response[:200] if isinstance(response, str) else response}...")
+            data = await self.backend.call("maps_regeocode", payload)
 
-            # 解析响应
-            data = json.loads(response) if isinstance(response, str) else response
+            print(f"📍 逆地理编码结果: {str(data)[:200]}...")
 
             # 提取地址
             regeocode = data.get("regeocode", {})
             formatted_address = regeocode.get("formatted_address", "")
+            if formatted_address and self.reverse_geocode_cache is not None:
+                self.reverse_geocode_cache.set(longitude, latitude, formatted_address)
 
             return formatted_address if formatted_address else None
 
@@ -381,51 +441,29 @@ class AmapService:
         Returns:
             POI信息列表
         """
-        try:
-            tools = await amap_tools()
-            tool = next((t for t in tools if getattr(t, "name", None) == "maps_around_search"), None)
-
-            if not tool:
-                print("❌ 未找到 maps_around_search 工具")
-                return []
-
-            # 调用工具
+        async def fetch() -> List[POIInfo]:
             payload = {
                 "location": f"{longitude},{latitude}",
                 "keywords": keywords,
                 "radius": str(radius)
             }
-            response = await tool.ainvoke(payload) if hasattr(tool, "ainvoke") else tool.invoke(payload)
-
-            print(f"📍 周边搜索结果: {response[:200] if isinstance(response, str) else response}...")
+            data = await self.backend.call("maps_around_search", payload)
 
-            # 解析响应
-            data = json.loads(response) if isinstance(response, str) else response
-            pois = data.get("pois", [])
+            print(f"📍 周边搜索结果: {str(data)[:200]}...")
 
             # 转换为 POIInfo 对象列表
-            poi_list = []
-            for poi_data in pois:
-                try:
-                    poi_list.append(POIInfo(
-                        id=poi_data.get("id", ""),
-                        name=poi_data.get("name", ""),
-                        type=poi_data.get("type", ""),
-                        address=poi_data.get("address", ""),
-                        location=Location(
-                            longitude=float(poi_data.get("location", "0,0").split(",")[0]),
-                            latitude=float(poi_data.get("location", "0,0").split(",")[1])
-                        ),
-                        tel=poi_data.get("tel") or None,
-                        distance=poi_data.get("distance") or None
-                    ))
-                except Exception as e:
-                    print(f"⚠️  解析单个 POI 失败: {e}")
-                    continue
+            pois = data.get("pois", [])
+            poi_list = parse_poi_list(pois)
+            self._seed_reverse_geocode(pois)
 
             print(f"✅ 成功解析 {len(poi_list)} 个周边 POI")
             return poi_list
 
+        try:
+            if self.poi_search_cache is None:
+                return await fetch()
+            return await self.poi_search_cache.nearby(longitude, latitude, keywords, radius, fetch)
+
         except Exception as e:
             print(f"❌ 周边搜索失败: {str(e)}")
             return []
@@ -447,26 +485,18 @@ class AmapService:
         Returns:
             距离信息
         """
-        try:
-            tools = await amap_tools()
-            tool = next((t for t in tools if getattr(t, "name", None) == "maps_distance"), None)
+        if distance_type == "0":
+            return self._straight_line_distance(origin, destination)
 
-            if not tool:
-                print("❌ 未找到 maps_distance 工具")
-                return None
-
-            # 调用工具
+        try:
             payload = {
                 "origins": origin,
                 "destination": destination,
                 "type": distance_type
             }
-            response = await tool.ainvoke(payload) if hasattr(tool, "ainvoke") else tool.invoke(payload)
+            data = await self.backend.call("maps_distance", payload)
 
-            print(f"📏 距离计算结果: {response[:200] if isinstance(response, str) else response}...")
-
-            # 解析响应
-            data = json.loads(response) if isinstance(response, str) else response
+            print(f"📏 距离计算结果: {str(data)[:200]}...")
 
             results = data.get("results", [])
             if results:
@@ -478,6 +508,162 @@ class AmapService:
             print(f"❌ 距离计算失败: {str(e)}")
             return None
 
+    def _straight_line_distance(self, origin: str, destination: str) -> Optional[Dict[str, Any]]:
+        """本地计算直线距离(不经过网络), 返回与高德距离测量相同格式的结果(多个起点时取第一个, 与网络调用一致)"""
+        try:
+            start = gcj02_to_wgs84(*parse_coordinate(origin.split("|")[0]))
+            end = gcj02_to_wgs84(*parse_coordinate(destination))
+        except ValueError as e:
+            print(f"❌ 距离计算失败: {str(e)}")
+            return None
+        return {"origin_id": "1", "dest_id": "1", "distance": str(round(haversine(*start, *end))), "duration": "0"}
+
+
+def _to_float(value: Any) -> Optional[float]:
+    """高德返回的数值字段可能为空字符串或 [], 无法转换时返回None"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _poi_full_address(poi: Dict[str, Any]) -> Optional[str]:
+    """
+    用POI的省市区名称(pname/cityname/adname)和详细地址组成完整地址
+
+    详细地址中已经包含的省市区名称不重复拼接。
+
+    Returns:
+        完整地址, 缺少区县名称或详细地址时返回None
+    """
+    # 高德REST接口在字段为空时返回 []
+    fields = [poi.get(k) for k in ("pname", "cityname", "adname", "address")]
+    pname, cityname, adname, address = (field if isinstance(field, str) else "" for field in fields)
+    if not adname or not address:
+        return None
+    prefix = ""
+    for name in (pname, cityname, adname):
+        if name and name not in prefix and name not in address:
+            prefix += name
+    return prefix + address
+
+
+def parse_poi_list(pois: List[Dict[str, Any]]) -> List[POIInfo]:
+    """
+    解析POI搜索返回的 pois 数组
+
+    Args:
+        pois: POI字典列表, location 为 "经度,纬度" 字符串
+
+    Returns:
+        POI信息列表(解析失败的条目会被跳过)
+    """
+    poi_list = []
+    for poi_data in pois:
+        try:
+            poi_list.append(POIInfo(
+                id=poi_data.get("id", ""),
+                name=poi_data.get("name", ""),
+                type=poi_data.get("type", ""),
+                address=poi_data.get("address", ""),
+                location=Location(
+                    longitude=float(poi_data.get("location", "0,0").split(",")[0]),
+                    latitude=float(poi_data.get("location", "0,0").split(",")[1])
+                ),
+                tel=poi_data.get("tel") or None,
+                rating=_to_float(poi_data.get("rating")),
+                cost=_to_float(poi_data.get("cost"))
+            ))
+        except Exception as e:
+            print(f"⚠️  解析单个 POI 失败: {e}")
+            continue
+    return poi_list
+
+
+def _is_duplicate_poi(a: POIInfo, b: POIInfo) -> bool:
+    """判断两个POI是否为同一地点: id相同, 或名称相同/互相包含且距离很近"""
+    if a.id and a.id == b.id:
+        return True
+
+    name_a = a.name.replace(" ", "")
+    name_b = b.name.replace(" ", "")
+    if not name_a or not name_b or (name_a not in name_b and name_b not in name_a):
+        return False
+
+    distance = haversine(a.location.longitude, a.location.latitude, b.location.longitude, b.location.latitude)
+    return distance <= DUPLICATE_POI_DISTANCE
+
+
+def merge_poi_results(results: Sequence[Tuple[Optional[str], List[POIInfo]]]) -> List[POIInfo]:
+    """
+    合并多次POI搜索的结果
+
+    Args:
+        results: (搜索的偏好, 搜索结果) 列表, 偏好为None表示通用搜索, 不计入匹配数
+
+    Returns:
+        去重后的POI列表, 按匹配的偏好数降序, 匹配数相同时保持搜索结果的原有顺序
+    """
+    merged: List[POIInfo] = []
+    matches: List[set] = []
+    for preference, pois in results:
+        for poi in pois:
+            for i, existing in enumerate(merged):
+                if _is_duplicate_poi(existing, poi):
+                    break
+            else:
+                merged.append(poi)
+                matches.append(set())
+                i = len(merged) - 1
+            if preference is not None:
+                matches[i].add(preference)
+
+    order = sorted(range(len(merged)), key=lambda i: -len(matches[i]))
+    return [merged[i] for i in order]
+
+
+def extract_route_distance_duration(data: Any) -> Tuple[Optional[float], Optional[int]]:
+    """
+    从路线规划工具返回的数据中提取第一个距离和时间
+
+    Args:
+        data: 路线规划结果(嵌套的字典/列表)
+
+    Returns:
+        (距离(米), 时间(秒)), 找不到时为None
+    """
+    def _coerce_float(x):
+        try:
+            return float(x)
+        except Exception:
+            return None
+    def _coerce_int(x):
+        try:
+            return int(float(x))
+        except Exception:
+            return None
+    dist = None
+    dur = None
+    if isinstance(data, dict):
+        for k, v in data.items():
+            if dist is None and k == "distance":
+                dist = _coerce_float(v)
+            elif dur is None and k == "duration":
+                dur = _coerce_int(v)
+            if (dist is None or dur is None):
+                d2, d3 = extract_route_distance_duration(v)
+                dist = dist if dist is not None else d2
+                dur = dur if dur is not None else d3
+    elif isinstance(data, list):
+        for item in data:
+            if dist is not None and dur is not None:
+                break
+            d2, d3 = extract_route_distance_duration(item)
+            dist = dist if dist is not None else d2
+            dur = dur if dur is not None else d3
+    return dist, dur
+
+
 def parse_weather_response(response: Union[str, dict, list]) -> List[WeatherInfo]:
     """
     解析天气工具返回的数据
@@ -0,0 +1,324 @@
+"""旅行规划后台任务
+
+提交旅行请求后立即返回任务ID, 由有界的异步工作池执行 MultiAgentTripPlanner.plan_trip,
+客户端轮询任务状态、阶段进度并获取最终结果。任务和结果保存在本地SQLite中,
+服务重启时未完成的任务(排队中或执行中被中断)会重新排队, 已完成的任务超过保留时间后删除。
+"""
+
+import asyncio
+import json
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from backend.app.agents.multi_agent_trip_planner import get_trip_planner_agent
+from backend.app.config import get_settings
+from backend.app.models.schemas import StageTiming, TripJob, TripPlanResponse, TripRequest
+
+
+class JobQueueFullError(RuntimeError):
+    """排队任务数已达上限"""
+
+
+class TripJobStore:
+    """任务存储(SQLite)
+
+    sqlite3 是同步接口, 在异步代码中通过 asyncio.to_thread 调用, 由锁保证同一连接串行使用。
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: 数据库文件路径, ":memory:" 表示内存数据库
+        """
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._execute("""
+            CREATE TABLE IF NOT EXISTS trip_jobs (
+                job_id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                request TEXT NOT NULL,
+                fast_path INTEGER,
+                created_at TEXT NOT NULL,
+                started_at TEXT,
+                finished_at TEXT,
+                progress TEXT,
+                result TEXT,
+                error TEXT
+            )
+        """)
+        # 重启恢复按状态查找未完成的任务, 清理按状态查找已完成的任务
+        self._execute("CREATE INDEX IF NOT EXISTS idx_trip_jobs_status ON trip_jobs (status, created_at)")
+
+    def _execute(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        with self._lock, self._conn:
+            return self._conn.execute(sql, params).fetchall()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def create(self, request: TripRequest, fast_path: Optional[bool]) -> str:
+        """新建排队中的任务, 返回任务ID"""
+        job_id = uuid.uuid4().hex
+        self._execute(
+            "INSERT INTO trip_jobs (job_id, status, request, fast_path, created_at) VALUES (?, 'queued', ?, ?, ?)",
+            (job_id, request.model_dump_json(), None if fast_path is None else int(fast_path),
+             datetime.now().isoformat()),
+        )
+        return job_id
+
+    def get(self, job_id: str) -> Optional[TripJob]:
+        """查询任务状态和进度"""
+        rows = self._execute("SELECT * FROM trip_jobs WHERE job_id = ?", (job_id,))
+        if not rows:
+            return None
+        row = rows[0]
+        progress = json.loads(row["progress"]) if row["progress"] else {}
+        return TripJob(
+            job_id=row["job_id"],
+            status=row["status"],
+            created_at=row["created_at"],
+            started_at=row["started_at"],
+            finished_at=row["finished_at"],
+            stages=progress.get("stages", []),
+            days_completed=progress.get("days_completed", 0),
+            error=row["error"],
+        )
+
+    def get_request(self, job_id: str) -> Optional[Tuple[TripRequest, Optional[bool]]]:
+        """取出任务的旅行请求和执行模式"""
+        rows = self._execute("SELECT request, fast_path FROM trip_jobs WHERE job_id = ?", (job_id,))
+        if not rows:
+            return None
+        fast_path = rows[0]["fast_path"]
+        return TripRequest.model_validate_json(rows[0]["request"]), None if fast_path is None else bool(fast_path)
+
+    def get_result(self, job_id: str) -> Optional[TripPlanResponse]:
+        """取出已完成任务的结果"""
+        rows = self._execute("SELECT result FROM trip_jobs WHERE job_id = ?", (job_id,))
+        if not rows or not rows[0]["result"]:
+            return None
+        return TripPlanResponse.model_validate_json(rows[0]["result"])
+
+    def mark_running(self, job_id: str):
+        self._execute(
+            "UPDATE trip_jobs SET status = 'running', started_at = ?, progress = NULL WHERE job_id = ?",
+            (datetime.now().isoformat(), job_id),
+        )
+
+    def update_progress(self, job_id: str, stages: List[StageTiming], days_completed: int):
+        progress = {"stages": [stage.model_dump() for stage in stages], "days_completed": days_completed}
+        self._execute("UPDATE trip_jobs SET progress = ? WHERE job_id = ?", (json.dumps(progress), job_id))
+
+    def mark_succeeded(self, job_id: str, response: TripPlanResponse):
+        self._execute(
+            "UPDATE trip_jobs SET status = 'succeeded', finished_at = ?, result = ? WHERE job_id = ?",
+            (datetime.now().isoformat(), response.model_dump_json(), job_id),
+        )
+
+    def mark_failed(self, job_id: str, error: str):
+        response = TripPlanResponse(success=False, message=f"旅行计划生成失败: {error}")
+        self._execute(
+            "UPDATE trip_jobs SET status = 'failed', finished_at = ?, result = ?, error = ? WHERE job_id = ?",
+            (datetime.now().isoformat(), response.model_dump_json(), error, job_id),
+        )
+
+    def prune_finished(self, retention_hours: float) -> int:
+        """删除完成时间早于保留时间的已完成任务(成功或失败), 返回删除数量"""
+        cutoff = (datetime.now() - timedelta(hours=retention_hours)).isoformat()
+        with self._lock, self._conn:
+            return self._conn.execute(
+                "DELETE FROM trip_jobs WHERE status IN ('succeeded', 'failed') AND finished_at < ?", (cutoff,)
+            ).rowcount
+
+    def requeue_unfinished(self) -> List[str]:
+        """把未完成的任务(包括上次运行时被中断的)恢复为排队状态, 按提交顺序返回任务ID"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE trip_jobs SET status = 'queued', started_at = NULL, progress = NULL "
+                "WHERE status IN ('queued', 'running')"
+            )
+            rows = self._conn.execute(
+                "SELECT job_id FROM trip_jobs WHERE status = 'queued' ORDER BY created_at"
+            ).fetchall()
+        return [row["job_id"] for row in rows]
+
+
+class TripJobQueue:
+    """旅行规划任务队列: 固定数量的工作协程依次执行排队的任务"""
+
+    def __init__(
+            self,
+            store: TripJobStore,
+            workers: int = 2,
+            max_queued: int = 100,
+            retention_hours: float = 0.0,
+            prune_interval: float = 3600.0
+    ):
+        """
+        Args:
+            store: 任务存储
+            workers: 同时执行的任务数
+            max_queued: 排队任务数上限, 超过后拒绝提交
+            retention_hours: 已完成任务的保留时间(小时), <=0 表示不清理
+            prune_interval: 清理检查间隔(秒)
+        """
+        self.store = store
+        self.workers = max(1, workers)
+        self.max_queued = max_queued
+        self.retention_hours = retention_hours
+        self.prune_interval = prune_interval
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+        self.running = 0
+        self.pruned = 0
+
+    async def start(self):
+        """清理过期的已完成任务, 恢复未完成的任务并启动工作协程"""
+        if self._tasks:
+            return
+        await self._prune()
+        pending = await asyncio.to_thread(self.store.requeue_unfinished)
+        for job_id in pending:
+            self._queue.put_nowait(job_id)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        if self.retention_hours > 0 and self.prune_interval > 0:
+            self._tasks.append(asyncio.create_task(self._prune_loop()))
+        print(f"✅ 旅行规划任务队列已启动: {self.workers} 个工作协程, 恢复 {len(pending)} 个未完成任务")
+
+    async def stop(self):
+        """停止工作协程和定期清理, 执行中的任务在下次启动时重新排队"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, request: TripRequest, fast_path: Optional[bool] = None) -> TripJob:
+        """
+        提交旅行规划任务
+
+        Raises:
+            JobQueueFullError: 排队任务数已达上限
+        """
+        if self._queue.qsize() >= self.max_queued:
+            raise JobQueueFullError(f"排队任务已达上限({self.max_queued})")
+        job_id = await asyncio.to_thread(self.store.create, request, fast_path)
+        self._queue.put_nowait(job_id)
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def get(self, job_id: str) -> Optional[TripJob]:
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def get_result(self, job_id: str) -> Optional[TripPlanResponse]:
+        return await asyncio.to_thread(self.store.get_result, job_id)
+
+    async def _prune(self):
+        """删除超过保留时间的已完成任务, 清理失败不影响任务执行"""
+        if self.retention_hours <= 0:
+            return
+        try:
+            pruned = await asyncio.to_thread(self.store.prune_finished, self.retention_hours)
+        except Exception as e:
+            print(f"⚠️  清理过期的旅行规划任务失败: {e}")
+            return
+        self.pruned += pruned
+        if pruned:
+            print(f"🧹 清理过期的旅行规划任务: {pruned} 条")
+
+    async def _prune_loop(self):
+        while True:
+            await asyncio.sleep(self.prune_interval)
+            await self._prune()
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            self.running += 1
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                print(f"❌ 旅行规划任务 {job_id} 执行异常: {e}")
+            finally:
+                self.running -= 1
+                self._queue.task_done()
+
+    async def _run(self, job_id: str):
+        loaded = await asyncio.to_thread(self.store.get_request, job_id)
+        if loaded is None:
+            return
+        request, fast_path = loaded
+        await asyncio.to_thread(self.store.mark_running, job_id)
+        print(f"🚀 开始执行旅行规划任务 {job_id}: {request.city} {request.travel_days}天")
+
+        stages: List[StageTiming] = []
+        days_completed = 0
+
+        async def progress(event: str, data: dict):
+            nonlocal days_completed
+            if event == "stage":
+                stages.append(StageTiming(**data))
+            elif event == "day":
+                days_completed += 1
+            else:
+                return
+            await asyncio.to_thread(self.store.update_progress, job_id, stages, days_completed)
+
+        try:
+            trip_plan = await get_trip_planner_agent().plan_trip(request, fast_path=fast_path, progress=progress)
+        except Exception as e:
+            await asyncio.to_thread(self.store.mark_failed, job_id, str(e))
+            print(f"❌ 旅行规划任务 {job_id} 失败: {e}")
+            return
+
+        response = TripPlanResponse(success=True, message="旅行计划生成成功", data=trip_plan)
+        await asyncio.to_thread(self.store.mark_succeeded, job_id, response)
+        print(f"✅ 旅行规划任务 {job_id} 完成")
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "running": self.running,
+            "queued": self._queue.qsize(),
+            "max_queued": self.max_queued,
+            "retention_hours": self.retention_hours,
+            "pruned": self.pruned,
+        }
+
+
+# 全局任务队列实例
+_trip_job_queue = None
+
+
+def get_trip_job_queue() -> TripJobQueue:
+    """获取旅行规划任务队列(单例模式)"""
+    global _trip_job_queue
+
+    if _trip_job_queue is None:
+        settings = get_settings()
+        _trip_job_queue = TripJobQueue(
+            TripJobStore(settings.trip_job_db_path),
+            workers=settings.trip_job_workers,
+            max_queued=settings.trip_job_max_queued,
+            retention_hours=settings.trip_job_retention_hours,
+            prune_interval=settings.trip_job_prune_interval,
+        )
+
+    return _trip_job_queue
+
+
+async def close_trip_job_queue():
+    """停止任务队列并关闭任务存储(应用关闭时调用)"""
+    global _trip_job_queue
+
+    if _trip_job_queue is not None:
+        await _trip_job_queue.stop()
+        await asyncio.to_thread(_trip_job_queue.store.close)
+        _trip_job_queue = None
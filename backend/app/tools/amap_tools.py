@@ -1,16 +1,52 @@
-import os
-
 from backend.app.config import get_settings
-from backend.app.utils.mcp import create_mcp_streamable_http_client
+from backend.app.utils.mcp import MCPSessionPool
+from backend.app.utils.tool_registry import ToolRegistry
+
+# 全局高德地图MCP会话池
+_amap_session_pool = None
+# 全局高德地图工具注册表
+_amap_tool_registry = None
+
+
+def get_amap_session_pool() -> MCPSessionPool:
+    """获取高德地图MCP会话池(单例模式)"""
+    global _amap_session_pool
+
+    if _amap_session_pool is None:
+        settings = get_settings()
+        key = settings.amap_api_key
+        try:
+            if not key:
+                raise ValueError("错误: 未设置 AMAP_API_KEY 环境变量。")
+        except Exception as e:
+            raise ValueError(f"错误: 检查 AMAP_API_KEY 环境变量时发生异常: {e}")
+        url = f"{settings.amap_mcp_url}?key={key}"
+        _amap_session_pool = MCPSessionPool(
+            "amap",
+            {"transport": "streamable_http", "url": url},
+            size=settings.amap_mcp_pool_size,
+            health_check_interval=settings.mcp_health_check_interval,
+            connect_timeout=settings.mcp_connect_timeout,
+        )
+
+    return _amap_session_pool
+
+
+def get_amap_tool_registry() -> ToolRegistry:
+    """获取高德地图工具注册表(单例模式)"""
+    global _amap_tool_registry
+
+    if _amap_tool_registry is None:
+        _amap_tool_registry = ToolRegistry(
+            "amap",
+            get_amap_session_pool().get_tools,
+            prefix="amap",
+            ttl=get_settings().mcp_tool_registry_ttl,
+        )
+
+    return _amap_tool_registry
+
 
 async def amap_tools():
-    """Create Amap MCP tool client."""
-    key = get_settings().amap_api_key
-    try:
-        if not key:
-            raise ValueError("错误: 未设置 AMAP_API_KEY 环境变量。")
-    except Exception as e:
-        raise ValueError(f"错误: 检查 AMAP_API_KEY 环境变量时发生异常: {e}")
-    url = f"https://mcp.amap.com/mcp?key={key}"
-    tools = await create_mcp_streamable_http_client("amap", url)
-    return tools
\ No newline at end of file
+    """获取高德地图MCP工具(通过共享会话池调用)"""
+    return await get_amap_tool_registry().get_tools()
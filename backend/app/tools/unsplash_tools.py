@@ -1,13 +1,72 @@
-from backend.app.utils.mcp import create_mcp_stdio_client
+import sys
 
+from backend.app.config import get_settings
+from backend.app.utils.mcp import MCPSessionPool, create_mcp_inprocess_tools
+from backend.app.utils.tool_registry import ToolRegistry
 
-async def unsplash_tools():
-    """Create Unsplash MCP tool client."""
-    params = {
-        "command": "python",
-        "args": ["-m", "backend.app.mcps.unsplash_mcp"],
-    }
+# 全局Unsplash MCP工作进程池
+_unsplash_session_pool = None
+# 全局Unsplash工具注册表
+_unsplash_tool_registry = None
+
+
+def get_unsplash_session_pool() -> MCPSessionPool:
+    """获取Unsplash MCP工作进程池(单例模式)
+
+    每个会话对应一个常驻的stdio工作进程,按调用次数和存活时间回收。
+    """
+    global _unsplash_session_pool
+
+    if _unsplash_session_pool is None:
+        settings = get_settings()
+        params = {
+            "transport": "stdio",
+            "command": sys.executable,
+            "args": ["-m", "backend.app.mcps.unsplash_mcp"],
+        }
+        _unsplash_session_pool = MCPSessionPool(
+            "unsplash_mcp",
+            params,
+            size=settings.unsplash_mcp_pool_size,
+            health_check_interval=settings.mcp_health_check_interval,
+            connect_timeout=settings.mcp_connect_timeout,
+            max_calls=settings.unsplash_mcp_max_calls,
+            max_age=settings.unsplash_mcp_max_age,
+        )
+
+    return _unsplash_session_pool
+
+
+def get_unsplash_tool_registry() -> ToolRegistry:
+    """获取Unsplash工具注册表(单例模式)"""
+    global _unsplash_tool_registry
 
-    client, tools = await create_mcp_stdio_client("unsplash_mcp", params)
+    if _unsplash_tool_registry is None:
+        settings = get_settings()
+        transport = settings.unsplash_mcp_transport
+        if transport == "stdio":
+            loader = get_unsplash_session_pool().get_tools
+        elif transport == "inprocess":
+            loader = _load_inprocess_tools
+        else:
+            raise ValueError(f"不支持的 UNSPLASH_MCP_TRANSPORT: {transport}")
 
-    return tools
\ No newline at end of file
+        _unsplash_tool_registry = ToolRegistry(
+            "unsplash_mcp",
+            loader,
+            ttl=settings.mcp_tool_registry_ttl,
+        )
+
+    return _unsplash_tool_registry
+
+
+async def _load_inprocess_tools():
+    """同进程加载Unsplash工具,直接调用FastMCP中注册的函数"""
+    from backend.app.mcps.unsplash_mcp import mcp
+
+    return await create_mcp_inprocess_tools(mcp)
+
+
+async def unsplash_tools():
+    """获取Unsplash MCP工具(传输方式由 unsplash_mcp_transport 配置决定)"""
+    return await get_unsplash_tool_registry().get_tools()
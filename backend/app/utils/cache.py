@@ -0,0 +1,209 @@
+"""进程内缓存"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, TypeVar, Union
+
+T = TypeVar("T")
+
+
+class TTLCache:
+    """
+    带过期时间的LRU缓存
+
+    超过容量时淘汰最久未使用的条目, 过期的条目在读取时删除。
+    只在单个事件循环中使用, 不加锁。
+    """
+
+    def __init__(self, max_size: int, ttl: Optional[float] = None):
+        """
+        Args:
+            max_size: 最多保存的条目数
+            ttl: 默认有效期(秒), 为None表示不过期
+        """
+        self.max_size = max(1, max_size)
+        self.ttl = ttl
+        # key -> (过期时间戳, 值)
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """读取未过期的条目, 不存在或已过期时返回 default"""
+        entry = self._data.get(key)
+        if entry is None or entry[0] <= time.time():
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, expires_at: Optional[float] = None):
+        """
+        写入条目
+
+        Args:
+            key: 键
+            value: 值
+            ttl: 有效期(秒), 为None时使用默认有效期
+            expires_at: 过期时间戳, 优先于 ttl
+        """
+        if expires_at is None:
+            ttl = self.ttl if ttl is None else ttl
+            expires_at = float("inf") if ttl is None else time.time() + ttl
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def __contains__(self, key: Hashable) -> bool:
+        """是否有未过期的条目(不计入命中统计, 不影响淘汰顺序)"""
+        entry = self._data.get(key)
+        return entry is not None and entry[0] > time.time()
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class SWRCache:
+    """
+    stale-while-revalidate缓存
+
+    条目在有效期内直接返回; 过期后的 stale_ttl 宽限期内仍立即返回旧值, 同时在后台刷新;
+    超过宽限期或不存在时等待获取。同一个key同时只有一次获取, 获取失败的结果不缓存。
+    """
+
+    def __init__(self, max_size: int, stale_ttl: float = 0.0):
+        """
+        Args:
+            max_size: 最多保存的条目数, 超出时淘汰最久未使用的
+            stale_ttl: 过期后仍可返回旧值的时间(秒)
+        """
+        self.stale_ttl = stale_ttl
+        # key -> (有效期截止时间戳, 值)
+        self._cache = TTLCache(max_size)
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.fresh_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+
+    async def get(
+            self,
+            key: Hashable,
+            fetch: Callable[[], Awaitable[T]],
+            ttl: Union[float, Callable[[T], float]]
+    ) -> T:
+        """
+        读取缓存, 需要时调用 fetch 获取
+
+        Args:
+            key: 键
+            fetch: 获取最新值的函数, 失败时抛出异常
+            ttl: 有效期(秒), 或根据获取到的值计算有效期的函数
+
+        Returns:
+            缓存的值或新获取的值
+        """
+        entry = self._cache.get(key)
+        if entry is not None:
+            fresh_until, value = entry
+            if time.time() < fresh_until:
+                self.fresh_hits += 1
+                return value
+            self.stale_hits += 1
+            if key not in self._inflight:
+                self.refreshes += 1
+                self._fetch(key, fetch, ttl, background=True)
+            return value
+
+        self.misses += 1
+        task = self._inflight.get(key) or self._fetch(key, fetch, ttl)
+        # 调用方被取消时不取消共享的获取
+        return await asyncio.shield(task)
+
+    def _fetch(self, key: Hashable, fetch: Callable[[], Awaitable[T]], ttl, background: bool = False) -> asyncio.Task:
+        async def run():
+            value = await fetch()
+            self.put(key, value, ttl)
+            return value
+
+        def done(task: asyncio.Task):
+            if self._inflight.get(key) is task:
+                del self._inflight[key]
+            if background and not task.cancelled() and task.exception() is not None:
+                self.refresh_failures += 1
+                print(f"⚠️  后台刷新缓存失败({key}): {task.exception()}")
+
+        task = asyncio.ensure_future(run())
+        self._inflight[key] = task
+        task.add_done_callback(done)
+        return task
+
+    def peek(self, key: Hashable, allow_stale: bool = False) -> Optional[Any]:
+        """
+        读取缓存的值(不触发获取和刷新)
+
+        Args:
+            key: 键
+            allow_stale: 是否返回已过有效期但仍在宽限期内的值
+
+        Returns:
+            缓存的值, 不存在或已过期时返回None
+        """
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        if time.time() < entry[0]:
+            self.fresh_hits += 1
+        elif allow_stale:
+            self.stale_hits += 1
+        else:
+            return None
+        return entry[1]
+
+    def put(self, key: Hashable, value: Any, ttl: Union[float, Callable[[Any], float]]):
+        """直接写入从其他途径拿到的值"""
+        fresh_for = ttl(value) if callable(ttl) else ttl
+        fresh_until = time.time() + max(0.0, fresh_for)
+        self._cache.set(key, (fresh_until, value), expires_at=fresh_until + self.stale_ttl)
+
+    def pop(self, key: Hashable):
+        self._cache.pop(key)
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._cache),
+            "max_size": self._cache.max_size,
+            "evictions": self._cache.evictions,
+            "fresh_hits": self.fresh_hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures,
+        }
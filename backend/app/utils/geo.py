@@ -0,0 +1,222 @@
+"""地理计算工具
+
+高德返回的坐标为GCJ-02(国测局坐标系), 计算球面距离时可先转换为WGS-84。
+距离矩阵使用NumPy向量化计算, 未安装NumPy时逐对计算。
+"""
+
+import math
+from typing import List, Sequence, Tuple, Union
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+# 地球平均半径(米)
+EARTH_RADIUS_METERS = 6371008.8
+
+# GCJ-02偏移算法使用的克拉索夫斯基椭球参数
+_KRASOVSKY_A = 6378245.0
+_KRASOVSKY_EE = 0.00669342162296594323
+
+# (经度, 纬度) 或 "经度,纬度"
+Coordinate = Union[Tuple[float, float], str]
+
+
+def haversine(lon1: float, lat1: float, lon2: float, lat2: float) -> float:
+    """
+    计算两点间的球面距离
+
+    Args:
+        lon1: 起点经度
+        lat1: 起点纬度
+        lon2: 终点经度
+        lat2: 终点纬度
+
+    Returns:
+        距离(米)
+    """
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_METERS * math.asin(min(1.0, math.sqrt(a)))
+
+
+_GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash(lon: float, lat: float, precision: int = 8) -> str:
+    """
+    计算坐标所在的geohash格子
+
+    精度每增加一位格子约缩小为1/32, 8位约为38m×19m。
+
+    Args:
+        lon: 经度
+        lat: 纬度
+        precision: geohash位数
+
+    Returns:
+        geohash字符串
+    """
+    lon_range, lat_range = [-180.0, 180.0], [-90.0, 90.0]
+    chars = []
+    bits, value, even = 0, 0, True
+    while len(chars) < precision:
+        rng, coordinate = (lon_range, lon) if even else (lat_range, lat)
+        middle = (rng[0] + rng[1]) / 2
+        if coordinate >= middle:
+            value = (value << 1) | 1
+            rng[0] = middle
+        else:
+            value <<= 1
+            rng[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_GEOHASH_ALPHABET[value])
+            bits, value = 0, 0
+    return "".join(chars)
+
+
+def parse_coordinate(value: Coordinate) -> Tuple[float, float]:
+    """
+    解析坐标
+
+    Args:
+        value: (经度, 纬度) 或高德格式的 "经度,纬度"
+
+    Returns:
+        (经度, 纬度)
+
+    Raises:
+        ValueError: 格式不正确
+    """
+    if isinstance(value, str):
+        parts = value.split(",")
+        if len(parts) != 2:
+            raise ValueError(f"坐标格式应为 \"经度,纬度\": {value!r}")
+        value = parts
+    lon, lat = value
+    return float(lon), float(lat)
+
+
+def _out_of_china(lon, lat):
+    return (lon < 72.004) | (lon > 137.8347) | (lat < 0.8293) | (lat > 55.8271)
+
+
+def _gcj02_offset(lon, lat, lib):
+    """GCJ-02相对WGS-84的偏移(度), lib 为 math 或 numpy"""
+    x, y = lon - 105.0, lat - 35.0
+    d_lat = (-100.0 + 2.0 * x + 3.0 * y + 0.2 * y * y + 0.1 * x * y + 0.2 * lib.sqrt(abs(x))
+             + (20.0 * lib.sin(6.0 * x * math.pi) + 20.0 * lib.sin(2.0 * x * math.pi)) * 2.0 / 3.0
+             + (20.0 * lib.sin(y * math.pi) + 40.0 * lib.sin(y / 3.0 * math.pi)) * 2.0 / 3.0
+             + (160.0 * lib.sin(y / 12.0 * math.pi) + 320 * lib.sin(y * math.pi / 30.0)) * 2.0 / 3.0)
+    d_lon = (300.0 + x + 2.0 * y + 0.1 * x * x + 0.1 * x * y + 0.1 * lib.sqrt(abs(x))
+             + (20.0 * lib.sin(6.0 * x * math.pi) + 20.0 * lib.sin(2.0 * x * math.pi)) * 2.0 / 3.0
+             + (20.0 * lib.sin(x * math.pi) + 40.0 * lib.sin(x / 3.0 * math.pi)) * 2.0 / 3.0
+             + (150.0 * lib.sin(x / 12.0 * math.pi) + 300.0 * lib.sin(x / 30.0 * math.pi)) * 2.0 / 3.0)
+
+    rad_lat = lat / 180.0 * math.pi
+    magic = 1 - _KRASOVSKY_EE * lib.sin(rad_lat) ** 2
+    sqrt_magic = lib.sqrt(magic)
+    d_lat = (d_lat * 180.0) / ((_KRASOVSKY_A * (1 - _KRASOVSKY_EE)) / (magic * sqrt_magic) * math.pi)
+    d_lon = (d_lon * 180.0) / (_KRASOVSKY_A / sqrt_magic * lib.cos(rad_lat) * math.pi)
+    return d_lon, d_lat
+
+
+def gcj02_to_wgs84(lon: float, lat: float) -> Tuple[float, float]:
+    """
+    GCJ-02坐标转换为WGS-84(迭代修正, 误差在厘米级), 中国境外的坐标不做转换
+
+    Args:
+        lon: GCJ-02经度
+        lat: GCJ-02纬度
+
+    Returns:
+        (WGS-84经度, WGS-84纬度)
+    """
+    if _out_of_china(lon, lat):
+        return lon, lat
+    wgs_lon, wgs_lat = lon, lat
+    for _ in range(2):
+        d_lon, d_lat = _gcj02_offset(wgs_lon, wgs_lat, math)
+        wgs_lon, wgs_lat = lon - d_lon, lat - d_lat
+    return wgs_lon, wgs_lat
+
+
+def coordinate_array(coordinates: Sequence[Coordinate], coord_system: str = "wgs84") -> "np.ndarray":
+    """
+    把坐标列表转换为 (N, 2) 的 [经度, 纬度] 数组(需要NumPy)
+
+    Args:
+        coordinates: 坐标列表
+        coord_system: 输入坐标系 wgs84 / gcj02, gcj02会转换为WGS-84
+
+    Returns:
+        WGS-84坐标数组
+    """
+    if coord_system not in ("wgs84", "gcj02"):
+        raise ValueError(f"不支持的坐标系: {coord_system}")
+    points = np.array([parse_coordinate(c) for c in coordinates], dtype=np.float64).reshape(-1, 2)
+    if coord_system == "gcj02" and len(points):
+        lon, lat = points[:, 0], points[:, 1]
+        inside = ~_out_of_china(lon, lat)
+        wgs_lon, wgs_lat = lon.copy(), lat.copy()
+        for _ in range(2):
+            d_lon, d_lat = _gcj02_offset(wgs_lon, wgs_lat, np)
+            wgs_lon = np.where(inside, lon - d_lon, lon)
+            wgs_lat = np.where(inside, lat - d_lat, lat)
+        points = np.column_stack((wgs_lon, wgs_lat))
+    return points
+
+
+def distance_matrix(
+        origins: Sequence[Coordinate],
+        destinations: Sequence[Coordinate] = None,
+        coord_system: str = "wgs84"
+) -> Union["np.ndarray", List[List[float]]]:
+    """
+    计算起点和终点两两之间的球面距离
+
+    Args:
+        origins: N个起点
+        destinations: M个终点, 为None时使用起点(N×N对称矩阵)
+        coord_system: 输入坐标系 wgs84 / gcj02
+
+    Returns:
+        N×M距离矩阵(米), 未安装NumPy时为嵌套列表
+    """
+    if not NUMPY_AVAILABLE:
+        convert = gcj02_to_wgs84 if coord_system == "gcj02" else (lambda lon, lat: (lon, lat))
+        src = [convert(*parse_coordinate(c)) for c in origins]
+        dst = src if destinations is None else [convert(*parse_coordinate(c)) for c in destinations]
+        return [[haversine(lon1, lat1, lon2, lat2) for lon2, lat2 in dst] for lon1, lat1 in src]
+
+    src = coordinate_array(origins, coord_system)
+    dst = src if destinations is None else coordinate_array(destinations, coord_system)
+    return haversine_matrix(src, dst)
+
+
+def haversine_matrix(src: "np.ndarray", dst: "np.ndarray") -> "np.ndarray":
+    """
+    两组WGS-84坐标两两之间的球面距离(需要NumPy)
+
+    Args:
+        src: (N, 2) 的 [经度, 纬度] 数组
+        dst: (M, 2) 的 [经度, 纬度] 数组
+
+    Returns:
+        N×M距离矩阵(米)
+    """
+    src, dst = np.radians(src), np.radians(dst)
+    lon1, lat1 = src[:, 0:1], src[:, 1:2]
+    lon2, lat2 = dst[:, 0], dst[:, 1]
+
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
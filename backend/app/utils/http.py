@@ -0,0 +1,42 @@
+"""HTTP客户端工具"""
+
+from typing import Any, Dict, Optional
+
+import httpx
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+def pool_stats(client: Optional[httpx.AsyncClient]) -> Dict[str, Any]:
+    """
+    连接池统计
+
+    依赖httpcore连接池的内部结构, 无法读取时只返回客户端是否已创建。
+
+    Args:
+        client: 异步HTTP客户端, 为None表示尚未创建
+
+    Returns:
+        连接总数、空闲连接数、HTTP/2连接数、等待中的请求数和连接上限
+    """
+    if client is None:
+        return {"created": False}
+
+    pool = getattr(getattr(client, "_transport", None), "_pool", None)
+    if pool is None:
+        return {"created": True}
+
+    connections = list(getattr(pool, "connections", []))
+    return {
+        "created": True,
+        "connections": len(connections),
+        "idle": sum(1 for connection in connections if connection.is_idle()),
+        "http2": sum(1 for connection in connections if "HTTP/2" in connection.info()),
+        "pending_requests": len(getattr(pool, "_requests", [])),
+        "max_connections": getattr(pool, "_max_connections", None),
+        "max_keepalive_connections": getattr(pool, "_max_keepalive_connections", None),
+    }
@@ -0,0 +1,261 @@
+"""行程路线优化
+
+把候选景点按地理位置分成 travel_days 组, 每组用最近邻 + 2-opt 排出游览顺序,
+并按每天的可用时间(游览时长 + 路上时间)取舍景点。规划Agent只需要按给定的路线撰写描述,
+不再由LLM负责路线效率。需要NumPy。
+"""
+
+from typing import List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from backend.app.utils.geo import EARTH_RADIUS_METERS, Coordinate, coordinate_array, haversine_matrix
+
+# 未提供游览时长时的默认值(分钟)
+DEFAULT_VISIT_MINUTES = 120
+
+
+class DayRoute(NamedTuple):
+    """一天的路线"""
+    # 按游览顺序排列的景点序号(对应输入列表)
+    stops: List[int]
+    # 路上总距离(米), 有酒店时包括往返酒店
+    distance: float
+    # 游览时长 + 路上时间(分钟)
+    minutes: float
+
+
+def optimize_itinerary(
+        locations: Sequence[Coordinate],
+        travel_days: int,
+        visit_minutes: Optional[Sequence[Optional[int]]] = None,
+        hotels: Sequence[Coordinate] = (),
+        daily_minutes: float = 480,
+        speed: float = 300,
+        transfer_minutes: float = 30,
+        coord_system: str = "gcj02"
+) -> List[DayRoute]:
+    """
+    把景点分配到每一天并排出每天的游览顺序
+
+    1. 按输入顺序(视为推荐程度)挑选景点, 直到预计总时长(游览时长 + 每站 transfer_minutes)用完所有天数
+    2. 以每天的可用时间为容量, 对景点做带容量约束的k-means聚类, 每类为一天
+    3. 每天从酒店出发(没有酒店时为开放路径)做最近邻构造 + 2-opt改进
+    4. 按实际路程计算当天时长, 超出 daily_minutes 时去掉当天最靠后的景点
+
+    Args:
+        locations: 景点坐标, 按推荐程度排序
+        travel_days: 天数
+        visit_minutes: 每个景点的游览时长(分钟), 缺失时使用 DEFAULT_VISIT_MINUTES
+        hotels: 酒店坐标, 0个(不考虑酒店)、1个(每天相同)或每天一个
+        daily_minutes: 每天可用于游览和路上的时间(分钟)
+        speed: 景点之间的平均移动速度(米/分钟, 按直线距离计算)
+        transfer_minutes: 挑选和分组时每个景点预估的路上时间(分钟)
+        coord_system: 坐标系 gcj02 / wgs84
+
+    Returns:
+        每天的路线, 长度等于 travel_days(景点不足时部分天没有景点)
+    """
+    if travel_days < 1:
+        raise ValueError("travel_days 必须大于0")
+    hotels = list(hotels)
+    if len(hotels) not in (0, 1, travel_days):
+        raise ValueError(f"酒店数量应为0、1或{travel_days}个, 实际为{len(hotels)}个")
+
+    count = len(locations)
+    durations = np.array(
+        [DEFAULT_VISIT_MINUTES if m is None else m for m in (visit_minutes or [None] * count)], dtype=np.float64
+    )
+    points = coordinate_array(list(locations) + hotels, coord_system)
+    distances = haversine_matrix(points, points)
+
+    selected = _select(durations + transfer_minutes, travel_days, daily_minutes)
+    if not selected:
+        return [DayRoute([], 0.0, 0.0) for _ in range(travel_days)]
+
+    labels = _cluster(points[selected], durations[selected] + transfer_minutes, travel_days, daily_minutes)
+    groups = [[selected[i] for i in np.flatnonzero(labels == k)] for k in range(travel_days)]
+    groups = _assign_days(groups, points, count, len(hotels))
+
+    routes = []
+    for day, stops in enumerate(groups):
+        depot = None if not hotels else count + (day if len(hotels) > 1 else 0)
+        routes.append(_plan_day(distances, stops, depot, durations, daily_minutes, speed))
+    return routes
+
+
+def _select(costs: np.ndarray, travel_days: int, daily_minutes: float) -> List[int]:
+    """按顺序挑选景点, 直到预计总时长用完所有天数(超过一天可用时间的景点跳过)"""
+    budget = travel_days * daily_minutes
+    selected = []
+    used = 0.0
+    for i, cost in enumerate(costs):
+        if cost <= daily_minutes and used + cost <= budget:
+            selected.append(i)
+            used += cost
+    return selected
+
+
+def _cluster(
+        points: np.ndarray,
+        weights: np.ndarray,
+        k: int,
+        capacity: float,
+        iterations: int = 10
+) -> np.ndarray:
+    """
+    带容量约束的k-means
+
+    在以平均纬度为基准的平面投影上聚类, 初始中心用最远点法选取(从第一个景点开始),
+    每轮按"离最近中心与次近中心的差距"从大到小依次分配到未满的最近中心。
+
+    Returns:
+        每个点所属的类别(0 ~ k-1)
+    """
+    lat0 = np.radians(points[:, 1].mean())
+    xy = np.radians(points) * EARTH_RADIUS_METERS
+    xy[:, 0] *= np.cos(lat0)
+
+    # 最远点初始化
+    centers = [0]
+    nearest = np.linalg.norm(xy - xy[0], axis=1)
+    for _ in range(1, min(k, len(xy))):
+        centers.append(int(nearest.argmax()))
+        nearest = np.minimum(nearest, np.linalg.norm(xy - xy[centers[-1]], axis=1))
+    centers = xy[centers]
+
+    labels = np.zeros(len(xy), dtype=int)
+    for _ in range(iterations):
+        to_centers = np.linalg.norm(xy[:, None, :] - centers[None, :, :], axis=2)
+        labels = _capacitated_assign(to_centers, weights, capacity)
+        updated = np.array([
+            xy[labels == c].mean(axis=0) if (labels == c).any() else centers[c]
+            for c in range(len(centers))
+        ])
+        if np.allclose(updated, centers):
+            break
+        centers = updated
+    return labels
+
+
+def _capacitated_assign(to_centers: np.ndarray, weights: np.ndarray, capacity: float) -> np.ndarray:
+    """按偏好强度依次分配到未满的最近中心, 都已满时分配到负载最小的中心"""
+    ranked = np.argsort(to_centers, axis=1)
+    if to_centers.shape[1] > 1:
+        nearest_two = np.take_along_axis(to_centers, ranked[:, :2], axis=1)
+        order = np.argsort(nearest_two[:, 0] - nearest_two[:, 1])
+    else:
+        order = np.arange(len(to_centers))
+
+    load = np.zeros(to_centers.shape[1])
+    labels = np.zeros(len(to_centers), dtype=int)
+    for i in order:
+        for c in ranked[i]:
+            if load[c] + weights[i] <= capacity:
+                break
+        else:
+            c = int(load.argmin())
+        labels[i] = c
+        load[c] += weights[i]
+    return labels
+
+
+def _assign_days(groups: List[List[int]], points: np.ndarray, count: int, hotel_count: int) -> List[List[int]]:
+    """
+    确定每组景点安排在哪一天
+
+    每天酒店不同时, 按组中心到酒店的距离从近到远依次配对; 否则推荐程度高的组排在前面。
+    """
+    if hotel_count <= 1:
+        return sorted(groups, key=lambda g: min(g) if g else len(points))
+
+    centroids = np.array([points[g].mean(axis=0) if g else points[count + i] for i, g in enumerate(groups)])
+    cost = haversine_matrix(centroids, points[count:])
+    assigned: List[Optional[List[int]]] = [None] * len(groups)
+    used_groups = set()
+    for flat in np.argsort(cost, axis=None):
+        group, day = divmod(int(flat), cost.shape[1])
+        if group in used_groups or assigned[day] is not None:
+            continue
+        assigned[day] = groups[group]
+        used_groups.add(group)
+    return assigned
+
+
+def _plan_day(
+        distances: np.ndarray,
+        stops: List[int],
+        depot: Optional[int],
+        durations: np.ndarray,
+        daily_minutes: float,
+        speed: float
+) -> DayRoute:
+    """排出一天的游览顺序, 超时时去掉最靠后(推荐程度最低)的景点"""
+    stops = sorted(stops)
+    while True:
+        route = _two_opt(distances, _nearest_neighbour(distances, stops, depot), depot)
+        length = _route_length(distances, route, depot)
+        minutes = float(durations[route].sum()) + length / speed if route else 0.0
+        if minutes <= daily_minutes or len(stops) <= 1:
+            return DayRoute(route, round(length, 1), round(minutes, 1))
+        stops = stops[:-1]
+
+
+def _nearest_neighbour(distances: np.ndarray, stops: List[int], depot: Optional[int]) -> List[int]:
+    """最近邻构造: 从酒店(没有酒店时从离其他景点最远的景点)出发, 每次前往最近的未访问景点"""
+    if not stops:
+        return []
+    sub = distances[np.ix_(stops, stops)]
+    if depot is None:
+        current = int(sub.sum(axis=1).argmax())
+    else:
+        current = int(distances[depot, stops].argmin())
+    visited = np.zeros(len(stops), dtype=bool)
+    order = [current]
+    visited[current] = True
+    for _ in range(len(stops) - 1):
+        candidates = np.where(visited, np.inf, sub[current])
+        current = int(candidates.argmin())
+        visited[current] = True
+        order.append(current)
+    return [stops[i] for i in order]
+
+
+def _two_opt(distances: np.ndarray, route: List[int], depot: Optional[int]) -> List[int]:
+    """
+    2-opt改进: 反转一段路线能缩短总路程时就反转, 直到没有可改进的反转
+
+    路线两端连接酒店; 没有酒店时两端连接一个到所有点距离都为0的虚拟点, 相当于开放路径。
+    """
+    if len(route) < 3:
+        return route
+    members = route if depot is None else route + [depot]
+    index = {node: i for i, node in enumerate(members)}
+    table = distances[np.ix_(members, members)].tolist()
+    nodes = [depot] + route + [depot]
+
+    def d(a: Optional[int], b: Optional[int]) -> float:
+        if a is None or b is None:
+            return 0.0
+        return table[index[a]][index[b]]
+
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, len(nodes) - 2):
+            for j in range(i + 1, len(nodes) - 1):
+                a, b, c, e = nodes[i - 1], nodes[i], nodes[j], nodes[j + 1]
+                if d(a, c) + d(b, e) < d(a, b) + d(c, e) - 1e-6:
+                    nodes[i:j + 1] = nodes[i:j + 1][::-1]
+                    improved = True
+    return nodes[1:-1]
+
+
+def _route_length(distances: np.ndarray, route: List[int], depot: Optional[int]) -> float:
+    """路线总长度(米), 有酒店时包括往返酒店"""
+    if not route:
+        return 0.0
+    length = float(sum(distances[a, b] for a, b in zip(route, route[1:])))
+    if depot is not None:
+        length += float(distances[depot, route[0]] + distances[route[-1], depot])
+    return length
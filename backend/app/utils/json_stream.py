@@ -0,0 +1,175 @@
+"""增量JSON解析
+
+行程规划Agent以流式方式输出TripPlan的JSON, IncrementalTripPlanParser 边接收边扫描,
+每当 days / weather_info 中的一个对象或 budget 对象闭合时立即校验并产出,
+无需等待完整响应; 即使响应尾部损坏, 已经闭合的部分也不会丢失。
+"""
+
+import json
+from typing import List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from backend.app.models.schemas import Budget, DayPlan, TripPlan, TripRequest, WeatherInfo
+
+# 顶层数组字段 -> (事件名, 元素模型)
+_ARRAY_ITEMS = {
+    "days": ("day", DayPlan),
+    "weather_info": ("weather", WeatherInfo),
+}
+# 顶层对象字段 -> (事件名, 模型)
+_OBJECT_FIELDS = {
+    "budget": ("budget", Budget),
+}
+
+
+class _Frame:
+    """扫描栈中的一个容器(对象或数组)"""
+
+    __slots__ = ("kind", "start", "parent_key", "key", "expecting_key")
+
+    def __init__(self, kind: str, start: int, parent_key: Optional[str]):
+        self.kind = kind
+        self.start = start
+        # 该容器在父对象中的字段名
+        self.parent_key = parent_key
+        # 对象中最近读到的字段名
+        self.key: Optional[str] = None
+        self.expecting_key = kind == "{"
+
+
+class IncrementalTripPlanParser:
+    """TripPlan JSON 的增量解析器"""
+
+    def __init__(self):
+        self.text = ""
+        self.days: List[DayPlan] = []
+        self.weather_info: List[WeatherInfo] = []
+        self.budget: Optional[Budget] = None
+        self.errors: List[str] = []
+        self.completed = False
+
+        self._pos = 0
+        self._stack: List[_Frame] = []
+        self._started = False
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+
+    def feed(self, chunk: str) -> List[Tuple[str, BaseModel]]:
+        """
+        追加一段输出并扫描新内容
+
+        Args:
+            chunk: 新收到的文本
+
+        Returns:
+            本次新闭合的 (事件名, 模型) 列表, 事件名为 day / weather / budget
+        """
+        self.text += chunk
+        text = self.text
+        events: List[Tuple[str, BaseModel]] = []
+
+        while self._pos < len(text) and not self.completed:
+            pos = self._pos
+            ch = text[pos]
+            self._pos += 1
+
+            if not self._started:
+                # 跳过 ```json 等前导内容, 从第一个 { 开始
+                if ch == "{":
+                    self._started = True
+                    self._stack.append(_Frame("{", pos, None))
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._on_string_end(text, pos)
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = pos
+            elif ch in "{[":
+                parent = self._stack[-1]
+                parent_key = parent.key if parent.kind == "{" else None
+                self._stack.append(_Frame(ch, pos, parent_key))
+            elif ch in "}]":
+                frame = self._stack.pop()
+                event = self._on_container_end(frame, text[frame.start:pos + 1])
+                if event is not None:
+                    events.append(event)
+                if not self._stack:
+                    self.completed = True
+            elif ch == ":":
+                self._stack[-1].expecting_key = False
+            elif ch == ",":
+                top = self._stack[-1]
+                if top.kind == "{":
+                    top.expecting_key = True
+
+        return events
+
+    def _on_string_end(self, text: str, end: int):
+        top = self._stack[-1]
+        if top.kind == "{" and top.expecting_key:
+            try:
+                top.key = json.loads(text[self._string_start:end + 1])
+            except json.JSONDecodeError:
+                top.key = None
+
+    def _on_container_end(self, frame: _Frame, raw: str) -> Optional[Tuple[str, BaseModel]]:
+        """容器闭合时, 若是需要产出的对象则解析并校验"""
+        if frame.kind != "{" or not self._stack:
+            return None
+
+        parent = self._stack[-1]
+        depth = len(self._stack)
+        if depth == 2 and parent.kind == "[" and parent.parent_key in _ARRAY_ITEMS:
+            # 根对象 -> 顶层数组 -> 元素对象
+            event, model = _ARRAY_ITEMS[parent.parent_key]
+        elif depth == 1 and frame.parent_key in _OBJECT_FIELDS:
+            # 根对象 -> 顶层对象字段
+            event, model = _OBJECT_FIELDS[frame.parent_key]
+        else:
+            return None
+
+        try:
+            item = model(**json.loads(raw))
+        except Exception as e:
+            self.errors.append(f"{event}: {e}")
+            print(f"⚠️  增量解析 {event} 失败: {e}")
+            return None
+
+        if event == "day":
+            self.days.append(item)
+        elif event == "weather":
+            self.weather_info.append(item)
+        else:
+            self.budget = item
+        return event, item
+
+    def build_plan(self, request: TripRequest) -> TripPlan:
+        """
+        用已经解析出的部分组装旅行计划(完整JSON无法解析时使用)
+
+        Raises:
+            ValueError: 没有解析出任何一天的行程
+        """
+        if not self.days:
+            raise ValueError("没有解析出任何行程")
+
+        return TripPlan(
+            city=request.city,
+            start_date=request.start_date,
+            end_date=request.end_date,
+            days=self.days,
+            weather_info=self.weather_info,
+            overall_suggestions="",
+            budget=self.budget,
+        )
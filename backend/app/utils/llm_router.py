@@ -0,0 +1,366 @@
+"""LLM路由: 多后端对冲请求
+
+LLMRouter 管理多个OpenAI兼容的LLM后端:
+    - 首选后端在其延迟分位数阈值内没有响应时, 向另一个后端发送对冲请求, 先成功的结果胜出, 另一个被取消
+    - 首选后端出错时立即转到下一个后端
+    - 被限流或连续出错的后端暂时冷却; 明显比其他后端慢的后端不再作为首选
+
+HedgedChatModel 把路由包装为LangChain聊天模型, 可以直接交给 create_agent 使用。
+流式调用以首个输出片段的到达时间(TTFT)作为对冲依据。
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import ConfigDict
+
+# 内部调用不继承外层的回调, 避免流式输出被重复上报
+_ISOLATED_CONFIG = {"callbacks": []}
+
+# 统计延迟时保留的最近样本数
+_LATENCY_WINDOW = 200
+# 延迟滑动平均的平滑系数
+_EWMA_ALPHA = 0.2
+# 连续出错达到该次数后冷却
+_MAX_CONSECUTIVE_ERRORS = 3
+
+
+def _is_rate_limited(error: BaseException) -> bool:
+    """判断是否为限流错误(openai.RateLimitError 或 HTTP 429)"""
+    return type(error).__name__ == "RateLimitError" or getattr(error, "status_code", None) == 429
+
+
+class _LatencyStats:
+    """一种调用方式(完整调用/流式首片段)的延迟统计"""
+
+    def __init__(self):
+        # 只包含完成的调用, 用于计算对冲阈值
+        self.samples: deque = deque(maxlen=_LATENCY_WINDOW)
+        self.ewma: Optional[float] = None
+        # 对冲落败时已用的时间("至少这么慢"), 只用于选择首选后端, 下一次完成的调用会清除
+        self.lower_bound: Optional[float] = None
+        self.losses = 0
+
+    def record(self, latency: float):
+        """记录一次完成的调用"""
+        self.samples.append(latency)
+        self.ewma = latency if self.ewma is None else _EWMA_ALPHA * latency + (1 - _EWMA_ALPHA) * self.ewma
+        self.lower_bound = None
+
+    def record_loss(self, elapsed: float):
+        """记录一次对冲落败: 调用被取消时已经用了 elapsed 秒仍未完成"""
+        self.losses += 1
+        self.lower_bound = elapsed if self.lower_bound is None else max(self.lower_bound, elapsed)
+
+    @property
+    def estimate(self) -> Optional[float]:
+        """选择首选后端使用的延迟估计: 平均延迟和落败下限中较大的"""
+        values = [v for v in (self.ewma, self.lower_bound) if v is not None]
+        return max(values) if values else None
+
+    def percentile(self, p: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(math.ceil(p / 100 * len(ordered))) - 1)]
+
+
+class LLMBackend:
+    """路由中的一个LLM后端"""
+
+    def __init__(self, name: str, model: BaseChatModel):
+        self.name = name
+        self.model = model
+        self.latency = {"invoke": _LatencyStats(), "stream": _LatencyStats()}
+        self.requests = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.consecutive_errors = 0
+        self.cooldown_until = 0.0
+        # 作为对冲请求发出的次数 / 对冲请求胜出的次数
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.wins = 0
+
+    @property
+    def cooling_down(self) -> bool:
+        return time.monotonic() < self.cooldown_until
+
+    def stats(self) -> Dict[str, Any]:
+        def latency(kind: str) -> Dict[str, Any]:
+            stats = self.latency[kind]
+            p50, p95 = stats.percentile(50), stats.percentile(95)
+            return {
+                "samples": len(stats.samples),
+                "losses": stats.losses,
+                "p50_ms": None if p50 is None else round(p50 * 1000, 1),
+                "p95_ms": None if p95 is None else round(p95 * 1000, 1),
+            }
+
+        return {
+            "requests": self.requests,
+            "wins": self.wins,
+            "errors": self.errors,
+            "rate_limited": self.rate_limited,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "hedge_win_rate": round(self.hedge_wins / self.hedged, 3) if self.hedged else None,
+            "cooling_down": self.cooling_down,
+            "invoke_latency": latency("invoke"),
+            "stream_ttft": latency("stream"),
+        }
+
+
+class LLMRouter:
+    """多LLM后端的对冲请求路由"""
+
+    def __init__(
+            self,
+            backends: Sequence[Tuple[str, BaseChatModel]],
+            hedge: bool = True,
+            hedge_percentile: float = 95.0,
+            min_samples: int = 20,
+            default_delay: float = 10.0,
+            min_delay: float = 0.5,
+            slow_factor: float = 2.0,
+            cooldown: float = 30.0,
+    ):
+        """
+        初始化LLM路由
+
+        Args:
+            backends: (名称, 聊天模型) 列表, 按优先级排列
+            hedge: 是否发送对冲请求
+            hedge_percentile: 对冲阈值使用的首选后端延迟分位数
+            min_samples: 样本数少于该值时使用 default_delay 作为对冲阈值
+            default_delay: 默认对冲阈值(秒)
+            min_delay: 对冲阈值下限(秒)
+            slow_factor: 首选后端的平均延迟超过其他后端的该倍数时, 改用更快的后端作为首选
+            cooldown: 后端被限流或连续出错后的冷却时间(秒)
+        """
+        if not backends:
+            raise ValueError("LLM路由至少需要一个后端")
+        self.backends = [LLMBackend(name, model) for name, model in backends]
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.min_samples = min_samples
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.slow_factor = slow_factor
+        self.cooldown = cooldown
+        self.requests = 0
+        self.hedged_requests = 0
+
+    def order(self, kind: str = "invoke") -> List[int]:
+        """
+        本次请求尝试后端的顺序
+
+        可用(未冷却)的后端按优先级排列; 若有后端的延迟估计(平均延迟, 或对冲落败时的下限)比首选后端快 slow_factor 倍以上, 改为首选它。
+        """
+        indexes = list(range(len(self.backends)))
+        healthy = [i for i in indexes if not self.backends[i].cooling_down] or indexes
+        order = healthy + [i for i in indexes if i not in healthy]
+
+        primary_estimate = self.backends[order[0]].latency[kind].estimate
+        if primary_estimate is not None:
+            faster = [
+                i for i in healthy[1:]
+                if self.backends[i].latency[kind].estimate is not None
+                and self.backends[i].latency[kind].estimate * self.slow_factor < primary_estimate
+            ]
+            if faster:
+                best = min(faster, key=lambda i: self.backends[i].latency[kind].estimate)
+                order.remove(best)
+                order.insert(0, best)
+        return order
+
+    def hedge_delay(self, backend: LLMBackend, kind: str) -> float:
+        """对冲阈值: 首选后端延迟的分位数"""
+        stats = backend.latency[kind]
+        if len(stats.samples) < self.min_samples:
+            return self.default_delay
+        return max(self.min_delay, stats.percentile(self.hedge_percentile))
+
+    async def _attempt(self, backend: LLMBackend, kind: str, call: Awaitable[Any]) -> Any:
+        """执行一次调用并记录延迟和错误"""
+        backend.requests += 1
+        start = time.perf_counter()
+        try:
+            result = await call
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            backend.errors += 1
+            backend.consecutive_errors += 1
+            if _is_rate_limited(e):
+                backend.rate_limited += 1
+                backend.cooldown_until = time.monotonic() + self.cooldown
+                print(f"⚠️  LLM后端 {backend.name} 被限流, 冷却 {self.cooldown:.0f}s")
+            elif backend.consecutive_errors >= _MAX_CONSECUTIVE_ERRORS:
+                backend.cooldown_until = time.monotonic() + self.cooldown
+                print(f"⚠️  LLM后端 {backend.name} 连续出错 {backend.consecutive_errors} 次, 冷却 {self.cooldown:.0f}s")
+            raise
+        backend.consecutive_errors = 0
+        backend.latency[kind].record(time.perf_counter() - start)
+        return result
+
+    async def race(
+            self,
+            start: Callable[[int], Awaitable[Any]],
+            kind: str = "invoke",
+            discard: Optional[Callable[[Any], Awaitable[None]]] = None
+    ) -> Any:
+        """
+        按对冲策略执行调用, 返回第一个成功的结果
+
+        Args:
+            start: 以后端序号发起一次调用
+            kind: invoke(完整调用) / stream(流式, 以首个片段计时)
+            discard: 处理未被采用的成功结果(如关闭流)
+
+        Raises:
+            最后一个后端的错误(所有后端都失败时)
+        """
+        self.requests += 1
+        queue = self.order(kind)
+        primary = self.backends[queue[0]]
+        pending: Dict[asyncio.Task, int] = {}
+        started: Dict[asyncio.Task, float] = {}
+        hedged_index: Optional[int] = None
+        last_error: Optional[BaseException] = None
+
+        def launch():
+            index = queue.pop(0)
+            task = asyncio.ensure_future(self._attempt(self.backends[index], kind, start(index)))
+            pending[task] = index
+            started[task] = time.perf_counter()
+            return index
+
+        launch()
+        try:
+            while pending:
+                timeout = None
+                if self.hedge and queue and hedged_index is None and len(pending) == 1:
+                    timeout = self.hedge_delay(primary, kind)
+
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # 首选后端超过阈值仍未响应, 发送对冲请求
+                    hedged_index = launch()
+                    self.backends[hedged_index].hedged += 1
+                    self.hedged_requests += 1
+                    continue
+
+                winner = None
+                for task in done:
+                    index = pending.pop(task)
+                    if task.exception() is not None:
+                        last_error = task.exception()
+                        print(f"⚠️  LLM后端 {self.backends[index].name} 调用失败: {last_error}")
+                    elif winner is None:
+                        winner = (index, task.result())
+                    elif discard is not None:
+                        await discard(task.result())
+
+                if winner is not None:
+                    index, result = winner
+                    self.backends[index].wins += 1
+                    if index == hedged_index:
+                        self.backends[index].hedge_wins += 1
+                    # 落败的后端至少用了这么长时间: 只作为"至少这么慢"的信号使路由避开持续偏慢的后端,
+                    # 不计入延迟样本(被截断的时间会拉低对冲阈值)
+                    now = time.perf_counter()
+                    for task, loser in pending.items():
+                        self.backends[loser].latency[kind].record_loss(now - started[task])
+                    return result
+
+                if not pending and queue:
+                    # 出错后立即转到下一个后端
+                    launch()
+            raise last_error
+        finally:
+            for task in pending:
+                if discard is not None and task.done() and not task.cancelled() and task.exception() is None:
+                    await discard(task.result())
+                else:
+                    task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "hedged_requests": self.hedged_requests,
+            "hedge_rate": round(self.hedged_requests / self.requests, 3) if self.requests else None,
+            "primary": self.backends[self.order()[0]].name,
+            "backends": {backend.name: backend.stats() for backend in self.backends},
+        }
+
+
+class HedgedChatModel(BaseChatModel):
+    """通过LLMRouter调用多个后端的聊天模型"""
+
+    router: LLMRouter
+    # 已绑定工具的各后端, 为None时直接使用路由中的模型
+    bound: Optional[List[Any]] = None
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    @property
+    def _llm_type(self) -> str:
+        return "hedged-router"
+
+    def _runnables(self) -> List[Any]:
+        return self.bound if self.bound is not None else [backend.model for backend in self.router.backends]
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> "HedgedChatModel":
+        bound = [backend.model.bind_tools(tools, **kwargs) for backend in self.router.backends]
+        return HedgedChatModel(router=self.router, bound=bound)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        # 同步调用不做对冲, 直接使用当前首选后端
+        runnable = self._runnables()[self.router.order()[0]]
+        message = runnable.invoke(messages, stop=stop, config=_ISOLATED_CONFIG, **kwargs)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        runnables = self._runnables()
+        message = await self.router.race(
+            lambda i: runnables[i].ainvoke(messages, stop=stop, config=_ISOLATED_CONFIG, **kwargs)
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        runnables = self._runnables()
+
+        async def first_chunk(i: int):
+            stream = runnables[i].astream(messages, stop=stop, config=_ISOLATED_CONFIG, **kwargs).__aiter__()
+            try:
+                return stream, await stream.__anext__()
+            except StopAsyncIteration:
+                return stream, None
+            except BaseException:
+                await stream.aclose()
+                raise
+
+        async def close(result):
+            await result[0].aclose()
+
+        stream, chunk = await self.router.race(first_chunk, kind="stream", discard=close)
+        try:
+            while chunk is not None:
+                if isinstance(chunk, AIMessageChunk):
+                    yield ChatGenerationChunk(message=chunk)
+                try:
+                    chunk = await stream.__anext__()
+                except StopAsyncIteration:
+                    chunk = None
+        finally:
+            await stream.aclose()
@@ -1,4 +1,15 @@
+import asyncio
+import inspect
+import json
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from langchain_core.tools import BaseTool, StructuredTool, ToolException
 from langchain_mcp_adapters.client import MultiServerMCPClient
+from mcp import ClientSession
+from mcp.shared.exceptions import McpError
+from mcp.types import CallToolResult, TextContent, Tool as MCPTool
 
 
 async def create_mcp_stdio_client(name: str, params):
@@ -30,3 +41,403 @@ async def create_mcp_streamable_http_client(name: str, url: str):
     tools = await client.get_tools()
 
     return tools
+
+
+async def create_mcp_inprocess_tools(server) -> List[BaseTool]:
+    """
+    将FastMCP服务中注册的工具直接转换为进程内的LangChain工具
+
+    工具名称、描述和参数schema与通过stdio/http暴露时一致,但调用时直接执行函数,
+    没有序列化和进程间通信开销。同步函数在线程池中执行,避免阻塞事件循环。
+
+    Args:
+        server: FastMCP服务实例
+
+    Returns:
+        LangChain工具列表
+    """
+    get_tools = getattr(server, "get_tools", None)
+    if get_tools is not None:
+        # fastmcp 2.x 返回 {name: tool}
+        fastmcp_tools = list((await get_tools()).values())
+    else:
+        fastmcp_tools = list(await server.list_tools())
+
+    return [_fastmcp_tool_to_langchain_tool(tool) for tool in fastmcp_tools]
+
+
+def _fastmcp_tool_to_langchain_tool(tool) -> BaseTool:
+    fn = tool.fn
+
+    async def call_tool(**arguments: Any) -> str:
+        if inspect.iscoroutinefunction(fn):
+            result = await fn(**arguments)
+        else:
+            result = await asyncio.to_thread(fn, **arguments)
+        if isinstance(result, str):
+            return result
+        return json.dumps(result, ensure_ascii=False, default=str)
+
+    return StructuredTool(
+        name=tool.name,
+        description=tool.description or "",
+        args_schema=tool.parameters,
+        coroutine=call_tool,
+        metadata={"mcp_transport": "inprocess"},
+    )
+
+
+def call_tool_result_to_text(result: CallToolResult) -> str:
+    """
+    将MCP工具调用结果转换为字符串
+
+    Args:
+        result: MCP工具调用结果
+
+    Returns:
+        文本内容(多个文本块按换行拼接)
+
+    Raises:
+        ToolException: 工具返回错误时
+    """
+    texts = [c.text if isinstance(c, TextContent) else str(c) for c in result.content]
+    text = "\n".join(texts)
+    if result.isError:
+        raise ToolException(text or "MCP工具调用失败")
+    return text
+
+
+class _PooledSession:
+    """会话池中的单个MCP会话
+
+    MCP客户端的上下文(anyio任务组)必须在同一个任务中进入和退出,
+    因此每个会话由一个独立的后台任务持有,关闭时通知该任务退出。
+    """
+
+    def __init__(self, client: MultiServerMCPClient, name: str, index: int):
+        self.client = client
+        self.name = name
+        self.index = index
+        self.session: Optional[ClientSession] = None
+        self.created_at = 0.0
+        self.calls = 0
+        self.broken = False
+        self.error: Optional[BaseException] = None
+        self._task: Optional[asyncio.Task] = None
+        self._ready = asyncio.Event()
+        self._closing = asyncio.Event()
+
+    @property
+    def age(self) -> float:
+        """会话已存活的秒数"""
+        return time.monotonic() - self.created_at
+
+    @property
+    def connected(self) -> bool:
+        """会话是否可用"""
+        return (
+            self.session is not None
+            and not self.broken
+            and self._task is not None
+            and not self._task.done()
+        )
+
+    async def connect(self, timeout: float):
+        """建立(或重建)会话"""
+        await self.disconnect()
+
+        self._ready = asyncio.Event()
+        self._closing = asyncio.Event()
+        self.error = None
+        self.broken = False
+        self._task = asyncio.create_task(self._hold(), name=f"mcp-{self.name}-{self.index}")
+
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            await self.disconnect()
+            raise TimeoutError(f"MCP会话 {self.name}#{self.index} 连接超时({timeout}s)")
+        if self.session is None:
+            raise ConnectionError(f"MCP会话 {self.name}#{self.index} 连接失败: {self.error}")
+
+        self.created_at = time.monotonic()
+        self.calls = 0
+
+    async def _hold(self):
+        """在独立任务中持有会话上下文,直到收到关闭通知"""
+        try:
+            async with self.client.session(self.name) as session:
+                self.session = session
+                self._ready.set()
+                await self._closing.wait()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.session = None
+            self._ready.set()
+
+    async def disconnect(self, timeout: float = 5.0):
+        """关闭会话"""
+        task, self._task = self._task, None
+        self.session = None
+        if task is None:
+            return
+
+        self._closing.set()
+        _, pending = await asyncio.wait({task}, timeout=timeout)
+        if pending:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+
+class MCPSessionPool:
+    """MCP会话池
+
+    维护固定上限的长连接会话,所有调用方共享,避免每次请求都重新握手。
+    空闲会话定期ping检查,失效的会话在下次取用或健康检查时自动重连。
+    对stdio传输而言每个会话就是一个常驻的工作进程,可按调用次数或存活时间回收,
+    防止进程内存无限增长。
+    """
+
+    def __init__(
+            self,
+            name: str,
+            connection: Dict[str, Any],
+            size: int = 4,
+            health_check_interval: float = 30.0,
+            connect_timeout: float = 15.0,
+            max_calls: int = 0,
+            max_age: float = 0.0,
+    ):
+        """
+        初始化会话池
+
+        Args:
+            name: MCP服务名称
+            connection: MultiServerMCPClient的连接配置(含transport)
+            size: 会话数量上限
+            health_check_interval: 健康检查间隔(秒), <=0 表示不做后台检查
+            connect_timeout: 单个会话的连接超时(秒)
+            max_calls: 单个会话最多处理的调用次数,超过后回收重建, 0 表示不限制
+            max_age: 单个会话的最长存活时间(秒),超过后回收重建, 0 表示不限制
+        """
+        if size < 1:
+            raise ValueError("会话池大小必须大于0")
+
+        self.name = name
+        self.size = size
+        self.health_check_interval = health_check_interval
+        self.connect_timeout = connect_timeout
+        self.max_calls = max_calls
+        self.max_age = max_age
+        self.recycled = 0
+        self.client = MultiServerMCPClient({name: connection})
+
+        self._slots = [_PooledSession(self.client, name, i) for i in range(size)]
+        self._idle: Optional[asyncio.Queue] = None
+        self._health_task: Optional[asyncio.Task] = None
+        self._recycle_tasks: set = set()
+        self._open_lock = asyncio.Lock()
+        self._opened = False
+
+    @property
+    def opened(self) -> bool:
+        return self._opened
+
+    async def open(self):
+        """建立所有会话并启动健康检查; 全部失败时抛出异常"""
+        async with self._open_lock:
+            if self._opened:
+                return
+
+            results = await asyncio.gather(
+                *(slot.connect(self.connect_timeout) for slot in self._slots),
+                return_exceptions=True
+            )
+            failures = [r for r in results if isinstance(r, BaseException)]
+            if len(failures) == len(self._slots):
+                await asyncio.gather(*(slot.disconnect() for slot in self._slots))
+                raise ConnectionError(f"MCP会话池 {self.name} 无法建立任何会话: {failures[0]}")
+
+            self._idle = asyncio.Queue()
+            for slot in self._slots:
+                self._idle.put_nowait(slot)
+
+            if self.health_check_interval > 0:
+                self._health_task = asyncio.create_task(self._health_loop(), name=f"mcp-{self.name}-health")
+
+            self._opened = True
+            print(f"✅ MCP会话池 {self.name} 已就绪: {len(self._slots) - len(failures)}/{len(self._slots)} 个会话")
+
+    async def close(self):
+        """关闭健康检查和所有会话"""
+        async with self._open_lock:
+            if not self._opened:
+                return
+            self._opened = False
+
+            if self._health_task is not None:
+                self._health_task.cancel()
+                await asyncio.gather(self._health_task, return_exceptions=True)
+                self._health_task = None
+
+            for task in self._recycle_tasks:
+                task.cancel()
+            await asyncio.gather(*self._recycle_tasks, return_exceptions=True)
+            self._recycle_tasks.clear()
+
+            await asyncio.gather(*(slot.disconnect() for slot in self._slots), return_exceptions=True)
+            self._idle = None
+            print(f"👋 MCP会话池 {self.name} 已关闭")
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[ClientSession]:
+        """
+        从池中取出一个会话,用完自动归还
+
+        调用过程中出现传输层异常的会话会被标记为失效,下次取用时重连。
+        调用方被取消(阶段超时、对冲落败、客户端断开等)不影响会话本身,会话照常归还。
+        """
+        if not self._opened:
+            await self.open()
+
+        idle = self._idle
+        slot = await idle.get()
+        try:
+            if not slot.connected:
+                await slot.connect(self.connect_timeout)
+            slot.calls += 1
+            yield slot.session
+        except (McpError, asyncio.CancelledError):
+            # 服务端正常返回了协议错误,或调用方被取消: 会话本身仍然可用
+            raise
+        except Exception:
+            slot.broken = True
+            raise
+        finally:
+            if slot.connected and self._expired(slot):
+                self._recycle_later(slot, idle)
+            else:
+                idle.put_nowait(slot)
+
+    def _expired(self, slot: _PooledSession) -> bool:
+        """会话是否达到回收条件"""
+        if self.max_calls > 0 and slot.calls >= self.max_calls:
+            return True
+        if self.max_age > 0 and slot.age >= self.max_age:
+            return True
+        return False
+
+    def _recycle_later(self, slot: _PooledSession, idle: asyncio.Queue):
+        """在后台重建会话,完成后再放回池中,不阻塞当前调用方"""
+
+        async def recycle():
+            try:
+                await self._recycle(slot)
+            finally:
+                idle.put_nowait(slot)
+
+        task = asyncio.create_task(recycle(), name=f"mcp-{self.name}-{slot.index}-recycle")
+        self._recycle_tasks.add(task)
+        task.add_done_callback(self._recycle_tasks.discard)
+
+    async def _recycle(self, slot: _PooledSession):
+        calls, age = slot.calls, slot.age
+        try:
+            await slot.connect(self.connect_timeout)
+            self.recycled += 1
+            print(f"♻️  MCP会话 {self.name}#{slot.index} 已回收重建 (调用 {calls} 次, 存活 {age:.0f}s)")
+        except Exception as e:
+            print(f"❌ MCP会话 {self.name}#{slot.index} 回收重建失败: {e}")
+
+    async def list_tools(self) -> List[MCPTool]:
+        """获取MCP服务端的工具定义"""
+        async with self.acquire() as session:
+            result = await session.list_tools()
+            tools = list(result.tools)
+            while result.nextCursor:
+                result = await session.list_tools(cursor=result.nextCursor)
+                tools.extend(result.tools)
+            return tools
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any]) -> CallToolResult:
+        """通过池中的会话调用工具"""
+        async with self.acquire() as session:
+            return await session.call_tool(name, arguments)
+
+    async def get_tools(self) -> List[BaseTool]:
+        """获取LangChain工具列表,工具调用经由会话池执行"""
+        return [self.to_langchain_tool(tool) for tool in await self.list_tools()]
+
+    def to_langchain_tool(self, tool: MCPTool) -> BaseTool:
+        """将MCP工具定义转换为经由会话池调用的LangChain工具"""
+
+        async def call_tool(**arguments: Any) -> str:
+            result = await self.call_tool(tool.name, arguments)
+            return call_tool_result_to_text(result)
+
+        return StructuredTool(
+            name=tool.name,
+            description=tool.description or "",
+            args_schema=tool.inputSchema,
+            coroutine=call_tool,
+            metadata={"mcp_server": self.name},
+        )
+
+    async def check_health(self) -> int:
+        """
+        检查所有空闲会话,失效的会话自动重连
+
+        Returns:
+            检查后可用的会话数
+        """
+        if not self._opened:
+            return 0
+
+        idle = self._idle
+        healthy = 0
+        for _ in range(idle.qsize()):
+            try:
+                slot = idle.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            try:
+                if slot.connected and self._expired(slot):
+                    await self._recycle(slot)
+                if slot.connected:
+                    try:
+                        await asyncio.wait_for(slot.session.send_ping(), timeout=self.connect_timeout)
+                    except Exception as e:
+                        print(f"⚠️  MCP会话 {self.name}#{slot.index} 健康检查失败: {e!r}")
+                        slot.broken = True
+                if not slot.connected:
+                    try:
+                        await slot.connect(self.connect_timeout)
+                        print(f"🔄 MCP会话 {self.name}#{slot.index} 已重连")
+                    except Exception as e:
+                        print(f"❌ MCP会话 {self.name}#{slot.index} 重连失败: {e}")
+                if slot.connected:
+                    healthy += 1
+            finally:
+                idle.put_nowait(slot)
+        return healthy
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            try:
+                await self.check_health()
+            except Exception as e:
+                print(f"⚠️  MCP会话池 {self.name} 健康检查异常: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """会话池状态"""
+        return {
+            "name": self.name,
+            "size": self.size,
+            "opened": self._opened,
+            "connected": sum(1 for slot in self._slots if slot.connected),
+            "idle": self._idle.qsize() if self._idle is not None else 0,
+            "calls": sum(slot.calls for slot in self._slots),
+            "recycled": self.recycled,
+        }
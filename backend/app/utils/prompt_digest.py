@@ -0,0 +1,88 @@
+"""规划Agent输入摘要
+
+把POI搜索和天气查询的结构化结果压缩为固定格式的紧凑表格, 只保留规划需要的字段,
+代替把各Agent的自由文本直接拼进prompt, 减少规划Agent的输入token。
+"""
+
+import re
+from typing import List, Optional, Sequence
+
+from backend.app.models.schemas import POIInfo, WeatherInfo
+
+ATTRACTION_HEADER = "格式: 名称|经度,纬度|类别|评分|门票(元)"
+HOTEL_HEADER = "格式: 名称|经度,纬度|类别|评分|价格(元)"
+WEATHER_HEADER = "格式: 日期|白天/夜间天气|白天/夜间温度(°C)|风向风力"
+
+_CJK_PATTERN = re.compile(r"[\u2e80-\u9fff\uf900-\ufaff\uff00-\uffef]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    估算文本的token数
+
+    中文字符按每字1个token, 其余字符按每4个字符1个token计算。
+    """
+    cjk = len(_CJK_PATTERN.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def _number(value: Optional[float]) -> str:
+    if value is None:
+        return "-"
+    return str(int(value)) if float(value).is_integer() else f"{value:g}"
+
+
+def _category(poi_type: str) -> str:
+    """高德类型形如 "风景名胜;公园广场;公园", 取最具体的一级"""
+    parts = [part for part in poi_type.split(";") if part]
+    return parts[-1] if parts else "-"
+
+
+def poi_row(poi: POIInfo) -> str:
+    """单个POI的表格行"""
+    return (f"- {poi.name}|{poi.location.longitude:.5f},{poi.location.latitude:.5f}|"
+            f"{_category(poi.type)}|{_number(poi.rating)}|{_number(poi.cost)}")
+
+
+def _truncate_rows(header: str, rows: List[str], token_budget: int) -> str:
+    """按顺序保留不超过token预算的行(至少保留一行)"""
+    kept = [header]
+    used = estimate_tokens(header)
+    for row in rows:
+        cost = estimate_tokens(row) + 1
+        if len(kept) > 1 and used + cost > token_budget:
+            break
+        kept.append(row)
+        used += cost
+    omitted = len(rows) - (len(kept) - 1)
+    if omitted:
+        kept.append(f"(另有{omitted}个结果因篇幅省略)")
+    return "\n".join(kept)
+
+
+def poi_digest(pois: Sequence[POIInfo], token_budget: int, header: str = ATTRACTION_HEADER) -> str:
+    """
+    POI列表摘要
+
+    Args:
+        pois: 已排序的POI列表, 超出预算时保留靠前的
+        token_budget: token预算
+        header: 表头
+
+    Returns:
+        紧凑表格文本
+    """
+    if not pois:
+        return "未找到相关结果"
+    return _truncate_rows(header, [poi_row(poi) for poi in pois], token_budget)
+
+
+def weather_digest(forecasts: Sequence[WeatherInfo]) -> str:
+    """天气摘要, 每个日期一行"""
+    if not forecasts:
+        return "未查询到天气信息"
+    rows = [
+        f"- {w.date}|{w.day_weather}/{w.night_weather}|{w.day_temp}/{w.night_temp}|{w.wind_direction}{w.wind_power}"
+        for w in forecasts
+    ]
+    return "\n".join([WEATHER_HEADER, *rows])
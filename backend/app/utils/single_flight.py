@@ -0,0 +1,55 @@
+"""合并重复的异步调用
+
+同一个key的调用只执行一次: 执行中的调用被后来者共享, 成功的结果在对象的生命周期内复用,
+失败或取消的调用不会被记住, 下次调用时重新执行。
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """按key合并并记住异步调用的结果(不限容量, 适合生命周期较短的作用域, 如一次批量规划)"""
+
+    def __init__(self):
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+        # 实际执行次数 / 复用已有调用的次数
+        self.calls = 0
+        self.hits = 0
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[T]]) -> T:
+        """
+        执行或复用key对应的调用
+
+        等待方被取消(如阶段超时)时不会取消共享的调用, 其他等待方仍能拿到结果。
+
+        Args:
+            key: 调用的标识
+            factory: 创建调用协程的函数, 只在key没有可复用的调用时执行
+
+        Returns:
+            调用结果
+        """
+        task = self._tasks.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(factory())
+            self._tasks[key] = task
+            task.add_done_callback(lambda t: self._forget_failed(key, t))
+        else:
+            self.hits += 1
+        return await asyncio.shield(task)
+
+    def _forget_failed(self, key: Hashable, task: asyncio.Task):
+        if (task.cancelled() or task.exception() is not None) and self._tasks.get(key) is task:
+            del self._tasks[key]
+
+    def close(self):
+        """取消仍在执行的调用"""
+        for task in self._tasks.values():
+            task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"calls": self.calls, "hits": self.hits}
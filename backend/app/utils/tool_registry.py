@@ -0,0 +1,167 @@
+import asyncio
+import json
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from langchain_core.tools import BaseTool
+
+
+class ToolRegistry:
+    """MCP工具注册表
+
+    工具列表只在刷新时从服务端拉取一次,按名称(含带前缀的别名)建立索引,
+    查找时是纯内存读取。后台按TTL定期刷新,查找未命中时也会触发一次后台刷新。
+    """
+
+    def __init__(
+            self,
+            name: str,
+            loader: Callable[[], Awaitable[List[BaseTool]]],
+            prefix: Optional[str] = None,
+            ttl: float = 600.0,
+            miss_refresh_interval: float = 10.0,
+    ):
+        """
+        初始化工具注册表
+
+        Args:
+            name: 注册表名称(用于日志)
+            loader: 拉取工具列表的协程函数
+            prefix: 工具名别名前缀, 如 "amap" 会同时注册 "amap_maps_weather"
+            ttl: 后台刷新间隔(秒)
+            miss_refresh_interval: 未命中触发刷新的最小间隔(秒)
+        """
+        self.name = name
+        self.prefix = prefix
+        self.ttl = ttl
+        self.miss_refresh_interval = miss_refresh_interval
+
+        self._loader = loader
+        self._index: Dict[str, BaseTool] = {}
+        self._tools: List[BaseTool] = []
+        self._signature = None
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._loop_task: Optional[asyncio.Task] = None
+        self._last_attempt = 0.0
+
+        # 最近一次成功刷新的时间戳(time.time()), 未加载时为None
+        self.last_refreshed: Optional[float] = None
+        # 工具定义(名称/描述/参数)变化时递增
+        self.version = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self.last_refreshed is not None
+
+    async def refresh(self) -> bool:
+        """
+        从服务端重新拉取工具列表并重建索引
+
+        Returns:
+            工具定义是否发生变化
+        """
+        async with self._lock:
+            return await self._refresh_locked()
+
+    async def _refresh_locked(self) -> bool:
+        self._last_attempt = time.monotonic()
+        tools = await self._loader()
+
+        index: Dict[str, BaseTool] = {}
+        for tool in tools:
+            index[tool.name] = tool
+            if self.prefix:
+                index[f"{self.prefix}_{tool.name}"] = tool
+
+        signature = tuple(sorted(
+            (t.name, t.description, json.dumps(t.args, sort_keys=True, ensure_ascii=False, default=str))
+            for t in tools
+        ))
+        changed = signature != self._signature
+
+        self._index = index
+        self._tools = list(tools)
+        self._signature = signature
+        self.last_refreshed = time.time()
+        if changed:
+            self.version += 1
+            print(f"🔧 工具注册表 {self.name} 已更新: {len(tools)} 个工具 (版本 {self.version})")
+        return changed
+
+    async def load(self):
+        """首次使用前加载工具列表(已加载时直接返回)"""
+        if self.loaded:
+            return
+        async with self._lock:
+            if not self.loaded:
+                await self._refresh_locked()
+
+    def get(self, name: str) -> Optional[BaseTool]:
+        """
+        按名称查找工具(纯内存读取)
+
+        未命中时在后台触发一次刷新,本次返回None。
+        """
+        tool = self._index.get(name)
+        if tool is None:
+            self._schedule_refresh()
+        return tool
+
+    async def aget(self, name: str) -> Optional[BaseTool]:
+        """按名称查找工具,注册表尚未加载时先加载"""
+        await self.load()
+        return self.get(name)
+
+    async def get_tools(self) -> List[BaseTool]:
+        """获取全部工具(不含别名),注册表尚未加载时先加载"""
+        await self.load()
+        return list(self._tools)
+
+    def _schedule_refresh(self):
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+        if time.monotonic() - self._last_attempt < self.miss_refresh_interval:
+            return
+        try:
+            self._refresh_task = asyncio.get_running_loop().create_task(self._safe_refresh())
+        except RuntimeError:
+            # 不在事件循环中,无法后台刷新
+            pass
+
+    async def _safe_refresh(self):
+        try:
+            await self.refresh()
+        except Exception as e:
+            print(f"⚠️  工具注册表 {self.name} 刷新失败: {e}")
+
+    async def start(self):
+        """加载工具列表并启动TTL后台刷新"""
+        try:
+            await self.load()
+        finally:
+            if self.ttl > 0 and self._loop_task is None:
+                self._loop_task = asyncio.create_task(self._refresh_loop(), name=f"registry-{self.name}")
+
+    async def stop(self):
+        """停止后台刷新"""
+        tasks = [t for t in (self._loop_task, self._refresh_task) if t is not None]
+        self._loop_task = None
+        self._refresh_task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.ttl)
+            await self._safe_refresh()
+
+    def stats(self) -> Dict[str, object]:
+        """注册表状态"""
+        return {
+            "name": self.name,
+            "tools_count": len(self._tools),
+            "version": self.version,
+            "last_refreshed": self.last_refreshed,
+        }
@@ -0,0 +1,115 @@
+"""
+高德地图后端基准测试: MCP网关 与 REST直连 对比
+
+两个后端都指向本地桩服务(amap_stub_server),逐个方法对比 AmapService 的调用延迟,
+并测试并发场景下的吞吐。
+
+用法(在仓库根目录执行, --start-stub 会自动启动桩服务):
+    python -m backend.benchmarks.amap_backends --start-stub --iterations 100 --latency-ms 20
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import subprocess
+import sys
+import time
+
+from backend.app.services.amap_backends import MCPAmapBackend, RestAmapBackend
+from backend.app.services.amap_service import AmapService
+from backend.app.utils.mcp import MCPSessionPool
+from backend.app.utils.tool_registry import ToolRegistry
+from backend.benchmarks.timing import measure, report
+
+
+def _operations(service: AmapService):
+    return {
+        "search_poi": lambda: service.search_poi("故宫", "北京"),
+        "get_weather": lambda: service.get_weather("北京"),
+        "geocode": lambda: service.geocode("故宫博物院", "北京"),
+        "plan_route": lambda: service.plan_route("故宫博物院", "天坛公园", "北京", "北京"),
+    }
+
+
+async def _bench_concurrency(call, total: int, concurrency: int) -> float:
+    """并发执行 total 次调用, 返回每秒完成数"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await call()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return total / (time.perf_counter() - start)
+
+
+async def main(args):
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    pool = MCPSessionPool(
+        "amap",
+        {"transport": "streamable_http", "url": f"{base_url}/gateway/mcp"},
+        size=args.concurrency,
+        health_check_interval=0,
+    )
+    registry = ToolRegistry("amap", pool.get_tools, prefix="amap", ttl=0)
+    backends = [
+        MCPAmapBackend(registry),
+        RestAmapBackend(api_key="stub", base_url=base_url, max_connections=args.concurrency * 2),
+    ]
+
+    print(f"\n{'=' * 60}")
+    print(f"高德地图后端基准测试 (桩服务 {base_url})")
+    print(f"{'=' * 60}")
+
+    try:
+        for backend in backends:
+            service = AmapService(backend=backend, use_cache=False)
+            operations = _operations(service)
+
+            # AmapService 的调试输出会干扰结果, 测量期间屏蔽
+            with contextlib.redirect_stdout(io.StringIO()):
+                await pool.open()
+                await registry.load()
+                # 确认两个后端规整出的结果一致
+                pois = await operations["search_poi"]()
+                weather = await operations["get_weather"]()
+                samples = {name: await measure(call, args.iterations) for name, call in operations.items()}
+                throughput = await _bench_concurrency(operations["search_poi"], args.iterations, args.concurrency)
+
+            print(f"\n[{backend.name}] POI {len(pois)} 个, 天气 {len(weather)} 天")
+            for name, values in samples.items():
+                report(f"{backend.name}.{name}", values, width=20)
+            print(f"{backend.name}.search_poi 并发{args.concurrency}: {throughput:.1f} 次/秒")
+    finally:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for backend in backends:
+                await backend.close()
+            await pool.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="高德地图 MCP网关 / REST直连 后端延迟对比")
+    parser.add_argument("--port", type=int, default=8900, help="桩服务端口")
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--start-stub", action="store_true", help="自动启动本地桩服务")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="桩服务模拟的上游耗时(配合 --start-stub)")
+    args = parser.parse_args()
+
+    stub = None
+    if args.start_stub:
+        stub = subprocess.Popen([
+            sys.executable, "-m", "backend.benchmarks.amap_stub_server",
+            "--port", str(args.port), "--latency-ms", str(args.latency_ms),
+        ])
+        time.sleep(3)
+
+    try:
+        asyncio.run(main(args))
+    finally:
+        if stub is not None:
+            stub.terminate()
+            stub.wait()
@@ -0,0 +1,261 @@
+"""
+高德地图本地桩服务(离线基准测试用)
+
+同一进程内同时提供:
+    - REST接口:  /v3/place/text, /v3/weather/weatherInfo, /v3/geocode/geo ... (高德Web服务格式)
+    - MCP网关:   /gateway/mcp (streamable_http, 工具名与高德MCP网关一致)
+
+两者返回相同的数据,可通过 --latency-ms 模拟上游耗时。
+
+用法(在仓库根目录执行):
+    python -m backend.benchmarks.amap_stub_server --port 8900 --latency-ms 20
+
+然后将后端指向桩服务:
+    AMAP_MCP_URL=http://127.0.0.1:8900/gateway/mcp
+    AMAP_REST_BASE_URL=http://127.0.0.1:8900
+"""
+
+import argparse
+import asyncio
+import json
+from typing import Any, Dict, List
+
+from fastapi import FastAPI, Query
+from fastmcp import FastMCP
+
+LATENCY_SECONDS = 0.0
+
+POIS: List[Dict[str, Any]] = [
+    {
+        "id": f"B000A{i:05d}",
+        "name": name,
+        "type": "风景名胜;风景名胜;国家级景点",
+        "typecode": "110202",
+        "address": address,
+        "location": location,
+        "tel": "010-85007421",
+        "distance": str(300 * (i + 1)),
+        "pname": "北京市",
+        "cityname": "北京市",
+        "adname": adname,
+        "biz_ext": {"rating": "4.8", "cost": "60.00"},
+    }
+    for i, (name, address, location, adname) in enumerate([
+        ("故宫博物院", "景山前街4号", "116.397026,39.918058", "东城区"),
+        ("天坛公园", "天坛东里甲1号", "116.410829,39.881913", "东城区"),
+        ("颐和园", "新建宫门路19号", "116.275179,39.999617", "海淀区"),
+        ("八达岭长城", "G6京藏高速58号出口", "116.016033,40.356188", "延庆区"),
+        ("南锣鼓巷", "南锣鼓巷", "116.403119,39.937967", "东城区"),
+    ])
+]
+
+# MCP网关的POI结果只有基本字段, 没有评分、消费和省市区名称
+_GATEWAY_POI_EXCLUDED = {"biz_ext", "pname", "cityname", "adname"}
+
+CASTS = [
+    {
+        "date": f"2025-06-0{i + 1}",
+        "week": str(i + 1),
+        "dayweather": "晴",
+        "nightweather": "多云",
+        "daytemp": str(30 + i),
+        "nighttemp": str(18 + i),
+        "daywind": "南",
+        "nightwind": "南",
+        "daypower": "1-3",
+        "nightpower": "1-3",
+    }
+    for i in range(4)
+]
+
+GEOCODE = {
+    "formatted_address": "北京市东城区景山前街4号",
+    "country": "中国",
+    "province": "北京市",
+    "citycode": "010",
+    "city": "北京市",
+    "district": "东城区",
+    "street": "景山前街",
+    "number": "4号",
+    "adcode": "110101",
+    "location": "116.397026,39.918058",
+    "level": "门牌号",
+}
+
+ROUTE_PATH = {"distance": "2350", "duration": "1880", "steps": []}
+
+
+async def _simulate_latency():
+    if LATENCY_SECONDS > 0:
+        await asyncio.sleep(LATENCY_SECONDS)
+
+
+# ============ MCP网关 ============
+
+mcp = FastMCP("Amap Stub Gateway")
+
+
+def _dump(data: Dict[str, Any]) -> str:
+    return json.dumps(data, ensure_ascii=False)
+
+
+def _gateway_pois() -> List[Dict[str, Any]]:
+    return [{k: v for k, v in poi.items() if k not in _GATEWAY_POI_EXCLUDED} for poi in POIS]
+
+
+@mcp.tool("maps_text_search")
+async def maps_text_search(keywords: str, city: str = "", citylimit: str = "false") -> str:
+    """关键词搜索POI"""
+    await _simulate_latency()
+    return _dump({"suggestion": {"keywords": [], "ciytes": []}, "pois": _gateway_pois()})
+
+
+@mcp.tool("maps_around_search")
+async def maps_around_search(location: str, keywords: str = "", radius: str = "1000") -> str:
+    """周边搜索POI"""
+    await _simulate_latency()
+    return _dump({"pois": _gateway_pois()})
+
+
+@mcp.tool("maps_search_detail")
+async def maps_search_detail(id: str) -> str:
+    """POI详情"""
+    await _simulate_latency()
+    return _dump({"pois": _gateway_pois()[:1]})
+
+
+@mcp.tool("maps_weather")
+async def maps_weather(city: str) -> str:
+    """天气预报"""
+    await _simulate_latency()
+    return _dump({"city": "北京市", "forecasts": CASTS})
+
+
+@mcp.tool("maps_geo")
+async def maps_geo(address: str, city: str = "") -> str:
+    """地理编码"""
+    await _simulate_latency()
+    return _dump({"results": [{k: v for k, v in GEOCODE.items() if k != "formatted_address"}]})
+
+
+@mcp.tool("maps_regeocode")
+async def maps_regeocode(location: str) -> str:
+    """逆地理编码"""
+    await _simulate_latency()
+    return _dump({"regeocode": {"formatted_address": GEOCODE["formatted_address"]}})
+
+
+@mcp.tool("maps_distance")
+async def maps_distance(origins: str, destination: str, type: str = "1") -> str:
+    """距离测量"""
+    await _simulate_latency()
+    return _dump({"results": [{"origin_id": "1", "dest_id": "1", "distance": "2350", "duration": "600"}]})
+
+
+def _gateway_route(origin: str, destination: str) -> str:
+    return _dump({"route": {"origin": origin, "destination": destination, "paths": [ROUTE_PATH]}})
+
+
+@mcp.tool("maps_direction_walking")
+async def maps_direction_walking(origin: str, destination: str) -> str:
+    """步行路径规划"""
+    await _simulate_latency()
+    return _gateway_route(origin, destination)
+
+
+@mcp.tool("maps_direction_driving")
+async def maps_direction_driving(origin: str, destination: str) -> str:
+    """驾车路径规划"""
+    await _simulate_latency()
+    return _gateway_route(origin, destination)
+
+
+@mcp.tool("maps_direction_bicycling")
+async def maps_direction_bicycling(origin: str, destination: str) -> str:
+    """骑行路径规划"""
+    await _simulate_latency()
+    return _gateway_route(origin, destination)
+
+
+# ============ REST接口 ============
+
+mcp_app = mcp.http_app(path="/mcp")
+app = FastAPI(title="Amap Stub Server", lifespan=mcp_app.lifespan)
+
+
+def _ok(**data: Any) -> Dict[str, Any]:
+    return {"status": "1", "info": "OK", "infocode": "10000", **data}
+
+
+@app.get("/v3/place/text")
+@app.get("/v3/place/around")
+@app.get("/v3/place/detail")
+async def place(key: str = Query("")):
+    await _simulate_latency()
+    return _ok(count=str(len(POIS)), pois=POIS)
+
+
+@app.get("/v3/weather/weatherInfo")
+async def weather(city: str = Query(...), extensions: str = Query("base")):
+    await _simulate_latency()
+    return _ok(count="1", forecasts=[{
+        "city": "北京市",
+        "adcode": city,
+        "province": "北京",
+        "reporttime": "2025-06-01 11:00:00",
+        "casts": CASTS,
+    }])
+
+
+@app.get("/v3/geocode/geo")
+async def geocode(address: str = Query(...)):
+    await _simulate_latency()
+    return _ok(count="1", geocodes=[GEOCODE])
+
+
+@app.get("/v3/geocode/regeo")
+async def regeocode(location: str = Query(...)):
+    await _simulate_latency()
+    return _ok(regeocode={"formatted_address": GEOCODE["formatted_address"], "addressComponent": {}})
+
+
+@app.get("/v3/config/district")
+async def district(keywords: str = Query("")):
+    await _simulate_latency()
+    return _ok(count="1", districts=[{"adcode": GEOCODE["adcode"], "name": keywords, "level": "province"}])
+
+
+@app.get("/v3/distance")
+async def distance(origins: str = Query(...), destination: str = Query(...)):
+    await _simulate_latency()
+    return _ok(count="1", results=[{"origin_id": "1", "dest_id": "1", "distance": "2350", "duration": "600"}])
+
+
+@app.get("/v3/direction/walking")
+@app.get("/v3/direction/driving")
+@app.get("/v3/direction/transit/integrated")
+async def direction(origin: str = Query(...), destination: str = Query(...)):
+    await _simulate_latency()
+    return _ok(count="1", route={"origin": origin, "destination": destination, "paths": [ROUTE_PATH]})
+
+
+@app.get("/v4/direction/bicycling")
+async def bicycling(origin: str = Query(...), destination: str = Query(...)):
+    await _simulate_latency()
+    return {"errcode": 0, "errmsg": "OK", "data": {"origin": origin, "destination": destination, "paths": [ROUTE_PATH]}}
+
+
+app.mount("/gateway", mcp_app)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="高德地图本地桩服务(REST + MCP网关)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="每次调用模拟的上游耗时(毫秒)")
+    args = parser.parse_args()
+
+    LATENCY_SECONDS = args.latency_ms / 1000
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,119 @@
+"""
+直线距离基准测试: 逐对调用MCP距离测量 与 本地计算 对比
+
+MCP后端指向本地桩服务(amap_stub_server), 只反映调用链路本身的开销;
+本地计算分别测试单对距离(AmapService.calculate_distance, type=0)
+和 N×N 距离矩阵(NumPy向量化 与 逐对haversine)。
+
+用法(在仓库根目录执行, --start-stub 会自动启动桩服务):
+    python -m backend.benchmarks.distance --start-stub --iterations 100 --points 200
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import random
+import subprocess
+import sys
+import time
+
+from backend.app.services.amap_backends import MCPAmapBackend
+from backend.app.services.amap_service import AmapService
+from backend.app.utils.geo import NUMPY_AVAILABLE, distance_matrix, gcj02_to_wgs84, haversine
+from backend.app.utils.mcp import MCPSessionPool
+from backend.app.utils.tool_registry import ToolRegistry
+from backend.benchmarks.timing import measure, report
+
+
+def _random_points(count: int, seed: int = 0):
+    """北京市区范围内的随机GCJ-02坐标"""
+    rng = random.Random(seed)
+    return [f"{rng.uniform(116.2, 116.6):.6f},{rng.uniform(39.8, 40.05):.6f}" for _ in range(count)]
+
+
+def _python_matrix(points):
+    """逐对计算的距离矩阵(对照组)"""
+    converted = [gcj02_to_wgs84(*map(float, p.split(","))) for p in points]
+    return [[haversine(lon1, lat1, lon2, lat2) for lon2, lat2 in converted] for lon1, lat1 in converted]
+
+
+def _time(call, repeat: int = 3) -> float:
+    """多次执行取最短耗时(毫秒)"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best
+
+
+async def main(args):
+    base_url = f"http://127.0.0.1:{args.port}"
+    points = _random_points(args.points)
+    origin, destination = points[0], points[1]
+
+    pool = MCPSessionPool(
+        "amap",
+        {"transport": "streamable_http", "url": f"{base_url}/gateway/mcp"},
+        size=1,
+        health_check_interval=0,
+    )
+    registry = ToolRegistry("amap", pool.get_tools, prefix="amap", ttl=0)
+    backend = MCPAmapBackend(registry)
+    service = AmapService(backend=backend)
+    payload = {"origins": origin, "destination": destination, "type": "0"}
+
+    print(f"\n{'=' * 60}")
+    print(f"直线距离基准测试 (桩服务 {base_url}, {args.points} 个点, NumPy: {'是' if NUMPY_AVAILABLE else '否'})")
+    print(f"{'=' * 60}")
+
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            await pool.open()
+            await registry.load()
+            remote = await measure(lambda: backend.call("maps_distance", payload), args.iterations)
+            local = await measure(lambda: service.calculate_distance(origin, destination, "0"), args.iterations)
+    finally:
+        with contextlib.redirect_stdout(io.StringIO()):
+            await backend.close()
+            await pool.close()
+
+    print("\n[单对距离]")
+    report("mcp.maps_distance", remote, width=24)
+    report("local.calculate_distance", local, width=24)
+
+    pairs = args.points * args.points
+    numpy_ms = _time(lambda: distance_matrix(points, coord_system="gcj02"))
+    python_ms = _time(lambda: _python_matrix(points), repeat=1)
+    remote_ms = sum(remote) / len(remote) * pairs
+
+    print(f"\n[{args.points}×{args.points} 距离矩阵, {pairs} 对]")
+    print(f"{'mcp 逐对调用(估算)':<24} {remote_ms:12.1f}ms")
+    print(f"{'local 逐对haversine':<24} {python_ms:12.1f}ms")
+    print(f"{'local NumPy矩阵':<24} {numpy_ms:12.1f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="直线距离: MCP逐对调用 / 本地计算 对比")
+    parser.add_argument("--port", type=int, default=8900, help="桩服务端口")
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--points", type=int, default=200, help="距离矩阵的点数")
+    parser.add_argument("--start-stub", action="store_true", help="自动启动本地桩服务")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="桩服务模拟的上游耗时(配合 --start-stub)")
+    args = parser.parse_args()
+
+    stub = None
+    if args.start_stub:
+        stub = subprocess.Popen([
+            sys.executable, "-m", "backend.benchmarks.amap_stub_server",
+            "--port", str(args.port), "--latency-ms", str(args.latency_ms),
+        ])
+        time.sleep(3)
+
+    try:
+        asyncio.run(main(args))
+    finally:
+        if stub is not None:
+            stub.terminate()
+            stub.wait()
@@ -0,0 +1,89 @@
+"""
+MCP工具调用延迟基准测试: stdio 与 进程内(inprocess) 传输对比
+
+使用一个不访问网络的回显工具,只测量传输本身的开销:
+    - stdio-spawn: 每次调用新建客户端并启动子进程(旧实现)
+    - stdio-pool:  常驻工作进程池(MCPSessionPool)
+    - inprocess:   进程内直接调用(create_mcp_inprocess_tools)
+
+用法(在仓库根目录执行):
+    python -m backend.benchmarks.mcp_transport --iterations 200
+"""
+
+import argparse
+import asyncio
+import sys
+from typing import List
+
+from fastmcp import FastMCP
+
+from backend.app.utils.mcp import MCPSessionPool, create_mcp_inprocess_tools, create_mcp_stdio_client
+from backend.benchmarks.timing import measure, report
+
+mcp = FastMCP("Benchmark Echo Tool")
+
+
+@mcp.tool("echo")
+def echo(text: str) -> str:
+    """原样返回输入文本"""
+    return text
+
+
+STDIO_PARAMS = {
+    "command": sys.executable,
+    "args": ["-m", "backend.benchmarks.mcp_transport", "--serve"],
+}
+
+PAYLOAD = {"text": "故宫博物院"}
+
+
+async def bench_stdio_spawn(iterations: int) -> List[float]:
+    async def call():
+        _, tools = await create_mcp_stdio_client("bench", STDIO_PARAMS)
+        return await tools[0].ainvoke(PAYLOAD)
+
+    return await measure(call, iterations, warmup=1)
+
+
+async def bench_stdio_pool(iterations: int) -> List[float]:
+    pool = MCPSessionPool(
+        "bench",
+        {"transport": "stdio", **STDIO_PARAMS},
+        size=1,
+        health_check_interval=0,
+    )
+    await pool.open()
+    try:
+        tool = (await pool.get_tools())[0]
+        return await measure(lambda: tool.ainvoke(PAYLOAD), iterations)
+    finally:
+        await pool.close()
+
+
+async def bench_inprocess(iterations: int) -> List[float]:
+    tool = (await create_mcp_inprocess_tools(mcp))[0]
+    return await measure(lambda: tool.ainvoke(PAYLOAD), iterations)
+
+
+async def main(args):
+    print(f"\n{'=' * 60}")
+    print("MCP传输延迟基准测试 (回显工具, 不含网络)")
+    print(f"{'=' * 60}")
+
+    if args.spawn_iterations > 0:
+        report("stdio-spawn", await bench_stdio_spawn(args.spawn_iterations))
+    report("stdio-pool", await bench_stdio_pool(args.iterations))
+    report("inprocess", await bench_inprocess(args.iterations))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MCP stdio / inprocess 调用延迟对比")
+    parser.add_argument("--iterations", type=int, default=200, help="stdio-pool 和 inprocess 的调用次数")
+    parser.add_argument("--spawn-iterations", type=int, default=5, help="stdio-spawn 的调用次数(0 表示跳过)")
+    parser.add_argument("--serve", action="store_true", help="以stdio方式运行回显工具服务(供基准测试内部使用)")
+    args = parser.parse_args()
+
+    if args.serve:
+        mcp.run(transport="stdio")
+    else:
+        asyncio.run(main(args))
@@ -0,0 +1,29 @@
+"""基准测试公共计时工具"""
+
+import statistics
+import time
+from typing import Awaitable, Callable, List
+
+
+async def measure(call: Callable[[], Awaitable[object]], iterations: int, warmup: int = 3) -> List[float]:
+    """顺序执行 call 并返回每次耗时(毫秒)"""
+    for _ in range(warmup):
+        await call()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await call()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(name: str, samples: List[float], width: int = 12):
+    """打印 均值 / p50 / p95"""
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(
+        f"{name:<{width}} n={len(samples):<5} "
+        f"mean={statistics.mean(samples):9.3f}ms  "
+        f"p50={statistics.median(samples):9.3f}ms  "
+        f"p95={p95:9.3f}ms"
+    )
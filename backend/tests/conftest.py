@@ -0,0 +1,51 @@
+"""测试公共配置
+
+Settings 在导入时读取环境变量, 这里为必填项提供占位值,
+并关闭调用结果缓存的持久化, 避免测试写入 data/ 目录。
+"""
+
+import os
+from types import SimpleNamespace
+
+for _name, _value in {
+    "AMAP_API_KEY": "test",
+    "UNSPLASH_ACCESS_KEY": "test",
+    "UNSPLASH_SECRET_KEY": "test",
+    "LLM_API_KEY": "test",
+    "LLM_MODEL_NAME": "test-model",
+    "LLM_BASE_URL": "http://127.0.0.1:9/v1",
+    "DEEPSEEK_API_KEY": "test",
+    "AMAP_CACHE_DB_PATH": "",
+}.items():
+    os.environ.setdefault(_name, _value)
+
+import pytest
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+class Clock:
+    """可手动推进的时钟, 替换被测模块中的 time.time"""
+
+    def __init__(self, now: float = 1_700_000_000.0):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    from backend.app.services import amap_cache
+    from backend.app.utils import cache
+
+    fake = Clock()
+    for module in (cache, amap_cache):
+        monkeypatch.setattr(module, "time", SimpleNamespace(time=fake.time))
+    return fake
@@ -0,0 +1,230 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from backend.app.models.schemas import RouteInfo, WeatherInfo
+from backend.app.services import amap_cache
+from backend.app.services.amap_cache import GeocodeCache, POISearchCache, ReverseGeocodeCache, RouteCache, \
+    WeatherCache, _CHINA_TZ, close_geocode_cache, normalize_city, parse_ttl_overrides
+from backend.app.utils import cache as cache_module
+
+
+def test_normalize_city():
+    assert normalize_city(" 北京市 ") == normalize_city("北京")
+    assert normalize_city("ＢＥＩＪＩＮＧ") == "beijing"
+
+
+def test_parse_ttl_overrides_skips_invalid_items():
+    assert parse_ttl_overrides("酒店=1800, 景 点 =60,bad,x=abc") == {"酒店": 1800.0, "景点": 60.0}
+
+
+@pytest.mark.anyio
+async def test_geocode_cache_persists_across_instances(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = GeocodeCache(path)
+    await cache.set("故宫", "北京市", "116.397,39.916")
+    cache.close()
+
+    reopened = GeocodeCache(path)
+    assert await reopened.get(" 故宫", "北京") == (True, "116.397,39.916")
+    assert reopened.stats()["disk_hits"] == 1
+    reopened.close()
+
+
+@pytest.mark.anyio
+async def test_geocode_cache_negative_entries_expire_sooner(tmp_path, clock):
+    cache = GeocodeCache(str(tmp_path / "cache.db"), ttl=1000, negative_ttl=10)
+    await cache.set("不存在的地址", None, None)
+    await cache.set("故宫", None, "116.397,39.916")
+    assert await cache.get("不存在的地址") == (True, None)
+
+    clock.advance(20)
+    assert await cache.get("不存在的地址") == (False, None)
+    assert await cache.get("故宫") == (True, "116.397,39.916")
+    assert cache.purge_expired() == 1
+    cache.close()
+
+
+@pytest.mark.anyio
+async def test_geocode_cache_memory_is_bounded():
+    cache = GeocodeCache(None, max_size=2)
+    for i in range(3):
+        await cache.set(f"地址{i}", None, f"{i},{i}")
+    assert await cache.get("地址0") == (False, None)
+    assert cache.stats()["evictions"] == 1
+
+
+@pytest.mark.anyio
+async def test_close_geocode_cache_closes_connection(monkeypatch, tmp_path):
+    cache = GeocodeCache(str(tmp_path / "cache.db"))
+    monkeypatch.setattr(amap_cache, "_geocode_cache", cache)
+
+    await close_geocode_cache()
+    assert amap_cache._geocode_cache is None
+    assert cache.stats()["persistent"] is False
+
+    # 关闭后仍在线程池中排队的读写直接跳过, 缓存退化为只使用内存
+    cache._save(cache.key("天坛", "北京"), "116.41,39.88", 0)
+    await cache.set("故宫", "北京", "116.397,39.916")
+    assert await cache.get("故宫", "北京") == (True, "116.397,39.916")
+
+
+def test_reverse_geocode_cache_shares_cell_and_keeps_real_addresses():
+    cache = ReverseGeocodeCache(precision=7, max_size=10)
+    cache.set(116.397128, 39.916527, "北京市东城区故宫")
+    # 同一格子内相距约1米的坐标
+    assert cache.get(116.397138, 39.916530) == "北京市东城区故宫"
+
+    assert not cache.seed(116.397128, 39.916527, "预填充地址")
+    assert cache.seed(116.5, 39.9, "北京市朝阳区某地")
+    cache.set(116.5, 39.9, "北京市朝阳区真实地址")
+    assert cache.get(116.5, 39.9) == "北京市朝阳区真实地址"
+
+
+def test_reverse_geocode_cache_eviction():
+    cache = ReverseGeocodeCache(precision=8, max_size=2)
+    for i in range(3):
+        cache.set(116.0 + i * 0.1, 39.9, f"地址{i}")
+    assert cache.get(116.0, 39.9) is None
+    assert cache.stats()["evictions"] == 1
+
+
+@pytest.mark.anyio
+async def test_poi_search_cache_key_normalisation_and_ttl_overrides(clock):
+    cache = POISearchCache(ttl=100, stale_ttl=0, ttl_overrides={"酒店": 10})
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        return []
+
+    await cache.search("故宫", "北京市", True, fetch)
+    await cache.search(" 故宫 ", "北京", True, fetch)
+    await cache.search("酒店", "北京", True, fetch)
+    assert len(calls) == 2
+
+    clock.advance(20)
+    await cache.search("故宫", "北京", True, fetch)
+    await cache.search("酒店", "北京", True, fetch)
+    assert len(calls) == 3
+
+
+def _ts(hour: int, minute: int = 0) -> float:
+    return datetime(2026, 10, 17, hour, minute, tzinfo=_CHINA_TZ).timestamp()
+
+
+@pytest.mark.parametrize("now, expected", [
+    (_ts(7), _ts(8, 15)),
+    (_ts(8, 10), _ts(8, 15)),
+    (_ts(8, 15), _ts(11, 15)),
+    (_ts(12), _ts(18, 15)),
+    (_ts(19), _ts(8, 15) + 24 * 3600),
+])
+def test_weather_cache_next_refresh_follows_publish_hours(now, expected):
+    cache = WeatherCache(publish_hours=(18, 8, 11), publish_delay=900)
+    assert cache.next_refresh(now) == expected
+
+
+def _forecast() -> WeatherInfo:
+    return WeatherInfo(date="2026-10-17", day_weather="晴", night_weather="晴", day_temp=20, night_temp=10,
+                       wind_direction="北", wind_power="3")
+
+
+@pytest.mark.anyio
+async def test_weather_cache_expires_at_next_publish(clock):
+    clock.now = _ts(9)
+    cache = WeatherCache(publish_hours=(8, 11, 18), publish_delay=900, stale_ttl=600)
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        return [_forecast()]
+
+    await cache.get("北京市", fetch)
+    clock.now = _ts(11, 10)
+    assert cache.peek("北京") is not None
+    await cache.get("北京", fetch)
+    assert len(calls) == 1
+
+    clock.now = _ts(11, 20)
+    assert cache.peek("北京") is None
+    assert cache.peek("北京", allow_stale=True) is not None
+    clock.now = _ts(11, 30)
+    assert cache.peek("北京", allow_stale=True) is None
+
+
+def test_weather_cache_empty_forecasts_are_short_lived(clock):
+    clock.now = _ts(9)
+    cache = WeatherCache(publish_delay=900, stale_ttl=0)
+    cache.put("未知城市", [])
+    clock.advance(901)
+    assert cache.peek("未知城市") is None
+
+
+A, B = "116.397128,39.916527", "116.410886,39.881998"
+
+
+def _route(route_type: str) -> RouteInfo:
+    return RouteInfo(distance=4200, duration=3000, route_type=route_type, description="")
+
+
+def test_route_cache_reuses_walking_summary_in_reverse():
+    cache = RouteCache()
+    cache.set("walking", A, B, _route("walking"), {"steps": ["A->B"]})
+
+    info, raw = cache.get("walking", B, A)
+    assert info.distance == 4200 and raw is None
+    # 需要原始数据时, 反方向没有原始数据不算命中
+    assert cache.get("walking", B, A, raw=True) is None
+    assert cache.get("walking", A, B, raw=True)[1] == {"steps": ["A->B"]}
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["reverse_hits"]) == (2, 1, 1)
+
+
+def test_route_cache_driving_is_directional_and_short_lived(clock):
+    cache = RouteCache(ttl=3600, traffic_ttl=60)
+    cache.set("driving", A, B, _route("driving"), {})
+    assert cache.get("driving", B, A) is None
+    assert cache.get("driving", A, B) is not None
+    clock.advance(61)
+    assert cache.get("driving", A, B) is None
+
+
+def test_route_cache_raw_data_is_bounded_separately():
+    cache = RouteCache(max_size=10, raw_max_size=1)
+    cache.set("walking", A, B, _route("walking"), {"path": 1})
+    cache.set("walking", A, "116.42,39.90", _route("walking"), {"path": 2})
+
+    assert cache.get("walking", A, B) is not None
+    assert cache.get("walking", A, B, raw=True) is None
+    assert cache.stats()["raw"]["evictions"] == 1
+
+
+def test_route_cache_returns_copies():
+    cache = RouteCache()
+    cache.set("walking", A, B, _route("walking"), None)
+    info, _ = cache.get("walking", A, B)
+    info.description = "A -> B"
+    assert cache.get("walking", A, B)[0].description == ""
+
+
+@pytest.mark.parametrize("raw", [False, True])
+@pytest.mark.parametrize("ttl", range(1, 6))
+def test_route_cache_entry_expiring_during_lookup_is_a_miss(monkeypatch, clock, raw, ttl):
+    # 每次读取时间都前进1秒, 条目会在查询过程中的某一步过期
+    def tick() -> float:
+        clock.advance(1)
+        return clock.now
+
+    monkeypatch.setattr(cache_module, "time", SimpleNamespace(time=tick))
+    cache = RouteCache(ttl=ttl)
+    cache.set("walking", A, B, _route("walking"), None)
+
+    result = cache.get("walking", A, B, raw=raw)
+    if result is not None:
+        info, route_data = result
+        assert info.distance == 4200 and route_data is None
+    stats = cache.stats()
+    assert stats["hits"] + stats["misses"] == 1
@@ -0,0 +1,160 @@
+import asyncio
+
+import pytest
+
+from backend.app.models.schemas import Location, POIInfo
+from backend.app.services.amap_backends import RestAmapBackend
+from backend.app.services.amap_cache import ReverseGeocodeCache
+from backend.app.services.amap_service import AmapService, merge_poi_results
+from backend.benchmarks import amap_stub_server
+
+
+def _poi(poi_id: str, name: str, longitude: float = 116.4, latitude: float = 39.9) -> POIInfo:
+    return POIInfo(id=poi_id, name=name, type="风景名胜", address="",
+                   location=Location(longitude=longitude, latitude=latitude))
+
+
+class FakeBackend:
+    """按工具名返回固定响应, 记录调用"""
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.calls = []
+
+    async def call(self, tool_name, payload):
+        self.calls.append((tool_name, payload))
+        return self.responses[tool_name]
+
+
+def _service(responses) -> AmapService:
+    service = AmapService(backend=FakeBackend(responses), use_cache=False)
+    service.reverse_geocode_cache = ReverseGeocodeCache()
+    return service
+
+
+def test_merge_dedupes_by_id_and_nearby_name():
+    merged = merge_poi_results([
+        (None, [_poi("1", "故宫"), _poi("2", "景山公园", 116.396, 39.925)]),
+        ("历史文化", [_poi("", "故宫博物院", 116.4005, 39.9), _poi("3", "天坛", 116.41, 39.88)]),
+        ("历史文化", [_poi("1", "故宫")]),
+        # 同名但相距很远的不是同一地点
+        ("公园", [_poi("4", "景山公园", 117.0, 39.9)]),
+    ])
+
+    assert [poi.id for poi in merged] == ["1", "3", "4", "2"]
+
+
+@pytest.mark.anyio
+async def test_search_attractions_ranks_by_matched_preferences():
+    results = {
+        "历史文化": [_poi("1", "故宫"), _poi("2", "天坛", 116.41, 39.88)],
+        "公园": [_poi("2", "天坛", 116.41, 39.88), _poi("3", "颐和园", 116.27, 39.99)],
+        "景点": [_poi("4", "南锣鼓巷", 116.40, 39.94), _poi("1", "故宫")],
+    }
+    searched = []
+
+    async def search(keywords, city):
+        searched.append(keywords)
+        return results[keywords]
+
+    service = AmapService(backend=object())
+    service.search_poi = search
+    pois, missed = await service.search_attractions("北京", ["历史文化", " 公园", "历史文化", ""])
+
+    assert sorted(searched) == ["公园", "历史文化", "景点"]
+    assert [poi.id for poi in pois] == ["2", "1", "3", "4"]
+    assert missed == []
+
+
+@pytest.mark.anyio
+async def test_search_attractions_timeout_returns_partial_results():
+    cancelled = []
+
+    async def search(keywords, city):
+        if keywords == "夜景":
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(keywords)
+                raise
+        return [_poi("1", "故宫")]
+
+    service = AmapService(backend=object())
+    service.search_poi = search
+    pois, missed = await service.search_attractions("北京", ["历史文化", "夜景"], timeout=0.05)
+    await asyncio.sleep(0)
+
+    assert [poi.id for poi in pois] == ["1"]
+    assert missed == ["夜景"]
+    assert cancelled == ["夜景"]
+
+
+@pytest.mark.anyio
+async def test_search_attractions_skips_failed_and_cancelled_searches():
+    cancelled = asyncio.get_running_loop().create_future()
+    cancelled.cancel()
+
+    async def search(keywords, city):
+        if keywords == "历史文化":
+            return [_poi("1", "故宫"), _poi("2", "天坛", 116.41, 39.88)]
+        if keywords == "美食":
+            raise RuntimeError("网关错误")
+        if keywords == "购物":
+            return await cancelled
+        if keywords == "夜景":
+            await asyncio.sleep(10)
+        return [_poi("2", "天坛", 116.41, 39.88), _poi("3", "颐和园", 116.27, 39.99)]
+
+    service = AmapService(backend=object(), use_cache=False)
+    pois, missed = await service.search_attractions("北京", ["历史文化", "美食", "购物", "夜景"], timeout=0.2,
+                                                    search=search)
+
+    assert [poi.id for poi in pois] == ["1", "2", "3"]
+    assert missed == ["夜景", "美食", "购物"]
+
+
+@pytest.mark.anyio
+async def test_geocoding_seeds_reverse_cache_with_formatted_address():
+    service = _service({"maps_geo": {"results": [
+        {"location": "116.397128,39.916527", "formatted_address": "北京市东城区故宫博物院"},
+    ]}})
+    assert await service._geocode_location("故宫", "北京") == "116.397128,39.916527"
+    assert service.reverse_geocode_cache.get(116.397128, 39.916527) == "北京市东城区故宫博物院"
+
+    # 没有 formatted_address 的结果不预填充, 不用省市区拼接的地址冒充逆地理编码结果
+    service = _service({"maps_geo": {"results": [
+        {"location": "116.397128,39.916527", "province": "北京市", "district": "东城区"},
+    ]}})
+    await service._geocode_location("故宫", "北京")
+    assert service.reverse_geocode_cache.get(116.397128, 39.916527) is None
+
+
+@pytest.mark.anyio
+async def test_rest_poi_search_seeds_reverse_cache_with_full_address():
+    # 基准测试桩服务中的REST原始响应, 经REST后端规整后得到实际使用的POI结构
+    data = RestAmapBackend(api_key="test")._normalize_pois({"pois": amap_stub_server.POIS})
+    service = _service({"maps_text_search": data})
+    pois = await service.search_poi("景点", "北京")
+
+    gugong, nanluoguxiang = pois[0], pois[4]
+    cache = service.reverse_geocode_cache
+    assert cache.get(gugong.location.longitude, gugong.location.latitude) == "北京市东城区景山前街4号"
+    # 详细地址中已有的名称不重复拼接
+    assert cache.get(nanluoguxiang.location.longitude, nanluoguxiang.location.latitude) == "北京市东城区南锣鼓巷"
+    assert cache.stats()["seeded"] == len(pois)
+
+
+@pytest.mark.anyio
+async def test_gateway_poi_search_without_region_names_does_not_seed():
+    service = _service({"maps_text_search": {"pois": amap_stub_server._gateway_pois()}})
+    pois = await service.search_poi("景点", "北京")
+
+    assert len(pois) == len(amap_stub_server.POIS)
+    assert service.reverse_geocode_cache.stats()["seeded"] == 0
+
+
+def test_rest_empty_region_fields_are_skipped():
+    poi = {"pname": [], "cityname": [], "adname": [], "address": [], "location": "116.4,39.9"}
+    service = _service({})
+    service._seed_reverse_geocode([poi, {**poi, "adname": "东城区", "address": "景山前街4号"}])
+    assert service.reverse_geocode_cache.get(116.4, 39.9) == "东城区景山前街4号"
@@ -0,0 +1,185 @@
+import asyncio
+
+import pytest
+
+from backend.app.utils.cache import SWRCache, TTLCache
+
+
+async def settle():
+    """让后台刷新任务及其完成回调执行完"""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.evictions == 1
+    assert len(cache) == 2
+
+
+def test_ttl_cache_expiry(clock):
+    cache = TTLCache(max_size=10, ttl=60)
+    cache.set("default", 1)
+    cache.set("short", 2, ttl=10)
+    cache.set("absolute", 3, expires_at=clock.now + 30)
+
+    clock.advance(20)
+    assert cache.get("short") is None
+    assert cache.get("absolute") == 3
+    assert cache.get("default") == 1
+
+    clock.advance(41)
+    assert cache.get("default", "missing") == "missing"
+    assert cache.get("absolute") is None
+    assert cache.stats()["misses"] == 3
+
+
+def test_ttl_cache_contains_does_not_count():
+    cache = TTLCache(max_size=10)
+    cache.set("a", 1)
+    assert "a" in cache and "b" not in cache
+    assert cache.hits == cache.misses == 0
+
+
+@pytest.mark.anyio
+async def test_swr_concurrent_misses_share_one_fetch():
+    cache = SWRCache(max_size=10)
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "value"
+
+    results = await asyncio.gather(*(cache.get("k", fetch, ttl=60) for _ in range(5)))
+    assert results == ["value"] * 5
+    assert calls == 1
+    assert await cache.get("k", fetch, ttl=60) == "value"
+    assert calls == 1
+
+
+@pytest.mark.anyio
+async def test_swr_failed_fetch_is_not_cached():
+    cache = SWRCache(max_size=10)
+
+    async def fail():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        await cache.get("k", fail, ttl=60)
+    assert len(cache) == 0
+
+    async def ok():
+        return 1
+
+    assert await cache.get("k", ok, ttl=60) == 1
+
+
+@pytest.mark.anyio
+async def test_swr_cancelled_caller_does_not_cancel_fetch():
+    cache = SWRCache(max_size=10)
+    started = asyncio.Event()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        started.set()
+        await asyncio.sleep(0.02)
+        return "value"
+
+    caller = asyncio.ensure_future(cache.get("k", fetch, ttl=60))
+    await started.wait()
+    caller.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await caller
+
+    # 共享的获取继续完成并写入缓存, 之后的调用方直接命中
+    assert await cache.get("k", fetch, ttl=60) == "value"
+    assert calls == 1
+
+
+@pytest.mark.anyio
+async def test_swr_serves_stale_and_refreshes_in_background(clock):
+    cache = SWRCache(max_size=10, stale_ttl=100)
+    values = iter(["old", "new"])
+
+    async def fetch():
+        return next(values)
+
+    assert await cache.get("k", fetch, ttl=10) == "old"
+    clock.advance(20)
+    assert await cache.get("k", fetch, ttl=10) == "old"
+    await settle()
+    assert await cache.get("k", fetch, ttl=10) == "new"
+    stats = cache.stats()
+    assert stats["stale_hits"] == 1 and stats["refreshes"] == 1
+
+
+@pytest.mark.anyio
+async def test_swr_failed_refresh_keeps_stale_value(clock):
+    cache = SWRCache(max_size=10, stale_ttl=100)
+
+    async def ok():
+        return "old"
+
+    async def fail():
+        raise RuntimeError("boom")
+
+    await cache.get("k", ok, ttl=10)
+    clock.advance(20)
+    assert await cache.get("k", fail, ttl=10) == "old"
+    await settle()
+    assert cache.stats()["refresh_failures"] == 1
+    assert await cache.get("k", ok, ttl=10) == "old"
+    await settle()
+
+    # 超过宽限期后必须重新获取
+    clock.advance(200)
+    with pytest.raises(RuntimeError):
+        await cache.get("k", fail, ttl=10)
+
+
+@pytest.mark.anyio
+async def test_swr_ttl_can_depend_on_value(clock):
+    cache = SWRCache(max_size=10)
+    calls = 0
+
+    async def empty():
+        nonlocal calls
+        calls += 1
+        return []
+
+    ttl = lambda value: 60 if value else 5
+    await cache.get("k", empty, ttl=ttl)
+    clock.advance(6)
+    await cache.get("k", empty, ttl=ttl)
+    assert calls == 2
+
+
+@pytest.mark.anyio
+async def test_swr_peek_returns_stale_only_when_allowed(clock):
+    cache = SWRCache(max_size=10, stale_ttl=100)
+
+    async def fetch():
+        return "old"
+
+    await cache.get("k", fetch, ttl=10)
+    assert cache.peek("k") == "old"
+
+    clock.advance(20)
+    assert cache.peek("k") is None
+    assert cache.peek("k", allow_stale=True) == "old"
+    assert cache.stats()["stale_hits"] == 1
+
+    clock.advance(100)
+    assert cache.peek("k", allow_stale=True) is None
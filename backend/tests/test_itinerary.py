@@ -0,0 +1,76 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from backend.app.utils.geo import distance_matrix
+from backend.app.utils.itinerary import DEFAULT_VISIT_MINUTES, _nearest_neighbour, _route_length, _two_opt, \
+    optimize_itinerary
+
+
+def _points(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [(rng.uniform(116.2, 116.6), rng.uniform(39.8, 40.05)) for _ in range(count)]
+
+
+def test_every_stop_is_used_at_most_once_and_days_fit():
+    points = _points(40)
+    routes = optimize_itinerary(points, 4, daily_minutes=480, speed=300)
+
+    assert len(routes) == 4
+    stops = [i for route in routes for i in route.stops]
+    assert len(stops) == len(set(stops))
+    assert all(route.minutes <= 480 for route in routes if len(route.stops) > 1)
+
+
+def test_visit_minutes_limit_selection():
+    points = _points(20)
+    short = optimize_itinerary(points, 2, visit_minutes=[60] * 20, daily_minutes=480)
+    long = optimize_itinerary(points, 2, visit_minutes=[240] * 20, daily_minutes=480)
+
+    count = lambda routes: sum(len(route.stops) for route in routes)
+    assert count(long) < count(short)
+    assert count(long) <= 4
+
+
+def test_missing_visit_minutes_use_default():
+    points = _points(10)
+    explicit = optimize_itinerary(points, 2, visit_minutes=[DEFAULT_VISIT_MINUTES] * 10)
+    implicit = optimize_itinerary(points, 2, visit_minutes=[None] * 10)
+    assert [r.stops for r in explicit] == [r.stops for r in implicit]
+
+
+def test_higher_ranked_stops_are_kept_first():
+    points = _points(30)
+    routes = optimize_itinerary(points, 1, visit_minutes=[120] * 30, daily_minutes=480)
+    assert set(routes[0].stops) <= {0, 1, 2, 3}
+
+
+def test_per_day_hotels_and_validation():
+    points = _points(12)
+    hotels = [(116.25, 39.85), (116.55, 40.0)]
+    routes = optimize_itinerary(points, 2, hotels=hotels)
+    assert len(routes) == 2
+
+    with pytest.raises(ValueError):
+        optimize_itinerary(points, 3, hotels=hotels)
+    with pytest.raises(ValueError):
+        optimize_itinerary(points, 0)
+
+
+def test_no_locations():
+    routes = optimize_itinerary([], 2)
+    assert [route.stops for route in routes] == [[], []]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_two_opt_never_lengthens_route(seed):
+    points = _points(15, seed)
+    distances = np.asarray(distance_matrix(points + [(116.4, 39.9)]))
+    stops = list(range(15))
+    for depot in (None, 15):
+        initial = _nearest_neighbour(distances, stops, depot)
+        improved = _two_opt(distances, initial, depot)
+        assert sorted(improved) == stops
+        assert _route_length(distances, improved, depot) <= _route_length(distances, initial, depot) + 1e-6
@@ -0,0 +1,95 @@
+import json
+
+import pytest
+
+from backend.app.models.schemas import TripRequest
+from backend.app.utils.json_stream import IncrementalTripPlanParser
+
+
+def _day(index: int) -> dict:
+    return {
+        "date": f"2026-10-{17 + index}",
+        "day_index": index,
+        "description": f"第{index + 1}天 {{带括号和\"引号\"的描述}}",
+        "transportation": "公共交通",
+        "accommodation": "经济型酒店",
+        "attractions": [{
+            "name": "故宫",
+            "address": "北京市东城区景山前街4号",
+            "location": {"longitude": 116.397, "latitude": 39.918},
+            "visit_duration": 180,
+            "description": "[明清皇宫]",
+        }],
+        "meals": [],
+    }
+
+
+PLAN = {
+    "city": "北京",
+    "start_date": "2026-10-17",
+    "end_date": "2026-10-19",
+    "days": [_day(0), _day(1), _day(2)],
+    "weather_info": [{"date": "2026-10-17", "day_weather": "晴", "night_weather": "晴", "day_temp": 20,
+                      "night_temp": 10, "wind_direction": "北", "wind_power": "3"}],
+    "overall_suggestions": "注意防晒",
+    "budget": {"total_attractions": 60, "total": 600},
+}
+
+REQUEST = TripRequest(city="北京", start_date="2026-10-17", end_date="2026-10-19", travel_days=3,
+                      transportation="公共交通", accommodation="经济型酒店")
+
+
+def _feed_in_chunks(parser: IncrementalTripPlanParser, text: str, size: int):
+    events = []
+    for i in range(0, len(text), size):
+        events.extend(parser.feed(text[i:i + size]))
+    return events
+
+
+@pytest.mark.parametrize("size", [1, 7, 64, 100000])
+def test_emits_each_object_once_as_it_closes(size):
+    text = "```json\n" + json.dumps(PLAN, ensure_ascii=False) + "\n```"
+    parser = IncrementalTripPlanParser()
+    events = _feed_in_chunks(parser, text, size)
+
+    assert [name for name, _ in events] == ["day", "day", "day", "weather", "budget"]
+    assert [day.day_index for day in parser.days] == [0, 1, 2]
+    assert parser.days[0].description == PLAN["days"][0]["description"]
+    assert parser.budget.total == 600
+    assert parser.completed and not parser.errors
+
+
+def test_truncated_stream_keeps_closed_days():
+    text = json.dumps(PLAN, ensure_ascii=False)
+    # 在第三天的中间截断
+    cut = text.index('"day_index": 2') + 5
+    parser = IncrementalTripPlanParser()
+    parser.feed(text[:cut])
+
+    assert [day.day_index for day in parser.days] == [0, 1]
+    assert not parser.completed
+    plan = parser.build_plan(REQUEST)
+    assert len(plan.days) == 2 and plan.budget is None
+
+
+def test_invalid_item_is_skipped_and_reported():
+    plan = dict(PLAN, days=[_day(0), {"day_index": 1}, _day(2)])
+    parser = IncrementalTripPlanParser()
+    parser.feed(json.dumps(plan, ensure_ascii=False))
+
+    assert [day.day_index for day in parser.days] == [0, 2]
+    assert len(parser.errors) == 1 and parser.errors[0].startswith("day:")
+
+
+def test_build_plan_requires_at_least_one_day():
+    parser = IncrementalTripPlanParser()
+    parser.feed('{"city": "北京", "days": [')
+    with pytest.raises(ValueError):
+        parser.build_plan(REQUEST)
+
+
+def test_ignores_text_after_root_object():
+    parser = IncrementalTripPlanParser()
+    parser.feed(json.dumps({"days": [_day(0)]}, ensure_ascii=False) + '\n{"days": [')
+    parser.feed(json.dumps(_day(1), ensure_ascii=False))
+    assert [day.day_index for day in parser.days] == [0]
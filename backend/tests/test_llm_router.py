@@ -0,0 +1,133 @@
+import asyncio
+
+import pytest
+
+from backend.app.utils.llm_router import LLMRouter
+
+
+class RateLimitError(Exception):
+    pass
+
+
+def _router(**kwargs) -> LLMRouter:
+    options = dict(min_samples=1000, default_delay=0.02, min_delay=0.01, cooldown=30)
+    options.update(kwargs)
+    return LLMRouter([("primary", None), ("secondary", None)], **options)
+
+
+def _start(delays, errors=None):
+    """以后端序号发起调用: 等待 delays[i] 秒后返回后端序号, 或抛出 errors[i]"""
+    errors = errors or {}
+
+    async def call(index: int):
+        await asyncio.sleep(delays[index])
+        if index in errors:
+            raise errors[index]
+        return index
+
+    return call
+
+
+@pytest.mark.anyio
+async def test_hedge_wins_when_primary_is_slow():
+    router = _router()
+    assert await router.race(_start([1.0, 0.0])) == 1
+
+    primary, secondary = router.backends
+    assert router.hedged_requests == 1
+    assert secondary.hedge_wins == 1 and secondary.wins == 1
+    assert len(secondary.latency["invoke"].samples) == 1
+
+
+@pytest.mark.anyio
+async def test_loser_timing_is_not_a_latency_sample():
+    router = _router()
+    await router.race(_start([1.0, 0.0]))
+
+    stats = router.backends[0].latency["invoke"]
+    # 落败的调用被截断, 不计入对冲阈值使用的样本
+    assert len(stats.samples) == 0 and stats.ewma is None
+    assert stats.losses == 1
+    assert stats.lower_bound is not None and stats.lower_bound >= 0.02
+    assert stats.estimate == stats.lower_bound
+
+    # 完成的调用清除落败下限
+    stats.record(0.005)
+    assert stats.lower_bound is None and stats.estimate == 0.005
+
+
+@pytest.mark.anyio
+async def test_slow_backend_is_demoted_by_loss_signal():
+    router = _router(slow_factor=2.0)
+    router.backends[1].latency["invoke"].record(0.001)
+    await router.race(_start([1.0, 0.0]))
+    assert router.order() == [1, 0]
+
+
+@pytest.mark.anyio
+async def test_failure_falls_through_to_next_backend_immediately():
+    router = _router(default_delay=10)
+    result = await asyncio.wait_for(router.race(_start([0.0, 0.0], {0: RuntimeError("boom")})), timeout=1)
+    assert result == 1
+    assert router.backends[0].errors == 1 and router.hedged_requests == 0
+
+
+@pytest.mark.anyio
+async def test_all_backends_failing_raises_last_error():
+    router = _router()
+    with pytest.raises(ValueError):
+        await router.race(_start([0.0, 0.0], {0: RuntimeError("first"), 1: ValueError("last")}))
+
+
+@pytest.mark.anyio
+async def test_rate_limited_backend_cools_down():
+    router = _router()
+    await router.race(_start([0.0, 0.0], {0: RateLimitError("429")}))
+    assert router.backends[0].cooling_down
+    assert router.order()[0] == 1
+
+
+@pytest.mark.anyio
+async def test_consecutive_errors_trigger_cooldown():
+    router = _router()
+    for _ in range(3):
+        await router.race(_start([0.0, 0.0], {0: RuntimeError("boom")}))
+    assert router.backends[0].cooling_down
+
+
+@pytest.mark.anyio
+async def test_cancelling_the_race_cancels_pending_calls():
+    router = _router(default_delay=0.01)
+    finished = []
+
+    async def call(index: int):
+        await asyncio.sleep(1)
+        finished.append(index)
+
+    race = asyncio.ensure_future(router.race(call))
+    await asyncio.sleep(0.05)
+    race.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await race
+    await asyncio.sleep(0)
+    assert finished == []
+    # 取消不计为后端错误
+    assert all(backend.errors == 0 for backend in router.backends)
+
+
+@pytest.mark.anyio
+async def test_loser_still_running_is_cancelled():
+    router = _router(default_delay=0.01)
+    cancelled = []
+
+    async def call(index: int):
+        try:
+            await asyncio.sleep(1 if index == 0 else 0.0)
+        except asyncio.CancelledError:
+            cancelled.append(index)
+            raise
+        return index
+
+    assert await router.race(call) == 1
+    await asyncio.sleep(0)
+    assert cancelled == [0]
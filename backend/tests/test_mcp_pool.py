@@ -0,0 +1,68 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from backend.app.utils.mcp import MCPSessionPool
+
+
+class FakeClient:
+    """代替 MultiServerMCPClient, 记录建立的会话数"""
+
+    def __init__(self):
+        self.sessions = 0
+
+    @asynccontextmanager
+    async def session(self, name: str):
+        self.sessions += 1
+        yield object()
+
+
+@pytest.fixture
+async def pool():
+    pool = MCPSessionPool("test", {"transport": "streamable_http", "url": "http://127.0.0.1:9/mcp"},
+                          size=1, health_check_interval=0)
+    client = FakeClient()
+    for slot in pool._slots:
+        slot.client = client
+    await pool.open()
+    yield pool, client
+    await pool.close()
+
+
+@pytest.mark.anyio
+async def test_cancelled_caller_keeps_session(pool):
+    pool, client = pool
+    entered = asyncio.Event()
+
+    async def call():
+        async with pool.acquire():
+            entered.set()
+            await asyncio.sleep(1)
+
+    task = asyncio.ensure_future(call())
+    await entered.wait()
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    slot = pool._slots[0]
+    assert not slot.broken
+    async with pool.acquire():
+        pass
+    assert client.sessions == 1
+
+
+@pytest.mark.anyio
+async def test_transport_error_marks_session_broken(pool):
+    pool, client = pool
+
+    with pytest.raises(ConnectionError):
+        async with pool.acquire():
+            raise ConnectionError("连接已断开")
+    assert pool._slots[0].broken
+
+    # 下次取用时重连
+    async with pool.acquire():
+        pass
+    assert client.sessions == 2
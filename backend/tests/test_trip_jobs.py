@@ -0,0 +1,140 @@
+import asyncio
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.app.models.schemas import DayPlan, TripPlan, TripRequest
+from backend.app.services import trip_jobs
+from backend.app.services.trip_jobs import JobQueueFullError, TripJobQueue, TripJobStore, close_trip_job_queue
+
+REQUEST = TripRequest(city="北京", start_date="2026-10-17", end_date="2026-10-18", travel_days=2,
+                      transportation="公共交通", accommodation="经济型酒店")
+
+
+def test_unfinished_jobs_are_requeued_after_restart(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    store = TripJobStore(path)
+    queued = store.create(REQUEST, None)
+    running = store.create(REQUEST, True)
+    done = store.create(REQUEST, False)
+    store.mark_running(running)
+    store.update_progress(running, [], 1)
+    store.mark_running(done)
+    store.mark_failed(done, "boom")
+    store.close()
+
+    restarted = TripJobStore(path)
+    assert restarted.requeue_unfinished() == [queued, running]
+    job = restarted.get(running)
+    assert job.status == "queued" and job.started_at is None and job.days_completed == 0
+    assert restarted.get_request(running) == (REQUEST, True)
+    assert restarted.get(done).status == "failed"
+    assert restarted.get_result(done).success is False
+    restarted.close()
+
+
+class FakePlanner:
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+
+    async def plan_trip(self, request, fast_path=None, progress=None):
+        await progress("stage", {"name": "weather", "status": "success"})
+        await progress("day", {})
+        if self.fail:
+            raise RuntimeError("规划失败")
+        days = [DayPlan(date=request.start_date, day_index=0, description="", transportation="", accommodation="")]
+        return TripPlan(city=request.city, start_date=request.start_date, end_date=request.end_date, days=days,
+                        overall_suggestions="")
+
+
+async def _wait_finished(queue: TripJobQueue, job_id: str):
+    for _ in range(200):
+        job = await queue.get(job_id)
+        if job.status in ("succeeded", "failed"):
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError("任务未完成")
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("fail", [False, True])
+async def test_queue_runs_job_and_records_progress(monkeypatch, fail):
+    monkeypatch.setattr(trip_jobs, "get_trip_planner_agent", lambda: FakePlanner(fail))
+    queue = TripJobQueue(TripJobStore(":memory:"), workers=1)
+    await queue.start()
+    try:
+        job = await queue.submit(REQUEST)
+        finished = await _wait_finished(queue, job.job_id)
+    finally:
+        await queue.stop()
+
+    assert finished.status == ("failed" if fail else "succeeded")
+    assert [stage.name for stage in finished.stages] == ["weather"]
+    assert finished.days_completed == 1
+    result = await queue.get_result(finished.job_id)
+    assert result.success is not fail
+
+
+@pytest.mark.anyio
+async def test_submit_rejects_when_queue_is_full():
+    queue = TripJobQueue(TripJobStore(":memory:"), workers=1, max_queued=1)
+    await queue.submit(REQUEST)
+    with pytest.raises(JobQueueFullError):
+        await queue.submit(REQUEST)
+
+
+@pytest.mark.anyio
+async def test_close_stops_workers_and_closes_store(monkeypatch):
+    queue = TripJobQueue(TripJobStore(":memory:"), workers=2)
+    monkeypatch.setattr(trip_jobs, "_trip_job_queue", queue)
+    await queue.start()
+    workers = list(queue._tasks)
+
+    await close_trip_job_queue()
+
+    assert trip_jobs._trip_job_queue is None
+    assert all(task.done() for task in workers)
+    with pytest.raises(sqlite3.ProgrammingError):
+        queue.store.get("missing")
+
+
+def _finish(store: TripJobStore, job_id: str, hours_ago: float):
+    store.mark_running(job_id)
+    store.mark_failed(job_id, "boom")
+    finished_at = (datetime.now() - timedelta(hours=hours_ago)).isoformat()
+    store._execute("UPDATE trip_jobs SET finished_at = ? WHERE job_id = ?", (finished_at, job_id))
+
+
+def test_prune_deletes_only_expired_finished_jobs():
+    store = TripJobStore(":memory:")
+    old, recent, queued = (store.create(REQUEST, None) for _ in range(3))
+    _finish(store, old, hours_ago=80)
+    _finish(store, recent, hours_ago=1)
+
+    assert store.prune_finished(72) == 1
+    assert store.get(old) is None
+    assert store.get(recent).status == "failed"
+    assert store.get(queued).status == "queued"
+
+    indexes = store._execute("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'trip_jobs'")
+    assert "idx_trip_jobs_status" in [row["name"] for row in indexes]
+
+
+@pytest.mark.anyio
+async def test_queue_prunes_on_start_and_periodically():
+    store = TripJobStore(":memory:")
+    _finish(store, store.create(REQUEST, None), hours_ago=80)
+    queue = TripJobQueue(store, workers=1, retention_hours=72, prune_interval=0.01)
+    await queue.start()
+    try:
+        assert queue.pruned == 1
+        _finish(store, store.create(REQUEST, None), hours_ago=100)
+        for _ in range(100):
+            if queue.pruned == 2:
+                break
+            await asyncio.sleep(0.01)
+        assert queue.pruned == 2
+    finally:
+        await queue.stop()
+    assert queue.stats()["pruned"] == 2
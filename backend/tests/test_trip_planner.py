@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from backend.app.agents.multi_agent_trip_planner import MultiAgentTripPlanner, StageOutput
+from backend.app.models.schemas import Location, POIInfo, TripRequest
+
+REQUEST = TripRequest(city="北京", start_date="2026-10-17", end_date="2026-10-18", travel_days=2,
+                      transportation="公共交通", accommodation="经济型酒店")
+
+
+@pytest.mark.parametrize("poi_type, minutes", [
+    ("风景名胜;主题乐园;主题乐园", 300),
+    ("科教文化服务;博物馆;博物馆", 150),
+    ("风景名胜;公园广场;公园", 150),
+    ("体育休闲服务;度假疗养场所;公园", 90),
+    ("餐饮服务;中餐厅;中餐厅", None),
+    ("", None),
+])
+def test_visit_minutes_follow_poi_type(poi_type, minutes):
+    poi = POIInfo(id="1", name="测试", type=poi_type, address="", location=Location(longitude=116.4, latitude=39.9))
+    assert MultiAgentTripPlanner._visit_minutes(poi) == minutes
+
+
+def _planner(response: str) -> MultiAgentTripPlanner:
+    """各阶段直接返回固定结果的规划器, 行程规划Agent返回 response"""
+    planner = MultiAgentTripPlanner()
+
+    async def noop():
+        pass
+
+    async def stage(*args, **kwargs):
+        return StageOutput("暂无", "暂无"), 0
+
+    async def generate_plan(query, progress=None, parser=None):
+        if parser is not None:
+            parser.feed(response)
+        return response, 100
+
+    planner.ensure_initialized = noop
+    planner._search_attractions_fast = stage
+    planner._query_weather_fast = stage
+    planner._search_hotels_fast = stage
+    planner._generate_plan = generate_plan
+    return planner
+
+
+@pytest.mark.anyio
+async def test_unparseable_planner_output_is_reported_as_degraded():
+    trip_plan = await _planner("抱歉, 暂时无法生成行程").plan_trip(REQUEST, fast_path=True)
+
+    assert len(trip_plan.days) == 2
+    assert [(d.part, d.reason) for d in trip_plan.degraded] == [("planner", "输出无法解析, 使用备用行程")]
+
+
+@pytest.mark.anyio
+async def test_truncated_planner_output_keeps_complete_days():
+    day = {"date": "2026-10-17", "day_index": 0, "description": "故宫一日游", "transportation": "公共交通",
+           "accommodation": "经济型酒店", "attractions": [], "meals": []}
+    response = '{"city": "北京", "days": [' + json.dumps(day, ensure_ascii=False) + ', {"date": "2026-10'
+    trip_plan = await _planner(response).plan_trip(REQUEST, fast_path=True)
+
+    assert [d.description for d in trip_plan.days][0] == "故宫一日游"
+    assert [d.part for d in trip_plan.degraded] == ["days"]